@@ -1,98 +1,71 @@
 from pylsl import StreamInlet, resolve_byprop
 import numpy as np
 import pandas as pd
-import pickle
-import serial
+import argparse
 import time
-from goto import with_goto
 from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import accuracy_score
+from vrehab.acquisition import ChunkedInlet
+from vrehab.arduino import ArduinoLink
+from vrehab.buffer import SampleBuffer
+from vrehab.devices import add_device_arguments, open_serial
+from vrehab.inference import LinearIntentKernel
+from vrehab.recording import SessionRecorder
+from vrehab.workflow import CALIBRATE, CONTROL, COOLDOWN, READY, TRAIN, SessionMachine
+
+parser = argparse.ArgumentParser(description="EEG-triggered Arduino control")
+add_device_arguments(parser, arduino=True)
+parser.add_argument("--stream", default="AURA_Power", help="LSL stream name")
+parser.add_argument("--threshold", type=int, default=700)
+parser.add_argument("--rest", type=float, default=30.0, help="seconds of rest during training")
+parser.add_argument("--move", type=float, default=30.0, help="seconds of imagined movement during training")
+parser.add_argument("--cooldown", type=float, default=10.0, help="seconds after each trigger before monitoring resumes")
+parser.add_argument("--framed", action="store_true", help="send '<seq>:<command>' frames (firmware must echo the sequence number)")
+args = parser.parse_args()
+
+
+def on_ack(result):
+    if result.timed_out:
+        print("Arduino did not acknowledge command", result.command)
+    else:
+        print("Arduino ack %r in %.1f ms" % (result.reply, result.rtt * 1000))
+
 
-arduino = serial.Serial(port='COM3', baudrate=38400, timeout=.1)
+arduino = ArduinoLink(open_serial(args.arduino, port=args.port, baudrate=38400, timeout=.1), framed=args.framed,
+                      on_ack=on_ack, on_error=lambda e: print("Arduino error:", e))
 
 print("looking for an EEG stream...")
-brain_stream = resolve_byprop("name", "AURA_Power")
+brain_stream = resolve_byprop("name", args.stream)
 
 brain_inlet = StreamInlet(brain_stream[0])
 brain_inlet.open_stream()
+acquisition = ChunkedInlet(brain_inlet, chunk_size=32, max_latency=0.02)
 
-global sample
-  
 def write_read(x):
-    arduino.write(bytes(x, 'utf-8'))
-    time.sleep(0.05)
-    data = arduino.readline()
-    return data
-
-def conteo():
-    print("4")
-    time.sleep(1)
-    print("3")
-    time.sleep(1)
-    print("2")
-    time.sleep(1)
-    print("1")
-    time.sleep(1)
-    print("0")
-    time.sleep(1)
-
-@with_goto
-def calibration():
-
-    label .train
-
-    rest_df = pd.DataFrame()
-    move_df = pd.DataFrame()
-
-    print("RELAX TRAINING IN 5 SECONDS")
-    conteo()
-    #################################  training rest
-    timeout = True
-
-    start = time.time()
-
-    while timeout:
-        end = time.time()
-        end2 = end - start
-        if(end2 > 30):
-            timeout = False
-
-        sample, timestamp = brain_inlet.pull_sample()
-        print(sample)
-        rest_df = pd.concat([rest_df, pd.DataFrame(sample).T])
-
-    rest_df.reset_index()
-    rest_df["Event"] = 0
-
-    print(rest_df.shape)
-    print("Entrenamiento de intencion de movimiento en 5 segundos")
-    conteo()
-
-    #################################  training move
-    timeout = True
-
-    start = time.time()
-
-    while timeout:
-        end = time.time()
-        end2 = end - start
-        if(end2 > 30):
-            timeout = False
+    # Queued for the link's writer thread; the acknowledgement arrives via on_ack
+    return arduino.send(x)
+
+
+def on_phase(phase, stage):
+    if stage is not None:
+        print(stage.message)
+    elif phase == TRAIN:
+        print("END OF TRAINING")
+    elif phase == COOLDOWN:
+        print("Tiempo de relajacion: %.0f segundos." % machine.cooldown)
+    elif phase == CONTROL:
+        print("Inicia nuevamente el monitoreo")
 
-        sample, timestamp = brain_inlet.pull_sample()
-        print(sample)
-        move_df = pd.concat([move_df, pd.DataFrame(sample).T])
 
-    move_df.reset_index()
-    move_df["Event"] = 1
+machine = SessionMachine(rest_s=args.rest, move_s=args.move, lead_in=5.0, cooldown=args.cooldown,
+                         threshold=args.threshold, on_phase=on_phase)
 
-    print("END OF TRAINING")
 
+def train(rest_df, move_df):
     print("AI TRAINING INIT")
     selected_data = pd.concat([rest_df,move_df])
-    selected_data.to_csv('full_data_personas_nuevas.csv')
 
     X = selected_data.iloc[1:, :-1].values
     y = selected_data.iloc[1:, -1].values
@@ -108,55 +81,65 @@ def calibration():
     lr_y_pred_3 = lr_model_3.predict(X_test)
 
     print("AI ACCURACY (%): ", accuracy_score(y_test,lr_y_pred_3)*100)
+    return sc_x, lr_model_3
 
-    print("Desea continuar con el control (y) o reiniciar el entrenamiento (n)? (y / n):")
-    respuesta = input()
-
-    if respuesta == "y":
-        
-        label .ininew
-        #write_read("1")
-        counter_1 = 0
-        #counter_moves = 0
-
-        while True:
-            sample, timestamp = brain_inlet.pull_sample()
-            '''if counter_moves == 6:
-                write_read("0")
-                counter_moves = 0
-            '''
-            if counter_1 == 700:
-                write_read("1")
-                # write_read("1")
-                # write_read("1")
-                # write_read("1")
-                # write_read("1")
-                # write_read("1") 
-                # write_read("0") 
-                counter_1 = 0
-                print("Tiempo de relajacion: 5 segundos.")
-                conteo()
-                break
-                # counter_moves = counter_moves + 1
-
-
-            intention = lr_model_3.predict(sc_x.transform(pd.DataFrame(sample).values.T))
-            if intention == 1:
-                counter_1 = counter_1 + 1
-            else:
-                if counter_1 > 0:
-                    counter_1 = counter_1 - 1
-                else:
-                    counter_1 = 0
-
-            print(counter_1)
-            #print(loaded_model.predict(sc.transform(pd.DataFrame(sample).values.T)))
 
-        time.sleep(5)
-        print("Inicia nuevamente el monitoreo")
-        goto .ininew
-
-    else:
-        goto .train
+def calibration():
+    """Drive the session machine; the inlet is read on every pass, whatever the phase."""
+    recorder = buffers = kernel = None
+    countdown = None
+    machine.begin_calibration(time.monotonic())
+    while True:
+        samples, timestamps = acquisition.read()
+        now = time.monotonic()
+
+        if machine.phase == CALIBRATE:
+            if recorder is None:
+                recorder = SessionRecorder(acquisition.channel_count, stream_name=args.stream, srate=brain_inlet.info().nominal_srate())
+                buffers = (SampleBuffer(acquisition.channel_count), SampleBuffer(acquisition.channel_count))
+            label = machine.label(now)
+            if label is not None:
+                print(samples)
+                buffers[label].extend(samples, timestamps, label)
+                recorder.write(samples, timestamps, label)
+            elif machine.phase == CALIBRATE:
+                left = int(machine.stage_remaining(now))
+                if left != countdown:
+                    countdown = left
+                    print(left)
+
+        if machine.phase == TRAIN:
+            recorder.close()
+            print("Session saved to", recorder.path)
+            rest_df, move_df = (buffer.to_dataframe() for buffer in buffers)
+            print(rest_df.shape, move_df.shape)
+            recorder = None
+            sc_x, model = train(rest_df, move_df)
+            kernel = LinearIntentKernel.from_sklearn(sc_x, model, max_chunk=acquisition.chunk_size)
+            machine.training_finished(True)
+
+        if machine.phase == READY:
+            print("Desea continuar con el control (y) o reiniciar el entrenamiento (n)? (y / n):")
+            respuesta = input()
+            # Whatever arrived while waiting for the answer is stale
+            brain_inlet.flush()
+            if respuesta == "y":
+                machine.begin_control()
+            else:
+                machine.begin_calibration(time.monotonic())
+            continue
 
-calibration()
+        if machine.phase in (CONTROL, COOLDOWN):
+            for _ in machine.decide(kernel.predict(samples), now):
+                write_read("1")
+            if machine.phase == CONTROL:
+                print(machine.counter.value)
+
+try:
+    calibration()
+except KeyboardInterrupt:
+    pass
+finally:
+    # Reads are bounded by max_latency and the link's threads wake on close, so Ctrl+C exits at once
+    arduino.close()
+    brain_inlet.close_stream()
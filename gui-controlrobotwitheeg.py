@@ -1,18 +1,12 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
-import serial
 import serial.tools.list_ports
-import threading
 import time
-import queue
-import pandas as pd
-from pylsl import StreamInlet, resolve_byprop
-from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LogisticRegression
-from sklearn.metrics import accuracy_score
+import argparse
 import typing
-import pydobot
+from vrehab.devices import add_device_arguments
+from vrehab.engine import EngineEvent, VRehabEngine
+from vrehab.uibus import UiBus
 
 
 class VRehabGUI:
@@ -24,9 +18,11 @@ class VRehabGUI:
     - Chips, primary/ghost buttons, flat progress bar, threshold slider
     - All existing methods and behavior intact; long ops on threads; .after for UI
     - Logging preserved; ML workflow unchanged; serial write '1' unchanged
+    - Connections, training and control live in ``vrehab.engine.VRehabEngine``;
+      this class only renders it (``python -m vrehab.cli`` runs it headless)
     """
 
-    def __init__(self, root: tk.Tk):
+    def __init__(self, root: tk.Tk, robot_backend: str = "dobot"):
         self.root = root
         self.root.title("VRehab - Mind-Controlled Robot")
         self.root.minsize(1200, 800)
@@ -48,14 +44,13 @@ class VRehabGUI:
             "TRACK": "#0b1220",
         }
 
-        # State
-        self.robot = None
-        self.brain_inlet = None
-        self.lr_model = None
-        self.sc_x = None
-        self.is_training = False
-        self.is_controlling = False
-        self.threshold_var = tk.IntVar(value=700)
+        # State: everything but the widgets lives in the headless engine
+        self.engine = VRehabEngine(robot_backend=robot_backend, on_event=self.on_engine_event)
+        self.subject = self.engine.subject
+        self.threshold_var = tk.IntVar(value=self.engine.threshold)
+        self.control_refresh_ms = 33
+        self._latency_shown_at = 0.0
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
         # UI registry
         self.ui = {}
@@ -66,6 +61,10 @@ class VRehabGUI:
         # Build UI
         self.build_layout()
 
+        # Widget updates and log lines from worker threads are coalesced here
+        self.ui_bus = UiBus(self.root, self.write_log_lines, hz=30)
+        self.ui_bus.start()
+
         # Initial data
         self.update_com_ports()
         self.check_connections()
@@ -74,6 +73,9 @@ class VRehabGUI:
         self.log_message("App started")
         self.log_message("Connect Robot and EEG to begin mind control")
 
+        # Warm start from the newest stored model for the default subject
+        self.warm_start()
+
     # =============== THEME AND FACTORIES ===============
     def set_dark_theme(self) -> None:
         style = ttk.Style()
@@ -212,8 +214,13 @@ class VRehabGUI:
         eeg_frame = tk.Frame(side, bg=self.colors["CARD"]) 
         eeg_frame.grid(row=1, column=0, sticky="ew", pady=(16, 8))
         tk.Label(eeg_frame, text="EEG via LSL", bg=self.colors["CARD"], fg=self.colors["TEXT"], font=("Segoe UI", 12, "bold")).grid(row=0, column=0, sticky="w")
+        # Stream name to resolve, or one of the streams found by "Search Streams"
+        self.stream_var = tk.StringVar(value=self.engine.stream_name)
+        self.ui["stream_combo"] = ttk.Combobox(eeg_frame, textvariable=self.stream_var, width=28)
+        self.ui["stream_combo"].grid(row=1, column=0, sticky="ew", pady=(8, 0))
+        self._found_streams = {}
         eeg_btns = tk.Frame(eeg_frame, bg=self.colors["CARD"]) 
-        eeg_btns.grid(row=1, column=0, sticky="w", pady=(8, 0))
+        eeg_btns.grid(row=2, column=0, sticky="w", pady=(8, 0))
         self.ui["btn_connect_eeg"] = self.make_button_primary(eeg_btns, "Connect EEG", self.toggle_eeg)
         self.ui["btn_connect_eeg"].grid(row=0, column=0, padx=(0, 8))
         self.ui["btn_search_streams"] = self.make_button_ghost(eeg_btns, "Search Streams", self.search_eeg_streams)
@@ -269,6 +276,15 @@ class VRehabGUI:
         self.ui["btn_start_training"].grid(row=0, column=0, padx=(0, 8))
         self.ui["btn_stop_training"] = self.make_button_ghost(tr_btns, "Stop", self.stop_training)
         self.ui["btn_stop_training"].grid(row=0, column=1)
+        tk.Label(tr_btns, text="Subject", bg=self.colors["CARD"], fg=self.colors["MUTED"], font=("Segoe UI", 10)).grid(row=0, column=2, padx=(16, 8))
+        self.subject_var = tk.StringVar(value=self.subject)
+        self.ui["subject_entry"] = ttk.Entry(tr_btns, textvariable=self.subject_var, width=16)
+        self.ui["subject_entry"].grid(row=0, column=3)
+        self.ui["subject_entry"].bind("<Return>", lambda _e: self.warm_start())
+        self.ui["subject_entry"].bind("<FocusOut>", lambda _e: self.warm_start())
+        self.features_var = tk.BooleanVar(value=False)
+        self.ui["chk_features"] = tk.Checkbutton(tr_btns, text="Windowed features", variable=self.features_var, bg=self.colors["CARD"], fg=self.colors["TEXT"], selectcolor=self.colors["CARD"], activebackground=self.colors["CARD"], activeforeground=self.colors["TEXT"], font=("Segoe UI", 10))
+        self.ui["chk_features"].grid(row=0, column=4, padx=(16, 0))
 
         # Progress row
         pr = tk.Frame(tr, bg=self.colors["CARD"]) 
@@ -332,6 +348,17 @@ class VRehabGUI:
         self.ui["status_text"].pack(side="left", padx=(6, 0))
         self.ui["md_placeholder"] = tk.Frame(md, bg=self.colors["CARD"], height=80, highlightthickness=1, highlightbackground=self.colors["BORDER"]) 
         self.ui["md_placeholder"].grid(row=5, column=0, sticky="ew", pady=(12, 0))
+        self.ui["lbl_latency"] = tk.Label(md, text="Latency: —", bg=self.colors["CARD"], fg=self.colors["MUTED"], font=("Segoe UI", 10), justify="left")
+        self.ui["lbl_latency"].grid(row=6, column=0, sticky="w", pady=(8, 0))
+        adapt_row = tk.Frame(md, bg=self.colors["CARD"])
+        adapt_row.grid(row=7, column=0, sticky="w", pady=(8, 0))
+        self.adapt_norm_var = tk.BooleanVar(value=False)
+        self.adapt_weights_var = tk.BooleanVar(value=False)
+        for key, text, var in (("chk_adapt_norm", "Adapt normalization", self.adapt_norm_var), ("chk_adapt_weights", "Adapt weights", self.adapt_weights_var)):
+            self.ui[key] = tk.Checkbutton(adapt_row, text=text, variable=var, bg=self.colors["CARD"], fg=self.colors["TEXT"], selectcolor=self.colors["CARD"], activebackground=self.colors["CARD"], activeforeground=self.colors["TEXT"], font=("Segoe UI", 10))
+            self.ui[key].pack(side="left", padx=(0, 8))
+        self.ui["btn_reset_adaptation"] = self.make_button_ghost(adapt_row, "Reset adaptation", self.reset_adaptation)
+        self.ui["btn_reset_adaptation"].pack(side="left")
 
         # Right: Action & Threshold
         at_card = self.make_card(ctrl, title="Action & Threshold")
@@ -356,13 +383,16 @@ class VRehabGUI:
 
     # =============== UTILITIES ===============
     def log_message(self, message: str) -> None:
-        timestamp = time.strftime("%H:%M:%S")
-        self.log_text.insert(tk.END, f"[{timestamp}] {message}\n")
+        """Queue a log line; safe to call from any thread."""
+        self.ui_bus.log(message)
+
+    def write_log_lines(self, lines: typing.List[str]) -> None:
+        self.log_text.insert(tk.END, "".join(lines))
         self.log_text.see(tk.END)
-        self.root.update_idletasks()
 
     def update_threshold_pill(self, value: int) -> None:
         self.threshold_var.set(value)
+        self.engine.threshold = value
         self.ui["threshold_pill"].configure(text=str(value))
 
     def update_com_ports(self) -> None:
@@ -374,25 +404,31 @@ class VRehabGUI:
 
     def check_connections(self) -> None:
         # Robot
-        robot_connected = bool(self.robot)
+        robot_connected = bool(self.engine.robot)
         # EEG
-        eeg_connected = bool(self.brain_inlet)
+        eeg_connected = bool(self.engine.brain_inlet)
 
         # Sidebar chips
         self.ui["chip_arduino"]["set_status"](robot_connected, f"Robot: {'Connected' if robot_connected else 'Disconnected'}")
-        self.ui["chip_eeg"]["set_status"](eeg_connected, f"EEG: {'Connected' if eeg_connected else 'Disconnected'}")
+        eeg_text = f"EEG: {'Connected' if eeg_connected else 'Disconnected'}"
+        health = self.engine.stream_health
+        if eeg_connected and health is not None:
+            # During control the chip shows measured stream quality
+            eeg_connected = health.ok
+            eeg_text = f"EEG: {health.rate:.0f} Hz" if health.ok else f"EEG: {health.alerts[0]}"
+        self.ui["chip_eeg"]["set_status"](eeg_connected, eeg_text)
         # Header chips
         self.ui["hdr_arduino_chip"]["set_status"](robot_connected, f"Robot: {'Connected' if robot_connected else 'Disconnected'}")
-        self.ui["hdr_eeg_chip"]["set_status"](eeg_connected, f"EEG: {'Connected' if eeg_connected else 'Disconnected'}")
+        self.ui["hdr_eeg_chip"]["set_status"](eeg_connected, eeg_text)
 
         # Enable training only if both connected
-        if robot_connected and eeg_connected:
+        if robot_connected and eeg_connected and not self.engine.is_training:
             self.ui["btn_start_training"].configure(state="normal")
         else:
             self.ui["btn_start_training"].configure(state="disabled")
 
         # Enable control if model trained and EEG connected
-        if self.lr_model and eeg_connected:
+        if self.engine.lr_model and eeg_connected:
             self.ui["btn_start_control"].configure(state="normal")
         else:
             self.ui["btn_start_control"].configure(state="disabled")
@@ -400,318 +436,178 @@ class VRehabGUI:
         # Schedule next check
         self.root.after(1000, self.check_connections)
 
+    def on_engine_event(self, event: EngineEvent) -> None:
+        """Route engine events (often from worker threads) to widgets through the UI bus."""
+        if event.kind == "log":
+            self.log_message(event.message)
+        elif event.kind == "training":
+            if event.message:
+                self.ui_bus.post("training_label", self.training_label.configure, text=event.message)
+            if event.value is not None:
+                self.ui_bus.post("training_progress", self.training_progress.configure, value=event.value)
+            elif not self.engine.is_training:
+                self.ui_bus.post("btn_stop_training", self.ui["btn_stop_training"].configure, state="disabled")
+        elif event.kind == "samples":
+            self.ui_bus.post("lbl_samples", self.ui["lbl_samples"].configure, text=f"Samples: {event.value}")
+        elif event.kind == "model":
+            text = f"Accuracy: {event.value:.2f}%" if event.value is not None else "Accuracy: —"
+            self.ui_bus.post("lbl_accuracy", self.ui["lbl_accuracy"].configure, text=text)
+        elif event.kind == "trigger":
+            if self.engine.robot_scheduler:
+                self.ui_bus.post("chip_send", self.ui["chip_send"]["set_status"], True, "Robot movement started")
+            self.ui_bus.post("chip_reset", self.ui["chip_reset"]["set_status"], True, "Reset counter & log action")
+        elif event.kind == "robot" and event.message in ("done", "cancelled", "error"):
+            self.ui_bus.post("chip_send", self.ui["chip_send"]["set_status"], False, "Robot idle")
+            if event.value.name == "movement":
+                self.ui_bus.post("btn_test_robot", self.ui["btn_test_robot"].configure, state="normal", text="🤖 Test Robot Movement")
+
     # =============== PUBLIC METHODS (UNCHANGED NAMES) ===============
     def toggle_robot(self) -> None:
-        if not self.robot:
+        if not self.engine.robot:
             try:
-                port = self.ui["com_combo"].get()
-                self.robot = pydobot.Dobot(port=port, verbose=True)
+                self.engine.connect_robot(self.ui["com_combo"].get())
                 self.ui["btn_connect_arduino"].configure(text="Disconnect Robot")
-                self.log_message(f"Robot connected to {port}")
             except Exception as e:
                 messagebox.showerror("Connection Error", f"Failed to connect to Robot: {e}")
                 self.log_message(f"Robot connection failed: {e}")
         else:
             try:
-                self.robot.close()
-                self.robot = None
+                self.engine.disconnect_robot()
                 self.ui["btn_connect_arduino"].configure(text="Connect Robot")
-                self.log_message("Robot disconnected")
             except Exception as e:
                 self.log_message(f"Error disconnecting Robot: {e}")
 
-    def execute_robot_movement(self) -> None:
-        """Ejecuta una secuencia de movimientos del robot para control mental"""
-        if not self.robot:
-            self.log_message("Robot not connected")
-            return
-        
-        try:
-            # Obtener posición actual
-            (x, y, z, r, j1, j2, j3, j4) = self.robot.pose()
-            self.log_message(f"Robot position: x:{x:.1f} y:{y:.1f} z:{z:.1f}")
-            
-            # Guardar posición inicial
-            start_x, start_y, start_z, start_r = x, y, z, r
-            
-            # Trayectoria SIMPLE y SEGURA
-            self.log_message("🎯 Starting safe movement sequence...")
-            
-            # Secuencia de movimientos seguros
-            movements = [
-                ("Moving forward", start_x, start_y + 15, start_z, start_r),
-                ("Moving right", start_x + 15, start_y + 15, start_z, start_r),
-                ("Moving up", start_x + 15, start_y + 15, start_z + 10, start_r),
-                ("Moving back", start_x, start_y + 15, start_z + 10, start_r),
-                ("Moving left", start_x - 15, start_y + 15, start_z + 10, start_r),
-                ("Moving down", start_x - 15, start_y + 15, start_z, start_r),
-                ("Moving forward again", start_x - 15, start_y, start_z, start_r),
-                ("Returning to start", start_x, start_y, start_z, start_r)
-            ]
-            
-            # Ejecutar movimientos uno por uno
-            for i, (description, new_x, new_y, new_z, new_r) in enumerate(movements):
-                progress = ((i + 1) / len(movements)) * 100
-                self.log_message(f"🔄 Movement {i+1}/{len(movements)} ({progress:.0f}%): {description}")
-                
-                # Usar move_to para movimientos seguros
-                self.robot.move_to(new_x, new_y, new_z, new_r, wait=True)
-                time.sleep(0.5)  # Pausa entre movimientos
-            
-            self.log_message("🎉 Movement sequence completed!")
-            
-        except Exception as e:
-            self.log_message(f"❌ Robot movement error: {e}")
-            # En caso de error, intentar regresar a posición segura
-            try:
-                self.log_message("🚨 Attempting to return to safe position...")
-                self.robot.move_to(start_x, start_y, start_z + 20, start_r, wait=True)
-            except:
-                self.log_message("❌ Could not return to safe position")
+    def execute_robot_movement(self, trigger_time: typing.Optional[float] = None) -> None:
+        """Encola la secuencia de movimientos del robot para control mental"""
+        self.engine.execute_robot_movement(trigger_time)
 
     def test_robot_movement(self) -> None:
         """Ejecuta la rutina del robot manualmente para pruebas"""
-        if not self.robot:
+        if not self.engine.robot:
             messagebox.showerror("Error", "Please connect Robot first")
             return
-        
-        # Deshabilitar botón temporalmente
+        # Deshabilitar botón hasta que el robot informe que terminó
         self.ui["btn_test_robot"].configure(state="disabled", text="🤖 Testing...")
-        
-        try:
-            # Ejecutar en hilo separado para no bloquear la UI
-            test_thread = threading.Thread(target=self.execute_robot_movement)
-            test_thread.daemon = True
-            test_thread.start()
-            
-            # Rehabilitar botón después de un tiempo
-            self.root.after(10000, lambda: self.ui["btn_test_robot"].configure(state="normal", text="🤖 Test Robot Movement"))
-            
-        except Exception as e:
-            self.log_message(f"❌ Test robot error: {e}")
+        if not self.engine.execute_robot_movement():
             self.ui["btn_test_robot"].configure(state="normal", text="🤖 Test Robot Movement")
 
     def robot_home(self) -> None:
         """Mueve el robot a posición home SEGURA"""
-        if not self.robot:
+        if not self.engine.robot:
             messagebox.showerror("Error", "Please connect Robot first")
             return
-        
-        try:
-            self.log_message("🏠 Moving robot to safe home position...")
-            # Obtener posición actual
-            (x, y, z, r, j1, j2, j3, j4) = self.robot.pose()
-            self.log_message(f"Current position: x:{x:.1f} y:{y:.1f} z:{z:.1f}")
-            
-            # Movimiento SEGURO paso a paso
-            # 1. Primero subir para evitar choques
-            safe_z = max(z + 20, 80)  # Subir al menos 20mm o llegar a 80mm
-            self.log_message(f"🔼 Moving up to safe height: {safe_z:.1f}mm")
-            self.robot.move_to(x, y, safe_z, r, wait=True)
-            time.sleep(1)
-            
-            # 2. Luego mover horizontalmente (más seguro)
-            self.log_message("↔️ Moving to center horizontally...")
-            self.robot.move_to(0, 0, safe_z, r, wait=True)
-            time.sleep(1)
-            
-            # 3. Finalmente bajar a altura home
-            home_z = 60  # Altura home segura
-            self.log_message(f"🔽 Moving to home height: {home_z:.1f}mm")
-            self.robot.move_to(0, 0, home_z, 0, wait=True)
-            
-            self.log_message("✅ Robot safely at home position")
-        except Exception as e:
-            self.log_message(f"❌ Robot home error: {e}")
-            # En caso de error, intentar posición de emergencia
-            try:
-                self.log_message("🚨 Attempting emergency safe position...")
-                self.robot.move_to(0, 0, 100, 0, wait=True)  # Posición muy alta y segura
-            except:
-                self.log_message("❌ Emergency positioning also failed")
+        self.engine.robot_home()
 
     def toggle_eeg(self) -> None:
-        if not self.brain_inlet:
+        if not self.engine.brain_inlet:
             try:
-                self.log_message("Looking for EEG stream...")
-                streams = resolve_byprop("name", "AURA_Power", timeout=2)
-                if streams:
-                    self.brain_inlet = StreamInlet(streams[0])
-                    self.brain_inlet.open_stream()
+                self.engine.warm_start(self.subject_var.get())
+                choice = self.stream_var.get().strip()
+                info = self._found_streams.get(choice)
+                if info is None:
+                    self.engine.stream_name, self.engine.stream_source = choice or "AURA_Power", None
+                if self.engine.connect_eeg(info):
                     self.ui["btn_connect_eeg"].configure(text="Disconnect EEG")
-                    self.log_message("EEG connected")
                 else:
-                    self.log_message("EEG stream not found (AURA_Power)")
-                    messagebox.showwarning("EEG Stream", "No EEG stream named 'AURA_Power' found.")
+                    messagebox.showwarning("EEG Stream", f"No EEG stream named '{self.engine.stream_name}' found.")
             except Exception as e:
                 self.log_message(f"EEG connection failed: {e}")
                 messagebox.showerror("EEG Connection Error", str(e))
         else:
             try:
-                self.brain_inlet.close_stream()
-                self.brain_inlet = None
+                self.engine.disconnect_eeg()
                 self.ui["btn_connect_eeg"].configure(text="Connect EEG")
-                self.log_message("EEG disconnected")
             except Exception as e:
                 self.log_message(f"Error disconnecting EEG: {e}")
 
+    def warm_start(self) -> bool:
+        """Load the newest stored model for the subject in the entry box."""
+        return self.engine.warm_start(self.subject_var.get())
+
     def search_eeg_streams(self) -> None:
         try:
             self.log_message("Searching for EEG streams...")
-            streams = resolve_byprop("type", "EEG", timeout=2)
+            streams = self.engine.find_streams()
             if streams:
                 self.log_message(f"Found {len(streams)} EEG stream(s)")
+                self._found_streams = {}
                 for i, st in enumerate(streams):
-                    info = st.info()
-                    self.log_message(f"  {i+1}. {info.name()} ({info.type()}) ch={info.channel_count()}")
+                    self.log_message(f"  {i+1}. {st.name()} ({st.type()}) ch={st.channel_count()} source={st.source_id() or '-'}")
+                    self._found_streams[f"{st.name()} [{st.source_id() or st.hostname()}]"] = st
+                self.ui["stream_combo"]["values"] = list(self._found_streams)
+                self.stream_var.set(next(iter(self._found_streams)))
             else:
                 self.log_message("No EEG streams found")
         except Exception as e:
             self.log_message(f"Search error: {e}")
 
     def start_training(self) -> None:
-        if not self.brain_inlet:
+        if not self.engine.brain_inlet:
             messagebox.showerror("Error", "Please connect to EEG stream first")
             return
-        if not self.robot:
+        if not self.engine.robot:
             messagebox.showerror("Error", "Please connect Robot first")
             return
-        if self.is_training:
+        self.engine.subject = self.subject_var.get().strip() or "anonymous"
+        if not self.engine.start_training(features=self.features_var.get()):
             return
-        self.is_training = True
         self.ui["btn_start_training"].configure(state="disabled")
         self.ui["btn_stop_training"].configure(state="normal")
-        t = threading.Thread(target=self.training_process, daemon=True)
-        t.start()
 
     def stop_training(self) -> None:
-        self.is_training = False
+        self.engine.stop_training()
         self.training_label.configure(text="Training stopped")
         self.ui["btn_stop_training"].configure(state="disabled")
         self.ui["btn_start_training"].configure(state="normal")
 
-    def training_process(self) -> None:
-        try:
-            self.root.after(0, lambda: self.training_label.configure(text="Relax 30s"))
-            self.root.after(0, lambda: self.training_progress.configure(value=0))
-            rest = self.collect_training_data(30, "rest")
-            if not self.is_training:
-                return
-            self.root.after(0, lambda: self.training_label.configure(text="Imagine 30s"))
-            self.root.after(0, lambda: self.training_progress.configure(value=50))
-            move = self.collect_training_data(30, "move")
-            if not self.is_training:
-                return
-            self.root.after(0, lambda: self.training_label.configure(text="Training model..."))
-            self.root.after(0, lambda: self.training_progress.configure(value=75))
-            self.train_model(rest, move)
-            self.root.after(0, lambda: self.training_label.configure(text="Training completed"))
-            self.root.after(0, lambda: self.training_progress.configure(value=100))
-            self.root.after(0, lambda: self.ui["btn_start_training"].configure(state="normal"))
-        except Exception as e:
-            self.root.after(0, lambda: self.log_message(f"Training error: {e}"))
-        finally:
-            self.is_training = False
-            self.root.after(0, lambda: self.ui["btn_stop_training"].configure(state="disabled"))
-
-    def collect_training_data(self, duration: int, data_type: str) -> pd.DataFrame:
-        data = pd.DataFrame()
-        start = time.time()
-        while time.time() - start < duration and self.is_training:
-            try:
-                sample, ts = self.brain_inlet.pull_sample()
-                if sample:
-                    data = pd.concat([data, pd.DataFrame(sample).T])
-                # Progress update
-                elapsed = time.time() - start
-                base = 0 if data_type == "rest" else 50
-                prog = base + (elapsed / duration) * 50
-                self.root.after(0, lambda v=prog: self.training_progress.configure(value=v))
-            except Exception as e:
-                self.root.after(0, lambda: self.log_message(f"Collect error: {e}"))
-        data["Event"] = 0 if data_type == "rest" else 1
-        # Update samples label
-        try:
-            self.root.after(0, lambda: self.ui["lbl_samples"].configure(text=f"Samples: {len(data)}"))
-        except Exception:
-            pass
-        return data
-
-    def train_model(self, rest_df: pd.DataFrame, move_df: pd.DataFrame) -> None:
-        try:
-            selected = pd.concat([rest_df, move_df])
-            selected.to_csv("full_data_personas_nuevas.csv", index=False)
-            X = selected.iloc[1:, :-1].values
-            y = selected.iloc[1:, -1].values
-            self.sc_x = StandardScaler()
-            Xs = self.sc_x.fit_transform(X)
-            X_train, X_test, y_train, y_test = train_test_split(Xs, y, test_size=0.1)
-            self.lr_model = LogisticRegression()
-            self.lr_model.fit(X_train, y_train)
-            pred = self.lr_model.predict(X_test)
-            acc = accuracy_score(y_test, pred) * 100
-            self.root.after(0, lambda: self.ui["lbl_accuracy"].configure(text=f"Accuracy: {acc:.2f}%"))
-            self.root.after(0, lambda: self.log_message(f"Model trained. Accuracy {acc:.2f}%"))
-        except Exception as e:
-            self.root.after(0, lambda: self.log_message(f"Model error: {e}"))
-            raise
-
     def start_control(self) -> None:
-        if not self.lr_model:
+        if not self.engine.lr_model:
             messagebox.showerror("Error", "Train the model first")
             return
-        if self.is_controlling:
-            return
-        self.is_controlling = True
-        t = threading.Thread(target=self.control_process, daemon=True)
-        t.start()
+        if self.engine.start_control(adapt_norm=self.adapt_norm_var.get(), adapt_weights=self.adapt_weights_var.get()):
+            self.refresh_control_view()
 
     def stop_control(self) -> None:
-        self.is_controlling = False
+        self.engine.stop_control()
         self.update_status_light(active=False)
-        self.log_message("Control stopped")
+
+    def on_close(self) -> None:
+        # Halts the arm and joins every worker before Tk goes away
+        self.engine.close()
+        self.root.destroy()
+
+    def reset_adaptation(self) -> None:
+        self.engine.reset_adaptation()
 
     def update_status_light(self, active: bool) -> None:
         color = self.colors["OK"] if active else self.colors["MUTED"]
         self.ui["status_light"].itemconfig(self.ui["status_light_id"], fill=color, outline=color)
 
-    def control_process(self) -> None:
-        counter = 0
-        while self.is_controlling:
-            try:
-                sample, ts = self.brain_inlet.pull_sample()
-                if sample:
-                    intention = self.lr_model.predict(self.sc_x.transform(pd.DataFrame(sample).values.T))
-                    if intention == 1:
-                        counter += 1
-                        self.root.after(0, lambda: self.update_status_light(True))
-                    else:
-                        if counter > 0:
-                            counter -= 1
-                        self.root.after(0, lambda: self.update_status_light(False))
-                    # Update counter label only integer
-                    self.root.after(0, lambda c=counter: self.ui["counter_value"].configure(text=str(c)))
-                    # Threshold action
-                    if counter >= int(self.threshold_var.get()):
-                        if self.robot:
-                            try:
-                                # Ejecutar movimientos del robot en un hilo separado
-                                robot_thread = threading.Thread(target=self.execute_robot_movement)
-                                robot_thread.daemon = True
-                                robot_thread.start()
-                                self.root.after(0, lambda: self.ui["chip_send"]["set_status"](True, "Robot movement started"))
-                            except Exception as e:
-                                self.root.after(0, lambda: self.log_message(f"Robot movement error: {e}"))
-                        counter = 0
-                        self.root.after(0, lambda: self.log_message("Robot movement command sent"))
-                        self.root.after(0, lambda: self.ui["chip_reset"]["set_status"](True, "Reset counter & log action"))
-            except Exception as e:
-                self.root.after(0, lambda: self.log_message(f"Control error: {e}"))
-
-
-def main() -> None:
+    def refresh_control_view(self) -> None:
+        """Poll the pipeline snapshot at a fixed rate instead of per-sample callbacks."""
+        if not self.engine.is_controlling:
+            return
+        snapshot = self.engine.snapshot
+        self.ui["counter_value"].configure(text=str(snapshot.counter))
+        self.update_status_light(snapshot.intention == 1)
+        phase = f"  ({snapshot.phase})" if snapshot.phase in ("cooldown", "paused") else ""
+        self.ui["status_text"].configure(text=f"Triggers: {snapshot.triggers}  Movements done: {snapshot.movements}{phase}")
+        # Percentiles change slowly; recompute them about once a second
+        now = time.monotonic()
+        latency = self.engine.latency
+        if latency and now - self._latency_shown_at >= 1.0:
+            self._latency_shown_at = now
+            lines = [latency.format_summary(stage) for stage in ("acquisition", "trigger", "dispatch")]
+            self.ui["lbl_latency"].configure(text="\n".join(lines))
+        self.root.after(self.control_refresh_ms, self.refresh_control_view)
+
+
+def main(argv: typing.Optional[typing.List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="VRehab mind-controlled robot GUI")
+    add_device_arguments(parser, robot=True)
+    args = parser.parse_args(argv)
     root = tk.Tk()
-    app = VRehabGUI(root)
+    app = VRehabGUI(root, robot_backend=args.robot)
     root.mainloop()
 
 
@@ -0,0 +1,51 @@
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+
+from vrehab.adaptation import OnlineAdapter
+from vrehab.inference import LinearIntentKernel
+
+
+def _adapter(**kwargs):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(1000, 6))
+    y = (X[:, 0] > 0).astype(int)
+    scaler = StandardScaler().fit(X)
+    model = LogisticRegression().fit(scaler.transform(X), y)
+    kernel = LinearIntentKernel.from_sklearn(scaler, model)
+    return OnlineAdapter(kernel, scaler, model, **kwargs), kernel, rng
+
+
+def test_single_row_chunks_still_update():
+    # Windowed features hand the adapter 0 or 1 rows per live read
+    adapter, kernel, rng = _adapter(min_rows=16)
+    for i in range(320):
+        rows = rng.normal(0.5, 1.0, size=(i % 2, 6))
+        adapter.update(rows, kernel.decision_function(rows).copy())
+    assert adapter.stats.updates == 160 // 16
+    assert adapter.stats.mean_shift > 0
+
+
+def test_batches_match_one_big_chunk():
+    a, kernel_a, rng = _adapter(min_rows=32)
+    b, kernel_b, _ = _adapter(min_rows=32)
+    rows = rng.normal(0.3, 1.2, size=(32, 6))
+    scores = kernel_a.decision_function(rows).copy()
+    for i in range(0, 32, 4):
+        a.update(rows[i : i + 4], scores[i : i + 4])
+    b.update(rows, scores)
+    assert a.stats.updates == b.stats.updates == 1
+    np.testing.assert_allclose(a.mean, b.mean)
+    np.testing.assert_allclose(a.var, b.var)
+    np.testing.assert_allclose(kernel_a.weights, kernel_b.weights)
+
+
+def test_rollback_drops_pending_rows():
+    adapter, kernel, rng = _adapter(min_rows=16)
+    rows = rng.normal(0.5, 1.0, size=(10, 6))
+    adapter.update(rows, kernel.decision_function(rows).copy())
+    adapter.rollback()
+    adapter.update(rows, kernel.decision_function(rows).copy())
+    adapter.update(rows[:6], kernel.decision_function(rows[:6]).copy())
+    # The 10 rows from before the rollback do not count towards the next batch
+    assert adapter.stats.updates == 0 and adapter.stats.rollbacks == 1
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from vrehab.counter import counter_trajectory, sweep_thresholds, trigger_indices
+from vrehab.workflow import LeakyCounter
+
+
+def _live(intentions, threshold):
+    counter = LeakyCounter(threshold)
+    values, fired = [], []
+    for i, intention in enumerate(intentions):
+        if counter.update(intention):
+            fired.append(i)
+        values.append(counter.value)
+    return np.asarray(values, dtype=np.int64), np.asarray(fired, dtype=np.intp)
+
+
+def _cases(count=20, seed=0):
+    rng = np.random.default_rng(seed)
+    for _ in range(count):
+        n = int(rng.integers(0, 3000))
+        # Stretches of mostly rest and mostly intention, like a real session
+        p = np.repeat(rng.uniform(0.1, 0.95, 8), -(-n // 8))[:n]
+        yield (rng.random(n) < p).astype(np.int64)
+
+
+THRESHOLDS = [-5, -1, 0, 1, 2, 3, 7, 16, 50, 200, 1000]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_trigger_indices_and_trajectory_match_live_counter(seed):
+    for intentions in _cases(seed=seed):
+        for threshold in THRESHOLDS:
+            values, fired = _live(intentions, threshold)
+            np.testing.assert_array_equal(trigger_indices(intentions, threshold), fired)
+            got_values, got_fired = counter_trajectory(intentions, threshold)
+            np.testing.assert_array_equal(got_fired, fired)
+            np.testing.assert_array_equal(got_values, values)
+
+
+@pytest.mark.parametrize("block", [1, 2, 3, 5, 8, 64])
+def test_block_boundaries(block):
+    rng = np.random.default_rng(block)
+    for _ in range(40):
+        intentions = (rng.random(int(rng.integers(1, 800))) < rng.uniform(0.4, 0.9)).astype(np.int64)
+        for threshold in (1, 2, block - 1, block, block + 1, 2 * block, 3 * block + 1):
+            _, fired = _live(intentions, threshold)
+            np.testing.assert_array_equal(trigger_indices(intentions, threshold, block=block), fired)
+
+
+def test_sweep_matches_live_counter_for_every_threshold():
+    rng = np.random.default_rng(42)
+    intentions = (rng.random(20000) < 0.62).astype(np.int64)
+    swept = sweep_thresholds(intentions, THRESHOLDS)
+    assert sorted(swept) == sorted(THRESHOLDS)
+    for threshold in THRESHOLDS:
+        np.testing.assert_array_equal(swept[threshold], _live(intentions, threshold)[1])
+
+
+def test_only_label_one_counts_as_intention():
+    # LeakyCounter treats anything but 1 (e.g. a -1 or 2 label) as rest
+    intentions = np.array([1, 2, 1, -1, 1, 1, 1, 0, 1, 1, 1, 1])
+    for threshold in (1, 2, 3):
+        values, fired = _live(intentions, threshold)
+        got_values, got_fired = counter_trajectory(intentions, threshold)
+        np.testing.assert_array_equal(got_fired, fired)
+        np.testing.assert_array_equal(got_values, values)
@@ -0,0 +1,54 @@
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+
+from vrehab.dataset import SessionDataset, find_sessions, fit_streaming, score_streaming
+from vrehab.recording import SessionRecorder
+
+
+def _record(root, sessions=6, rows=6000, channels=8, seed=0, subject="p01"):
+    rng = np.random.default_rng(seed)
+    direction = rng.normal(size=channels)
+    for _ in range(sessions):
+        offset = rng.normal(scale=0.3, size=channels)
+        with SessionRecorder(channels, root=str(root), subject=subject) as recorder:
+            # One long rest block followed by one long move block, like a calibration run
+            for label in (0, 1):
+                samples = rng.normal(size=(rows // 2, channels)) + offset + 0.4 * label * direction
+                recorder.write(samples, np.arange(rows // 2, dtype=np.float64), label)
+    return find_sessions(str(root))
+
+
+def test_batches_cover_every_row_once(tmp_path):
+    dataset = SessionDataset(_record(tmp_path, sessions=3, rows=1000))
+    rng = np.random.default_rng(0)
+    rows = np.concatenate(dataset.batches(256, rng))
+    np.testing.assert_array_equal(np.sort(rows), np.arange(len(dataset)))
+    X, y = dataset.load(np.arange(len(dataset)))
+    np.testing.assert_array_equal(y, np.concatenate([r.labels for r in dataset.recordings]))
+    np.testing.assert_array_equal(X, np.concatenate([r.samples for r in dataset.recordings]))
+    # Shuffled batches mix rows from every session and both classes
+    X, y = dataset.load(dataset.batches(256, rng)[0])
+    assert 0 < y.mean() < 1
+
+
+def test_streaming_fit_matches_batch_fit_on_two_block_sessions(tmp_path):
+    paths = _record(tmp_path)
+    train, test = SessionDataset(paths[:5]), SessionDataset(paths[5:])
+    X, y = train.load(np.arange(len(train)))
+    Xt, yt = test.load(np.arange(len(test)))
+    scaler = StandardScaler().fit(X)
+    reference = LogisticRegression().fit(scaler.transform(X), y)
+    expected = 100 * reference.score(scaler.transform(Xt), yt)
+    for seed in range(3):
+        s, model = fit_streaming(train, batch_size=2048, seed=seed)
+        assert abs(score_streaming(test, s, model) - expected) < 2
+        assert abs(float(model.intercept_[0]) - float(reference.intercept_[0])) < 0.2
+
+
+def test_find_sessions_matches_subjects_as_recorded(tmp_path):
+    _record(tmp_path, sessions=2, rows=10, subject="Ana María")
+    _record(tmp_path, sessions=1, rows=10, subject="p02")
+    assert len(find_sessions(str(tmp_path), subjects=["Ana María"])) == 2
+    assert len(find_sessions(str(tmp_path), subjects=["Ana María", "p02"])) == 3
+    assert find_sessions(str(tmp_path), subjects=["nobody"]) == []
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+
+from vrehab.inference import LinearIntentKernel
+
+
+def _fit(channels: int, seed: int):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(loc=rng.uniform(-5, 5, channels), scale=rng.uniform(0.5, 3, channels), size=(2000, channels))
+    score = X @ rng.normal(size=channels) + rng.normal(size=len(X))
+    y = (score > np.median(score)).astype(int)
+    scaler = StandardScaler().fit(X)
+    model = LogisticRegression().fit(scaler.transform(X), y)
+    return scaler, model, X
+
+
+@pytest.mark.parametrize("channels", [1, 4, 8, 32, 64])
+@pytest.mark.parametrize("chunk", [1, 5, 32, 256, 1000])
+def test_predict_matches_sklearn(channels, chunk):
+    scaler, model, X = _fit(channels, seed=channels * 1000 + chunk)
+    kernel = LinearIntentKernel.from_sklearn(scaler, model, max_chunk=32)
+    expected = model.predict(scaler.transform(X))
+    got = np.concatenate([kernel.predict(X[i : i + chunk]).copy() for i in range(0, len(X), chunk)])
+    np.testing.assert_array_equal(got, expected)
+
+
+def test_scores_match_decision_function():
+    scaler, model, X = _fit(8, seed=1)
+    kernel = LinearIntentKernel.from_sklearn(scaler, model)
+    np.testing.assert_allclose(kernel.decision_function(X[:256]), model.decision_function(scaler.transform(X[:256])), rtol=1e-9, atol=1e-9)
+
+
+def test_string_labels_and_float32_input():
+    scaler, model, X = _fit(6, seed=2)
+    y = np.where(model.predict(scaler.transform(X)) == 1, "move", "rest")
+    model = LogisticRegression().fit(scaler.transform(X), y)
+    kernel = LinearIntentKernel.from_sklearn(scaler, model)
+    X32 = X.astype(np.float32)
+    np.testing.assert_array_equal(kernel.predict(X32[:300]), model.predict(scaler.transform(X32[:300])))
+
+
+def test_rejects_multiclass():
+    rng = np.random.default_rng(3)
+    X = rng.normal(size=(300, 4))
+    model = LogisticRegression().fit(X, rng.integers(0, 3, len(X)))
+    with pytest.raises(ValueError):
+        LinearIntentKernel.from_sklearn(None, model)
@@ -0,0 +1,68 @@
+import time
+
+import numpy as np
+
+from vrehab.pipeline import ControlPipeline, StageFailed
+
+
+class _Kernel:
+    last_scores = None
+
+    def predict(self, samples):
+        return np.zeros(len(samples), dtype=np.int64)
+
+
+class _DeadInlet:
+    chunk_size = 32
+
+    def __init__(self, errors):
+        self.errors = errors
+        self.reads = 0
+
+    def read(self, cancel=None):
+        self.reads += 1
+        raise self.errors[min(self.reads, len(self.errors)) - 1]
+
+    def clock_offset(self, cancel=None):
+        return 0.0
+
+
+def _wait_stopped(pipeline, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while pipeline.running and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return not pipeline.running
+
+
+def test_repeated_failure_backs_off_reports_once_and_stops():
+    errors = []
+    inlet = _DeadInlet([OSError("stream lost")])
+    pipeline = ControlPipeline(inlet, _Kernel(), lambda: 5, lambda t: None, on_error=errors.append,
+                               retry_delay=0.01, max_retry_delay=0.04, max_failures=6)
+    pipeline.start()
+    assert _wait_stopped(pipeline)
+    # 0.01 + 0.02 + 0.04 * 3 of backoff, not a busy loop
+    assert inlet.reads == 6
+    assert [type(e) for e in errors] == [OSError, StageFailed]
+
+
+def test_different_errors_are_each_reported():
+    errors = []
+    inlet = _DeadInlet([OSError("a"), OSError("b"), OSError("b"), OSError("c")])
+    pipeline = ControlPipeline(inlet, _Kernel(), lambda: 5, lambda t: None, on_error=errors.append,
+                               retry_delay=0.001, max_retry_delay=0.002, max_failures=4)
+    pipeline.start()
+    assert _wait_stopped(pipeline)
+    assert [str(e) for e in errors[:-1]] == ["a", "b", "c"]
+    assert isinstance(errors[-1], StageFailed)
+
+
+def test_stop_is_not_delayed_by_the_backoff():
+    pipeline = ControlPipeline(_DeadInlet([OSError("stream lost")]), _Kernel(), lambda: 5, lambda t: None,
+                               retry_delay=5.0, max_retry_delay=5.0)
+    pipeline.start()
+    time.sleep(0.1)
+    started = time.monotonic()
+    pipeline.stop()
+    assert time.monotonic() - started < 0.5
+    assert not pipeline.running
@@ -0,0 +1,118 @@
+import pytest
+
+from vrehab.workflow import CALIBRATE, CONTROL, COOLDOWN, IDLE, PAUSED, READY, TRAIN, LeakyCounter, SessionMachine
+
+
+def _machine(**kwargs):
+    phases = []
+    machine = SessionMachine(on_phase=lambda phase, stage: phases.append((phase, stage.name if stage else None)), **kwargs)
+    return machine, phases
+
+
+def test_calibration_schedule_and_label_boundaries():
+    machine, phases = _machine(rest_s=3.0, move_s=3.0, lead_in=1.0)
+    machine.begin_calibration(10.0)
+    assert [s.name for s in machine.stages] == ["get-ready", "rest", "get-ready", "move"]
+    expected = [
+        (10.0, None), (10.999, None),   # lead-in: samples discarded
+        (11.0, 0), (13.999, 0),         # rest starts exactly at the boundary
+        (14.0, None), (14.999, None),
+        (15.0, 1), (17.999, 1),
+    ]
+    for now, label in expected:
+        assert machine.label(now) == label, now
+        assert machine.phase == CALIBRATE
+    assert machine.stage_remaining(17.5) == pytest.approx(0.5)
+    assert machine.progress(17.5) == pytest.approx(100 * 7.5 / 8)
+    assert machine.label(18.0) is None
+    assert machine.phase == TRAIN
+    assert phases == [(CALIBRATE, "get-ready"), (CALIBRATE, "rest"), (CALIBRATE, "get-ready"), (CALIBRATE, "move"), (TRAIN, None)]
+
+
+def test_label_skips_stages_when_reads_are_late():
+    machine, phases = _machine(rest_s=2.0, move_s=2.0, lead_in=1.0)
+    machine.begin_calibration(0.0)
+    # One late read jumps over the rest stage and the second lead-in
+    assert machine.label(4.5) == 1
+    assert machine.stage.name == "move"
+    assert machine.label(6.0) is None and machine.phase == TRAIN
+
+
+def test_no_lead_in_and_empty_schedule():
+    machine, _ = _machine(rest_s=1.0, move_s=1.0)
+    machine.begin_calibration(0.0)
+    assert machine.label(0.0) == 0 and machine.label(1.0) == 1
+    empty, phases = _machine(rest_s=0.0, move_s=0.0)
+    empty.begin_calibration(0.0)
+    assert empty.phase == TRAIN and phases == [(TRAIN, None)]
+
+
+def test_training_result():
+    machine, _ = _machine(rest_s=0.0, move_s=0.0)
+    machine.begin_calibration(0.0)
+    machine.training_finished(True)
+    assert machine.phase == READY
+    machine.training_finished(False)
+    assert machine.phase == IDLE
+
+
+def test_control_without_cooldown_matches_leaky_counter():
+    machine, _ = _machine(threshold=3)
+    machine.begin_control()
+    counter = LeakyCounter(3)
+    intentions = [1, 1, 0, 1, 1, 1, 1, 1, 0, 0, 1, 1, 1]
+    fired = machine.decide(intentions, 0.0)
+    assert fired == [i for i, x in enumerate(intentions) if counter.update(x)]
+    assert machine.phase == CONTROL and machine.triggers == len(fired)
+
+
+def test_trigger_enters_cooldown_then_control_resumes_fresh():
+    machine, phases = _machine(threshold=2, cooldown=5.0)
+    machine.begin_control()
+    # The trigger at index 1 ends the chunk: the remaining 1s are ignored
+    assert machine.decide([1, 1, 1, 1, 1], 100.0) == [1]
+    assert machine.phase == COOLDOWN
+    assert machine.cooldown_left(102.0) == pytest.approx(3.0)
+    assert machine.decide([1, 1, 1], 104.9) == []
+    assert machine.counter.value == 0
+    # First chunk after the deadline is counted from zero
+    assert machine.decide([1, 1], 105.0) == [1]
+    assert machine.triggers == 2
+    assert [p for p, _ in phases] == [CONTROL, COOLDOWN, CONTROL, COOLDOWN]
+
+
+def test_pause_and_resume_reset_the_counter():
+    machine, _ = _machine(threshold=10, cooldown=1.0)
+    machine.begin_control()
+    machine.decide([1] * 7, 0.0)
+    assert machine.counter.value == 7
+    machine.pause()
+    assert machine.phase == PAUSED
+    assert machine.decide([1] * 20, 1.0) == []
+    machine.resume()
+    assert machine.phase == CONTROL and machine.counter.value == 0
+    assert machine.decide([1] * 9, 2.0) == []
+    # Pausing during a cooldown also works
+    assert machine.decide([1], 2.0) == [0]
+    machine.pause()
+    assert machine.phase == PAUSED and machine.cooldown_left(2.0) == 0.0
+
+
+def test_pause_and_resume_are_ignored_outside_control():
+    machine, phases = _machine()
+    machine.pause()
+    machine.resume()
+    assert machine.phase == IDLE and phases == []
+    machine.begin_calibration(0.0)
+    machine.pause()
+    assert machine.phase == CALIBRATE
+
+
+def test_stop_from_any_phase():
+    machine, phases = _machine(threshold=1, cooldown=10.0)
+    machine.begin_control()
+    machine.decide([1], 0.0)
+    machine.stop()
+    assert machine.phase == IDLE
+    machine.stop()
+    assert [p for p, _ in phases].count(IDLE) == 1
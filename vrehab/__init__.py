@@ -0,0 +1 @@
+"""Shared acquisition and decoding helpers for the VRehab scripts."""
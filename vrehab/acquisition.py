@@ -0,0 +1,100 @@
+"""Chunked LSL acquisition into preallocated NumPy buffers."""
+import time
+import typing
+
+import numpy as np
+
+from vrehab.cancel import CANCEL_POLL, CancelToken
+
+# pylsl channel_format codes -> NumPy dtypes (cf_string is not supported)
+LSL_DTYPES = {
+    1: np.float32,
+    2: np.float64,
+    4: np.int32,
+    5: np.int16,
+    6: np.int8,
+    7: np.int64,
+}
+
+
+class ChunkedInlet:
+    """Read an LSL ``StreamInlet`` in chunks instead of one sample at a time.
+
+    Each ``read`` returns once ``chunk_size`` samples are available or
+    ``max_latency`` seconds have passed, whichever comes first. Samples are
+    written straight into a reused buffer through ``pull_chunk(dest_obj=...)``,
+    so the returned arrays are views that are only valid until the next read.
+    Given a ``CancelToken``, ``read`` and ``clock_offset`` split longer waits
+    into ``CANCEL_POLL`` slices and give up as soon as it is cancelled, so a
+    dead stream never holds up the thread that reads it.
+    """
+
+    def __init__(self, inlet, chunk_size: int = 32, max_latency: float = 0.02):
+        dtype = LSL_DTYPES.get(inlet.channel_format)
+        if dtype is None:
+            raise ValueError(f"Unsupported LSL channel format: {inlet.channel_format}")
+        self.inlet = inlet
+        self.channel_count = inlet.channel_count
+        self.chunk_size = chunk_size
+        self.max_latency = max_latency
+        self.samples_read = 0
+        self._samples = np.empty((chunk_size, self.channel_count), dtype=dtype)
+        self._timestamps = np.empty(chunk_size, dtype=np.float64)
+        self._offset = 0.0
+        self._offset_checked = -np.inf
+
+    def read(self, timeout: typing.Optional[float] = None, cancel: typing.Optional[CancelToken] = None) -> typing.Tuple[np.ndarray, np.ndarray]:
+        """Pull up to ``chunk_size`` samples; returns ``(samples, timestamps)`` views."""
+        if timeout is None:
+            timeout = self.max_latency
+        if cancel is None or timeout <= CANCEL_POLL:
+            _, timestamps = self.inlet.pull_chunk(timeout=timeout, max_samples=self.chunk_size, dest_obj=self._samples)
+            n = len(timestamps)
+            self._timestamps[:n] = timestamps
+        else:
+            n = 0
+            deadline = time.monotonic() + timeout
+            while n < self.chunk_size and not cancel.cancelled:
+                left = deadline - time.monotonic()
+                _, timestamps = self.inlet.pull_chunk(timeout=min(max(left, 0.0), CANCEL_POLL), max_samples=self.chunk_size - n,
+                                                      dest_obj=self._samples[n:])
+                self._timestamps[n : n + len(timestamps)] = timestamps
+                n += len(timestamps)
+                if left <= CANCEL_POLL:
+                    break
+        self.samples_read += n
+        return self._samples[:n], self._timestamps[:n]
+
+    def clock_offset(self, max_age: float = 5.0, timeout: float = 0.5, cancel: typing.Optional[CancelToken] = None) -> float:
+        """LSL ``time_correction`` for this stream, refreshed at most every ``max_age`` s.
+
+        Add it to a sample timestamp to express it on the local ``local_clock``.
+        If the estimate cannot be refreshed the last known value is kept.
+        Only the first estimate can block (liblsl keeps refreshing it in the
+        background); with ``cancel`` it is retried in short slices instead.
+        """
+        now = time.monotonic()
+        if now - self._offset_checked >= max_age:
+            self._offset_checked = now
+            deadline = now + timeout
+            while True:
+                left = deadline - time.monotonic()
+                try:
+                    self._offset = self.inlet.time_correction(timeout=max(min(left, CANCEL_POLL) if cancel else left, 0.0))
+                    break
+                except Exception:
+                    if cancel is None or cancel.cancelled or left <= CANCEL_POLL:
+                        break
+        return self._offset
+
+    def flush(self) -> int:
+        """Drop every sample already queued in the inlet; returns how many."""
+        flush = getattr(self.inlet, "flush", None)
+        if flush is not None:
+            return int(flush())
+        dropped = 0
+        while True:
+            _, timestamps = self.inlet.pull_chunk(timeout=0.0, max_samples=self.chunk_size, dest_obj=self._samples)
+            if not timestamps:
+                return dropped
+            dropped += len(timestamps)
@@ -0,0 +1,194 @@
+"""Online adaptation of the folded intention kernel during control."""
+import typing
+
+import numpy as np
+
+from vrehab.inference import fold_scaler
+
+
+class AdaptationStats(typing.NamedTuple):
+    updates: int = 0
+    rejected: int = 0
+    rollbacks: int = 0
+    mean_shift: float = 0.0
+    weight_drift: float = 0.0
+
+
+class OnlineAdapter:
+    """Track slow drift in the input statistics and refold the kernel.
+
+    Incoming rows are collected until there are at least ``min_rows`` (live
+    reads are a few samples, and with windowed features often zero or one
+    row), then the batch's mean and variance are merged into running
+    normalization statistics with the Welford/Chan update, capped at
+    ``memory`` samples so older data is gradually forgotten. With
+    ``adapt_weights`` the logistic weights also take one small gradient step
+    per batch on confidently scored samples (pseudo-labels), pulled back
+    towards the trained weights.
+
+    Guardrails: batches whose mean sits more than ``max_shift`` running
+    standard deviations away are ignored (artefacts, electrode pops), the
+    scale may not move beyond ``max_scale_ratio`` of the trained one, weight
+    drift is clipped to ``max_weight_drift`` of the trained norm, and if the
+    adapted model reports intention on more than ``max_positive_rate`` of the
+    last ``rate_window`` rows, more often than it did in the first window
+    after (re)starting, it rolls back to the trained state on its own.
+
+    ``update`` is meant to run on the inference thread after the chunk has
+    been handed on, so it never delays acquisition or the decision stage;
+    ``rollback`` may be called from any thread and is applied there.
+    """
+
+    def __init__(
+        self,
+        kernel,
+        scaler,
+        model,
+        adapt_weights: bool = False,
+        memory: int = 30000,
+        learning_rate: float = 0.01,
+        l2: float = 0.1,
+        confidence: float = 2.0,
+        max_shift: float = 3.0,
+        max_scale_ratio: float = 3.0,
+        max_weight_drift: float = 0.5,
+        max_positive_rate: float = 0.98,
+        rate_window: int = 5000,
+        min_rows: int = 16,
+    ):
+        self.kernel = kernel
+        self.adapt_weights = adapt_weights
+        self.memory = memory
+        self.learning_rate = learning_rate
+        self.l2 = l2
+        self.confidence = confidence
+        self.max_shift = max_shift
+        self.max_scale_ratio = max_scale_ratio
+        self.max_weight_drift = max_weight_drift
+        self.max_positive_rate = max_positive_rate
+        self.rate_window = rate_window
+        self.min_rows = max(int(min_rows), 2)
+        self.enabled = True
+
+        channels = len(kernel.weights)
+        mean = getattr(scaler, "mean_", None) if scaler is not None else None
+        var = getattr(scaler, "var_", None) if scaler is not None else None
+        self._mean0 = np.zeros(channels) if mean is None else np.array(mean, dtype=np.float64)
+        self._var0 = np.ones(channels) if var is None else np.maximum(np.array(var, dtype=np.float64), 1e-12)
+        self._with_mean = scaler is not None and getattr(scaler, "with_mean", True) and mean is not None
+        self._with_std = scaler is not None and getattr(scaler, "scale_", None) is not None
+        self._coef0 = np.array(model.coef_[0], dtype=np.float64)
+        self._intercept0 = float(model.intercept_[0])
+        self._coef_norm = max(float(np.linalg.norm(self._coef0)), 1e-12)
+        self._rollback = False
+        self._updates = self._rejected = self._rollbacks = 0
+        self._restore()
+
+    @property
+    def stats(self) -> AdaptationStats:
+        return AdaptationStats(
+            updates=self._updates,
+            rejected=self._rejected,
+            rollbacks=self._rollbacks,
+            mean_shift=float(np.max(np.abs(self.mean - self._mean0) / np.sqrt(self._var0))),
+            weight_drift=float(np.linalg.norm(self.coef - self._coef0)) / self._coef_norm,
+        )
+
+    def rollback(self) -> None:
+        """Return to the trained statistics and weights before the next chunk."""
+        self._rollback = True
+
+    def _restore(self) -> None:
+        self.mean = self._mean0.copy()
+        self.var = self._var0.copy()
+        self.count = float(self.memory)
+        self.coef = self._coef0.copy()
+        self.intercept = self._intercept0
+        self._rows = 0
+        self._positives = 0
+        self._reference_rate = None
+        self._pending: typing.List[typing.Tuple[np.ndarray, np.ndarray]] = []
+        self._pending_rows = 0
+        self._refold()
+
+    def _refold(self) -> None:
+        mean = self.mean if self._with_mean else None
+        scale = np.sqrt(self.var) if self._with_std else None
+        weights, bias = fold_scaler(self.coef, self.intercept, mean, scale)
+        self.kernel.set_params(weights, bias)
+
+    def update(self, samples: np.ndarray, scores: np.ndarray) -> None:
+        """Add one scored chunk; the running state changes once ``min_rows`` rows have gathered."""
+        if self._rollback:
+            self._rollback = False
+            self._rollbacks += 1
+            self._restore()
+            return
+        n = len(samples)
+        if n == 0:
+            return
+        self._rows += n
+        self._positives += int(np.count_nonzero(scores > 0))
+        if self._rows >= self.rate_window:
+            rate = self._positives / self._rows
+            self._rows = self._positives = 0
+            if self._reference_rate is None:
+                self._reference_rate = rate
+            elif rate > self.max_positive_rate and rate > self._reference_rate:
+                self._rollbacks += 1
+                self._restore()
+                return
+
+        # The caller's arrays are reused buffers; keep copies until the batch is full
+        self._pending.append((np.array(samples, dtype=np.float64), np.array(scores, dtype=np.float64)))
+        self._pending_rows += n
+        if self._pending_rows < self.min_rows:
+            return
+        if len(self._pending) == 1:
+            samples, scores = self._pending[0]
+        else:
+            samples = np.concatenate([x for x, _ in self._pending])
+            scores = np.concatenate([z for _, z in self._pending])
+        self._pending = []
+        self._pending_rows = 0
+        n = len(samples)
+
+        chunk_mean = samples.mean(axis=0)
+        chunk_var = samples.var(axis=0)
+        delta = chunk_mean - self.mean
+        if np.max(np.abs(delta) / np.sqrt(self.var)) > self.max_shift:
+            self._rejected += 1
+            return
+
+        # Chan et al. merge of (count, mean, M2) with a capped history
+        total = self.count + n
+        m2 = self.var * self.count + chunk_var * n + delta * delta * (self.count * n / total)
+        self.mean = self.mean + delta * (n / total)
+        ratio = self.max_scale_ratio ** 2
+        self.var = np.clip(m2 / total, self._var0 / ratio, self._var0 * ratio)
+        self.count = min(total, float(self.memory))
+
+        if self.adapt_weights:
+            self._step(samples, scores)
+        self._updates += 1
+        self._refold()
+
+    def _step(self, samples: np.ndarray, scores: np.ndarray) -> None:
+        confident = np.abs(scores) >= self.confidence
+        if not confident.any():
+            return
+        x = samples[confident]
+        if self._with_mean:
+            x = x - self.mean
+        if self._with_std:
+            x = x / np.sqrt(self.var)
+        labels = (scores[confident] > 0).astype(np.float64)
+        error = 1.0 / (1.0 + np.exp(-(x @ self.coef + self.intercept))) - labels
+        grad = x.T @ error / len(error) + self.l2 * (self.coef - self._coef0)
+        self.coef = self.coef - self.learning_rate * grad
+        self.intercept -= self.learning_rate * (float(error.mean()) + self.l2 * (self.intercept - self._intercept0))
+        drift = self.coef - self._coef0
+        limit = self.max_weight_drift * self._coef_norm
+        norm = float(np.linalg.norm(drift))
+        if norm > limit:
+            self.coef = self._coef0 + drift * (limit / norm)
@@ -0,0 +1,201 @@
+"""Non-blocking command link to the Arduino.
+
+``ArduinoLink`` owns the serial port with two background threads: a writer
+that drains a bounded send queue and a reader that matches reply lines to
+outstanding commands. ``send`` only enqueues, so the acquisition loop never
+waits on the board; every command's round-trip time is reported through
+``on_ack`` and collected in ``rtt``.
+
+Framing: with ``framed=True`` each command goes out as ``<seq>:<command>\\n``
+and the firmware answers with a line starting ``<seq>:``, so replies can be
+matched even if one is lost. The original sketch just answers every command
+with one line; with ``framed=False`` commands are sent as before and replies
+are matched to commands in order.
+"""
+import collections
+import queue
+import threading
+import time
+import typing
+
+from vrehab.cancel import CancelToken
+from vrehab.latency import LatencyHistogram
+
+
+class CommandResult(typing.NamedTuple):
+    seq: int
+    command: str
+    # perf_counter times; acked is None when the command timed out
+    sent: float
+    acked: typing.Optional[float]
+    reply: bytes = b""
+
+    @property
+    def rtt(self) -> typing.Optional[float]:
+        return None if self.acked is None else self.acked - self.sent
+
+    @property
+    def timed_out(self) -> bool:
+        return self.acked is None
+
+
+class ArduinoLink:
+    """Send commands to the board without blocking the caller.
+
+    ``port`` is an open ``serial.Serial`` (or ``LoopbackArduino``). ``close``
+    (or cancelling the parent ``cancel`` token) wakes the writer and aborts
+    the reader's pending ``readline`` through ``cancel_read`` where the port
+    has it; otherwise the port's read timeout bounds the reader. Commands that
+    find the send queue full are dropped and counted; a command not
+    acknowledged within ``ack_timeout`` seconds is reported as timed out.
+    """
+
+    def __init__(
+        self,
+        port,
+        framed: bool = False,
+        ack_timeout: float = 1.0,
+        max_pending: int = 16,
+        on_ack: typing.Optional[typing.Callable[[CommandResult], None]] = None,
+        on_error: typing.Optional[typing.Callable[[Exception], None]] = None,
+        cancel: typing.Optional[CancelToken] = None,
+    ):
+        self.port = port
+        self.framed = framed
+        self.ack_timeout = ack_timeout
+        self.on_ack = on_ack
+        self.on_error = on_error
+        self.rtt = LatencyHistogram()
+        self.sent = 0
+        self.acked = 0
+        self.timeouts = 0
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_pending)
+        # Commands written but not yet acknowledged, oldest first
+        self._inflight: typing.Deque[typing.Tuple[int, str, float]] = collections.deque()
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._cancel = CancelToken(cancel)
+        self._cancel.on_cancel(self._wake)
+        self._threads = [
+            threading.Thread(target=self._write_loop, name="vrehab-arduino-writer", daemon=True),
+            threading.Thread(target=self._read_loop, name="vrehab-arduino-reader", daemon=True),
+        ]
+        for t in self._threads:
+            t.start()
+
+    @property
+    def pending(self) -> int:
+        """Commands queued or waiting for their acknowledgement."""
+        return self._queue.qsize() + len(self._inflight)
+
+    def send(self, command: str) -> typing.Optional[int]:
+        """Queue ``command``; returns its sequence number, or None if the queue is full."""
+        with self._lock:
+            self._seq += 1
+            seq = self._seq
+        try:
+            self._queue.put_nowait((seq, command))
+        except queue.Full:
+            self.dropped += 1
+            return None
+        return seq
+
+    def close(self, timeout: float = 1.0) -> None:
+        self._cancel.cancel()
+        for t in self._threads:
+            t.join(timeout)
+        self.port.close()
+
+    def _wake(self) -> None:
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+        cancel_read = getattr(self.port, "cancel_read", None)
+        if cancel_read is not None:
+            try:
+                cancel_read()
+            except Exception:
+                pass
+
+    def _error(self, e: Exception) -> None:
+        if self.on_error:
+            self.on_error(e)
+
+    def _report(self, result: CommandResult) -> None:
+        if result.timed_out:
+            self.timeouts += 1
+        else:
+            self.acked += 1
+            self.rtt.record(result.rtt)
+        if self.on_ack:
+            try:
+                self.on_ack(result)
+            except Exception as e:
+                self._error(e)
+
+    def _write_loop(self) -> None:
+        while not self._cancel.cancelled:
+            try:
+                item = self._queue.get(timeout=0.05)
+            except queue.Empty:
+                continue
+            if item is None:
+                continue
+            seq, command = item
+            data = f"{seq}:{command}\n" if self.framed else command
+            try:
+                with self._lock:
+                    self._inflight.append((seq, command, time.perf_counter()))
+                self.port.write(data.encode("utf-8"))
+                self.sent += 1
+            except Exception as e:
+                self._error(e)
+
+    def _read_loop(self) -> None:
+        while not self._cancel.cancelled:
+            try:
+                line = self.port.readline()
+            except Exception as e:
+                self._error(e)
+                self._cancel.wait(0.1)
+                continue
+            now = time.perf_counter()
+            if line:
+                self._match(line, now)
+            self._expire(now)
+
+    def _match(self, line: bytes, now: float) -> None:
+        with self._lock:
+            if not self._inflight:
+                return
+            if self.framed:
+                head, sep, _ = line.partition(b":")
+                if not sep or not head.strip().isdigit():
+                    return
+                seq = int(head)
+                # Commands sent before the acknowledged one have lost their replies
+                lost = []
+                while self._inflight and self._inflight[0][0] < seq:
+                    lost.append(self._inflight.popleft())
+                if not self._inflight or self._inflight[0][0] != seq:
+                    match = None
+                else:
+                    match = self._inflight.popleft()
+            else:
+                lost = []
+                match = self._inflight.popleft()
+        for seq, command, sent in lost:
+            self._report(CommandResult(seq, command, sent, None))
+        if match is not None:
+            seq, command, sent = match
+            self._report(CommandResult(seq, command, sent, now, line.strip()))
+
+    def _expire(self, now: float) -> None:
+        expired = []
+        with self._lock:
+            while self._inflight and now - self._inflight[0][2] > self.ack_timeout:
+                expired.append(self._inflight.popleft())
+        for seq, command, sent in expired:
+            self._report(CommandResult(seq, command, sent, None))
@@ -0,0 +1,178 @@
+"""Self-contained intention model for control without scikit-learn.
+
+An artifact is a single ``.npz`` file (read with ``allow_pickle=False``)
+holding everything live control needs: the logistic weights and bias, the
+``StandardScaler`` mean/scale/variance, the class labels, the channel map
+(names in input order), the sliding-window feature settings and a JSON
+``meta`` record with the format version. This module and the runtime it
+feeds (``LinearIntentKernel``, ``WindowFeatures``, ``OnlineAdapter``) only
+need NumPy, so a control host loads a model in milliseconds without
+importing scikit-learn, SciPy or pandas.
+
+Layout of the arrays:
+
+    version      ()        int, FORMAT_VERSION when written
+    coef         (n,)      float64 logistic weights on standardized inputs
+    intercept    ()        float64 bias
+    mean, scale  (n,)      float64 scaler parameters (absent: no scaling)
+    var          (n,)      float64 scaler variance (used by adaptation)
+    classes      (2,)      class labels, rest first
+    channels     (c,)      unicode channel names in stream order
+    meta         ()        unicode JSON: subject, stream, features, accuracy, ...
+
+``n`` is the channel count, or the feature width when ``meta["features"]``
+describes a ``WindowFeatures`` stage.
+"""
+import json
+import os
+import tempfile
+import typing
+
+import numpy as np
+
+FORMAT_VERSION = 1
+ARTIFACT_NAME = "intent.npz"
+
+
+class ScalerParams(typing.NamedTuple):
+    """The fitted ``StandardScaler`` attributes the runtime reads."""
+
+    mean_: typing.Optional[np.ndarray]
+    scale_: typing.Optional[np.ndarray]
+    var_: typing.Optional[np.ndarray]
+    n_samples_seen_: int = 0
+    with_mean: bool = True
+
+
+class LinearParams(typing.NamedTuple):
+    """The fitted binary ``LogisticRegression`` attributes the runtime reads."""
+
+    coef_: np.ndarray
+    intercept_: np.ndarray
+    classes_: np.ndarray
+
+
+class IntentArtifact(typing.NamedTuple):
+    scaler: typing.Optional[ScalerParams]
+    model: LinearParams
+    channel_names: typing.List[str]
+    meta: dict
+    version: int = FORMAT_VERSION
+
+    @property
+    def features(self) -> typing.Optional[dict]:
+        return self.meta.get("features")
+
+    def kernel(self, max_chunk: int = 256):
+        """A ``LinearIntentKernel`` with the scaler folded in."""
+        from vrehab.inference import LinearIntentKernel
+
+        return LinearIntentKernel.from_sklearn(self.scaler, self.model, max_chunk=max_chunk)
+
+    def feature_stage(self):
+        """A fresh ``WindowFeatures`` for the stored settings, or None for per-sample models."""
+        if not self.features:
+            return None
+        from vrehab.features import WindowFeatures
+
+        return WindowFeatures(len(self.channel_names), **self.features)
+
+
+def from_fitted(scaler, model, channel_names: typing.Sequence[str], meta: typing.Optional[dict] = None) -> IntentArtifact:
+    """Copy the parameters out of a fitted scaler (or None) and binary linear model."""
+    coef = np.asarray(model.coef_, dtype=np.float64)
+    if coef.ndim != 2 or coef.shape[0] != 1:
+        raise ValueError("Only binary linear classifiers can be exported")
+    params = None
+    if scaler is not None:
+        params = ScalerParams(
+            _array(getattr(scaler, "mean_", None)),
+            _array(getattr(scaler, "scale_", None)),
+            _array(getattr(scaler, "var_", None)),
+            int(np.sum(getattr(scaler, "n_samples_seen_", 0))),
+            bool(getattr(scaler, "with_mean", True)),
+        )
+    linear = LinearParams(coef, np.asarray(model.intercept_, dtype=np.float64).reshape(1), np.asarray(model.classes_))
+    return IntentArtifact(params, linear, [str(c) for c in channel_names], dict(meta or {}))
+
+
+def _array(value) -> typing.Optional[np.ndarray]:
+    return None if value is None else np.asarray(value, dtype=np.float64)
+
+
+def save_artifact(artifact: IntentArtifact, path: str) -> str:
+    """Write ``artifact`` to ``path`` atomically; returns ``path``."""
+    arrays = {
+        "version": np.asarray(FORMAT_VERSION),
+        "coef": artifact.model.coef_[0],
+        "intercept": np.asarray(float(artifact.model.intercept_[0])),
+        "classes": artifact.model.classes_,
+        "channels": np.asarray(artifact.channel_names, dtype=np.str_),
+        "meta": np.asarray(json.dumps(artifact.meta)),
+    }
+    scaler = artifact.scaler
+    if scaler is not None:
+        for name, value in (("scale", scaler.scale_), ("var", scaler.var_)):
+            if value is not None:
+                arrays[name] = value
+        if scaler.with_mean and scaler.mean_ is not None:
+            arrays["mean"] = scaler.mean_
+        arrays["n_samples_seen"] = np.asarray(scaler.n_samples_seen_)
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix=".tmp-", suffix=".npz", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp, path)
+    except Exception:
+        os.unlink(tmp)
+        raise
+    return path
+
+
+def load_artifact(path: str) -> IntentArtifact:
+    """Read an artifact written by ``save_artifact``; raises ValueError for newer formats."""
+    with np.load(path, allow_pickle=False) as a:
+        version = int(a["version"])
+        if version > FORMAT_VERSION:
+            raise ValueError(f"{path} is artifact version {version}; this runtime reads up to {FORMAT_VERSION}")
+        meta = json.loads(str(a["meta"]))
+        coef = a["coef"].astype(np.float64)
+        scaler = None
+        if "scale" in a or "mean" in a:
+            scaler = ScalerParams(
+                a["mean"] if "mean" in a else None,
+                a["scale"] if "scale" in a else None,
+                a["var"] if "var" in a else None,
+                int(a["n_samples_seen"]) if "n_samples_seen" in a else 0,
+                "mean" in a,
+            )
+        model = LinearParams(coef.reshape(1, -1), a["intercept"].astype(np.float64).reshape(1), a["classes"])
+        return IntentArtifact(scaler, model, [str(c) for c in a["channels"]], meta, version)
+
+
+def main(argv: typing.Optional[typing.List[str]] = None) -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export a stored model as a NumPy-only artifact, or describe one")
+    parser.add_argument("model", help="model directory (models/<subject>/<time>) or an artifact .npz")
+    parser.add_argument("--out", help="where to write the artifact")
+    args = parser.parse_args(argv)
+    if os.path.isdir(args.model):
+        from vrehab.registry import ModelStore
+
+        stored = ModelStore().load(args.model, sklearn=False)
+        artifact = from_fitted(stored.scaler, stored.model, stored.meta.get("channel_names", []), stored.meta)
+    else:
+        artifact = load_artifact(args.model)
+    features = artifact.features
+    print(f"version {artifact.version}, {len(artifact.channel_names)} channels ({', '.join(artifact.channel_names)})")
+    print(f"{artifact.model.coef_.shape[1]} weights, "
+          + (f"windowed features {features['window']}/{features['step']}" if features else "per-sample inputs")
+          + f", subject {artifact.meta.get('subject', '?')}, stream {artifact.meta.get('stream_name', '?')}")
+    if args.out:
+        print("Artifact written to", save_artifact(artifact, args.out))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""Offline benchmark of the training and control pipelines.
+
+Runs the ``training_process``/``train_model``/``control_process`` logic
+against a synthetic LSL outlet (in a child process) or an in-memory
+replayer, with a mock Dobot, and reports throughput, per-sample latency,
+CPU, memory and dropped samples for each channel count and sample rate::
+
+    python -m vrehab.bench --channels 8 32 64 --rates 250 1000 --duration 10
+"""
+import argparse
+import json
+import multiprocessing as mp
+import time
+import typing
+
+import numpy as np
+
+from vrehab.acquisition import ChunkedInlet
+from vrehab.buffer import SampleBuffer
+from vrehab.inference import LinearIntentKernel
+from vrehab.latency import LatencyTracker
+from vrehab.pipeline import ControlPipeline
+from vrehab.robot import RobotScheduler, Step, Trajectory
+from vrehab.synthetic import MockDobot, RecordingReplayer, SyntheticOutlet, synthetic_samples
+
+
+def peak_rss_mb() -> float:
+    try:
+        import resource
+    except ImportError:
+        return float("nan")
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def _serve_outlet(name, channel_count, srate, label, pushed, stop) -> None:
+    outlet = SyntheticOutlet(name=name, channel_count=channel_count, srate=srate).start()
+    while not stop.is_set():
+        outlet.label = label.value
+        pushed.value = outlet.pushed
+        time.sleep(0.005)
+    outlet.stop()
+    pushed.value = outlet.pushed
+
+
+class _OutletSource:
+    """Synthetic outlet in a child process so its CPU does not count against the pipeline."""
+
+    def __init__(self, channel_count: int, srate: float):
+        from pylsl import StreamInlet, resolve_byprop
+
+        self.name = f"vrehab-bench-{channel_count}ch-{int(srate)}hz-{time.monotonic_ns()}"
+        self._label = mp.Value("i", 0)
+        self._pushed = mp.Value("q", 0)
+        self._stop = mp.Event()
+        self._proc = mp.Process(target=_serve_outlet, args=(self.name, channel_count, srate, self._label, self._pushed, self._stop), daemon=True)
+        self._proc.start()
+        streams = resolve_byprop("name", self.name, timeout=10)
+        if not streams:
+            self.close()
+            raise RuntimeError(f"Synthetic stream {self.name} not found")
+        self.inlet = StreamInlet(streams[0], max_buflen=360)
+        self.inlet.open_stream()
+
+    def set_label(self, label: int) -> None:
+        self._label.value = label
+
+    @property
+    def pushed(self) -> int:
+        return self._pushed.value
+
+    def close(self) -> None:
+        self._stop.set()
+        self._proc.join(2.0)
+
+
+class _ReplaySource:
+    """Pre-generated rest / move / mixed recording served by ``RecordingReplayer``."""
+
+    def __init__(self, channel_count: int, srate: float, train_s: float, control_s: float, speed: float):
+        rng = np.random.default_rng(0)
+        n_train = int(train_s * srate)
+        n_control = int(control_s * srate)
+        segments = [
+            synthetic_samples(n_train, channel_count, 0, rng),
+            synthetic_samples(n_train, channel_count, 1, rng),
+            synthetic_samples(n_control, channel_count, 1, rng),
+        ]
+        self.inlet = RecordingReplayer(np.vstack(segments), srate, speed=speed)
+
+    def set_label(self, label: int) -> None:
+        pass
+
+    @property
+    def pushed(self) -> int:
+        return self.inlet.position
+
+    def close(self) -> None:
+        pass
+
+
+def _robot_movement(pose) -> typing.List[Step]:
+    x, y, z, r = pose[:4]
+    return [("", x + dx, y + dy, z + dz, r)
+            for dx, dy, dz in ((0, 15, 0), (15, 15, 0), (15, 15, 10), (0, 15, 10), (-15, 15, 10), (-15, 15, 0), (-15, 0, 0), (0, 0, 0))]
+
+
+def _collect(acquisition: ChunkedInlet, label: int, duration: float, limit: float) -> SampleBuffer:
+    """``collect_training_data`` loop: stop after ``duration`` seconds or ``limit`` samples."""
+    buffer = SampleBuffer(acquisition.channel_count)
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration and len(buffer) < limit:
+        samples, timestamps = acquisition.read()
+        buffer.extend(samples, timestamps, label)
+    return buffer
+
+
+def run_case(channel_count: int, srate: float, train_s: float, control_s: float, source: str = "outlet",
+             chunk_size: int = 32, max_latency: float = 0.02, threshold: int = 700, speed: float = 1.0) -> dict:
+    """Benchmark one channel count / sample rate combination and return its metrics."""
+    import pandas as pd
+
+    from vrehab.training import fit_intent_model
+
+    if source == "outlet":
+        src = _OutletSource(channel_count, srate)
+        duration, train_limit = train_s, float("inf")
+    else:
+        src = _ReplaySource(channel_count, srate, train_s, control_s, speed)
+        duration, train_limit = float("inf"), int(train_s * srate)
+    result = {"channels": channel_count, "srate": srate, "source": source}
+    try:
+        acquisition = ChunkedInlet(src.inlet, chunk_size=chunk_size, max_latency=max_latency)
+
+        # Training: collect_training_data for rest and move, then train_model
+        cpu0, wall0 = time.process_time(), time.perf_counter()
+        src.set_label(0)
+        rest = _collect(acquisition, 0, duration, train_limit)
+        src.set_label(1)
+        move = _collect(acquisition, 1, duration, train_limit)
+        collect_cpu, collect_wall = time.process_time() - cpu0, time.perf_counter() - wall0
+        collected = len(rest) + len(move)
+        fit0 = time.perf_counter()
+        scaler, model, accuracy = fit_intent_model(pd.concat([rest.to_dataframe(), move.to_dataframe()]))
+        result.update(
+            train_samples=collected,
+            train_samples_per_s=collected / collect_wall,
+            train_cpu_us_per_sample=1e6 * collect_cpu / max(collected, 1),
+            fit_s=time.perf_counter() - fit0,
+            accuracy=accuracy,
+        )
+
+        # Control: control_process with the mock robot on every trigger
+        robot = MockDobot()
+        latency = LatencyTracker()
+        scheduler = RobotScheduler(robot, poll_interval=0.005, latency=latency).start()
+
+        def on_trigger(trigger_time: float) -> None:
+            scheduler.submit(Trajectory("movement", _robot_movement, dwell_ms=0, trigger_time=trigger_time))
+
+        kernel = LinearIntentKernel.from_sklearn(scaler, model, max_chunk=chunk_size)
+        pipeline = ControlPipeline(acquisition, kernel, threshold=lambda: threshold, on_trigger=on_trigger, latency=latency)
+        pushed0 = src.pushed
+        cpu0, wall0 = time.process_time(), time.perf_counter()
+        pipeline.start()
+        if source == "outlet":
+            time.sleep(control_s)
+        else:
+            # Run until the recording is exhausted and every chunk has been decided or dropped
+            while not src.inlet.exhausted or pipeline.snapshot.samples + pipeline.dropped < src.pushed - pushed0:
+                time.sleep(0.005)
+        pipeline.stop()
+        control_cpu, control_wall = time.process_time() - cpu0, time.perf_counter() - wall0
+        deadline = time.perf_counter() + 1.0
+        while scheduler.busy and time.perf_counter() < deadline:
+            time.sleep(0.005)
+        scheduler.stop()
+        snapshot = pipeline.snapshot
+        # Stop the source, then count what is still queued in the inlet: it fell behind rather than being lost
+        src.close()
+        backlog = 0
+        while True:
+            samples, timestamps = acquisition.read(timeout=0.2 if source == "outlet" else 0.0)
+            if not len(timestamps):
+                break
+            backlog += len(timestamps)
+        sent = src.pushed - pushed0
+        lost = max(0, sent - snapshot.samples - snapshot.dropped - backlog)
+        summary = latency.summary()
+        result.update(
+            control_samples=snapshot.samples,
+            control_samples_per_s=snapshot.samples / control_wall,
+            control_cpu_us_per_sample=1e6 * control_cpu / max(snapshot.samples, 1),
+            dropped=snapshot.dropped + lost,
+            backlog=backlog,
+            triggers=snapshot.triggers,
+            robot_moves=len(robot.moves),
+            acquisition_p50_ms=summary["acquisition"]["p50"],
+            acquisition_p99_ms=summary["acquisition"]["p99"],
+            inference_p50_ms=summary["inference"]["p50"],
+            trigger_p99_ms=summary["trigger"]["p99"],
+            peak_rss_mb=peak_rss_mb(),
+        )
+    finally:
+        src.close()
+    return result
+
+
+COLUMNS = (
+    ("channels", "ch", "{:>4d}"),
+    ("srate", "Hz", "{:>6.0f}"),
+    ("train_samples_per_s", "train/s", "{:>9.0f}"),
+    ("train_cpu_us_per_sample", "train us", "{:>9.1f}"),
+    ("fit_s", "fit s", "{:>6.2f}"),
+    ("control_samples_per_s", "ctrl/s", "{:>9.0f}"),
+    ("control_cpu_us_per_sample", "ctrl us", "{:>8.1f}"),
+    ("acquisition_p50_ms", "acq p50", "{:>8.2f}"),
+    ("acquisition_p99_ms", "acq p99", "{:>8.2f}"),
+    ("inference_p50_ms", "inf p50", "{:>8.2f}"),
+    ("dropped", "dropped", "{:>8d}"),
+    ("backlog", "backlog", "{:>8d}"),
+    ("peak_rss_mb", "RSS MB", "{:>7.1f}"),
+)
+
+
+def format_table(results: typing.List[dict]) -> str:
+    header = " ".join(f"{title:>{len(fmt.format(0))}}" for _, title, fmt in COLUMNS)
+    lines = [header]
+    for r in results:
+        cells = []
+        for key, _, fmt in COLUMNS:
+            value = r.get(key)
+            cells.append(fmt.format(value) if value is not None else f"{'—':>{len(fmt.format(0))}}")
+        lines.append(" ".join(cells))
+    return "\n".join(lines)
+
+
+def main(argv: typing.Optional[typing.List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the VRehab training and control pipelines without hardware")
+    parser.add_argument("--channels", type=int, nargs="+", default=[8, 32, 64])
+    parser.add_argument("--rates", type=float, nargs="+", default=[250.0, 1000.0])
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per training class and for control")
+    parser.add_argument("--source", choices=["outlet", "replay"], default="outlet")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed (0 = as fast as possible)")
+    parser.add_argument("--chunk-size", type=int, default=32)
+    parser.add_argument("--max-latency", type=float, default=0.02)
+    parser.add_argument("--threshold", type=int, default=700)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    results = []
+    for channel_count in args.channels:
+        for srate in args.rates:
+            results.append(run_case(channel_count, srate, args.duration, args.duration, source=args.source,
+                                    chunk_size=args.chunk_size, max_latency=args.max_latency,
+                                    threshold=args.threshold, speed=args.speed))
+            print(format_table(results[-1:]).splitlines()[-1] if len(results) > 1 else format_table(results), flush=True)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
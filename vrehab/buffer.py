@@ -0,0 +1,90 @@
+"""Growable NumPy-backed sample store for LSL acquisition."""
+import typing
+
+import numpy as np
+
+
+class SampleBuffer:
+    """Append-only table of EEG samples with timestamps and labels.
+
+    Rows are written into a preallocated array that doubles when full, so
+    appending is amortized O(1) instead of the O(n) copy ``pd.concat`` makes
+    per sample. Call ``to_dataframe`` once, when the collection window closes.
+    """
+
+    def __init__(
+        self,
+        channel_count: int,
+        channel_names: typing.Optional[typing.Sequence] = None,
+        capacity: int = 4096,
+        dtype=np.float64,
+    ):
+        if channel_names is None:
+            channel_names = list(range(channel_count))
+        if len(channel_names) != channel_count:
+            raise ValueError(f"Expected {channel_count} channel names, got {len(channel_names)}")
+        self.channel_count = channel_count
+        self.channel_names = list(channel_names)
+        self._samples = np.empty((max(capacity, 1), channel_count), dtype=dtype)
+        self._timestamps = np.empty(max(capacity, 1), dtype=np.float64)
+        self._labels = np.empty(max(capacity, 1), dtype=np.int8)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def samples(self) -> np.ndarray:
+        return self._samples[: self._size]
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self._timestamps[: self._size]
+
+    @property
+    def labels(self) -> np.ndarray:
+        return self._labels[: self._size]
+
+    def _reserve(self, extra: int) -> None:
+        needed = self._size + extra
+        capacity = len(self._timestamps)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name in ("_samples", "_timestamps", "_labels"):
+            old = getattr(self, name)
+            new = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[: self._size] = old[: self._size]
+            setattr(self, name, new)
+
+    def append(self, sample: typing.Sequence[float], timestamp: float = np.nan, label: int = 0) -> None:
+        self._reserve(1)
+        i = self._size
+        self._samples[i] = sample
+        self._timestamps[i] = timestamp
+        self._labels[i] = label
+        self._size = i + 1
+
+    def extend(self, samples: np.ndarray, timestamps: typing.Sequence[float], label: int = 0) -> None:
+        n = len(timestamps)
+        if n == 0:
+            return
+        self._reserve(n)
+        i = self._size
+        self._samples[i : i + n] = samples[:n]
+        self._timestamps[i : i + n] = timestamps
+        self._labels[i : i + n] = label
+        self._size = i + n
+
+    def clear(self) -> None:
+        self._size = 0
+
+    def to_dataframe(self, label_column: typing.Optional[str] = "Event"):
+        """Return the samples as a DataFrame, one column per channel plus labels."""
+        import pandas as pd
+
+        frame = pd.DataFrame(self.samples.copy(), columns=self.channel_names)
+        if label_column is not None:
+            frame[label_column] = self.labels.astype(np.int64)
+        return frame
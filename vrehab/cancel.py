@@ -0,0 +1,78 @@
+"""Cooperative cancellation for worker threads."""
+import threading
+import typing
+import weakref
+
+# Longest a cancellable wait blocks before looking at its token again, seconds
+CANCEL_POLL = 0.02
+
+
+class Cancelled(Exception):
+    """Raised by ``CancelToken.raise_if_cancelled`` once the token is cancelled."""
+
+
+class CancelToken:
+    """A one-shot stop flag shared between a worker and whoever stops it.
+
+    Workers check ``cancelled`` between bounded waits (never longer than
+    ``CANCEL_POLL``) or block in ``wait``, which returns as soon as the token
+    is cancelled. ``on_cancel`` callbacks run once, in the cancelling thread,
+    to wake waits the token cannot reach (queues, conditions). Tokens made
+    with ``child`` are cancelled with their parent, so cancelling one root
+    token stops every worker of an engine; cancelling a child leaves the
+    parent alone.
+    """
+
+    def __init__(self, parent: typing.Optional["CancelToken"] = None):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: typing.List[typing.Callable[[], None]] = []
+        self._children: "weakref.WeakSet[CancelToken]" = weakref.WeakSet()
+        if parent is not None:
+            parent._adopt(self)
+
+    def child(self) -> "CancelToken":
+        return CancelToken(self)
+
+    def _adopt(self, child: "CancelToken") -> None:
+        with self._lock:
+            cancelled = self._event.is_set()
+            if not cancelled:
+                self._children.add(child)
+        if cancelled:
+            child.cancel()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            children, self._children = list(self._children), weakref.WeakSet()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+        for child in children:
+            child.cancel()
+
+    def on_cancel(self, callback: typing.Callable[[], None]) -> None:
+        """Run ``callback`` when the token is cancelled (right away if it already is)."""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def wait(self, timeout: typing.Optional[float] = None) -> bool:
+        """Block until cancelled or ``timeout`` passes; True if cancelled."""
+        return self._event.wait(timeout)
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise Cancelled()
@@ -0,0 +1,126 @@
+"""Headless front end for kiosk hosts and services.
+
+Runs the same training and control workflow as the GUI on top of
+``VRehabEngine``, printing its log to stdout::
+
+    python -m vrehab.cli train --subject ana
+    python -m vrehab.cli control --subject ana --robot sim --threshold 500
+    python -m vrehab.cli run --subject ana --port COM4   # train if needed, then control until stopped
+    python -m vrehab.cli control --subject ana --serve 8765   # also publish decisions to VR clients
+
+``control`` and ``run`` keep going until SIGINT/SIGTERM (or ``--duration``
+seconds), so they can run as a daemon under a service manager.
+"""
+import argparse
+import signal
+import sys
+import threading
+import time
+import typing
+
+from vrehab.devices import ROBOT_BACKENDS
+from vrehab.engine import EngineEvent, VRehabEngine
+from vrehab.registry import ModelStore
+
+
+_print_lock = threading.Lock()
+
+
+def _print_event(event: EngineEvent) -> None:
+    # Events arrive from the training, decision and robot threads
+    if event.kind == "log":
+        line = f"[{time.strftime('%H:%M:%S')}] {event.message}"
+    elif event.kind == "training" and event.message:
+        line = f"[{time.strftime('%H:%M:%S')}] == {event.message}"
+    else:
+        return
+    with _print_lock:
+        print(line, flush=True)
+
+
+def _train(engine: VRehabEngine, args) -> bool:
+    engine.rest_s, engine.move_s = args.rest, args.move
+    if not engine.start_training(features=args.features):
+        return False
+    engine.wait_training()
+    return engine.lr_model is not None
+
+
+def _control(engine: VRehabEngine, args, stop: threading.Event) -> None:
+    engine.threshold = args.threshold
+    engine.cooldown_s = args.cooldown
+    if not engine.start_control(adapt_norm=args.adapt_norm, adapt_weights=args.adapt_weights):
+        return
+    deadline = time.monotonic() + args.duration if args.duration else None
+    while not stop.wait(args.status):
+        s = engine.snapshot
+        h = engine.stream_health
+        health = "" if h is None else f" rate={h.rate:.0f}Hz jitter={h.jitter * 1000:.1f}ms backlog={h.backlog * 1000:.0f}ms" + (
+            f" ALERT {', '.join(h.alerts)}" if h.alerts else "")
+        print(f"phase={s.phase} counter={s.counter} intention={s.intention} samples={s.samples} triggers={s.triggers} "
+              f"movements={s.movements} dropped={s.dropped}{health}", flush=True)
+        if deadline is not None and time.monotonic() >= deadline:
+            break
+    engine.stop_control()
+
+
+def main(argv: typing.Optional[typing.List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="VRehab without a display")
+    parser.add_argument("command", choices=["train", "control", "run"])
+    parser.add_argument("--subject", default="anonymous")
+    parser.add_argument("--stream", default="AURA_Power", help="LSL stream name")
+    parser.add_argument("--source", help="LSL source id, when several streams share the name")
+    parser.add_argument("--robot", choices=ROBOT_BACKENDS, default="dobot", help="robot backend (sim = simulated Dobot)")
+    parser.add_argument("--port", help="robot serial port; without it control runs with no robot")
+    parser.add_argument("--models", default="models")
+    parser.add_argument("--recordings", default="recordings")
+    parser.add_argument("--rest", type=float, default=30.0, help="seconds of rest during training")
+    parser.add_argument("--move", type=float, default=30.0, help="seconds of imagined movement during training")
+    parser.add_argument("--features", action="store_true", help="train on windowed features")
+    parser.add_argument("--retrain", action="store_true", help="run: train even if a stored model fits")
+    parser.add_argument("--threshold", type=int, default=700)
+    parser.add_argument("--cooldown", type=float, default=0.0, help="seconds to ignore decisions after each trigger")
+    parser.add_argument("--adapt-norm", action="store_true")
+    parser.add_argument("--adapt-weights", action="store_true")
+    parser.add_argument("--serve", type=int, metavar="PORT", help="publish probabilities and triggers on this TCP port")
+    parser.add_argument("--serve-host", default="127.0.0.1", help="address for --serve (default: local only)")
+    parser.add_argument("--lsl-decisions", action="store_true", help="publish probabilities and triggers as LSL streams")
+    parser.add_argument("--duration", type=float, default=0.0, help="stop control after this many seconds (0 = until signalled)")
+    parser.add_argument("--status", type=float, default=5.0, help="seconds between status lines")
+    args = parser.parse_args(argv)
+
+    engine = VRehabEngine(robot_backend=args.robot, subject=args.subject, stream_name=args.stream, stream_source=args.source,
+                          model_store=ModelStore(args.models), recordings=args.recordings, on_event=_print_event)
+    stop = threading.Event()
+
+    def _handle(signum, frame) -> None:
+        stop.set()
+        engine.stop_training()
+
+    signal.signal(signal.SIGINT, _handle)
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, _handle)
+
+    try:
+        if not engine.connect_eeg():
+            return 1
+        if args.command != "train" and (args.port or args.robot == "sim"):
+            engine.connect_robot(args.port)
+        if args.command != "train" and (args.serve is not None or args.lsl_decisions):
+            engine.serve_decisions(args.serve or 0, args.serve_host, lsl=args.lsl_decisions)
+        if args.command == "train" or (args.command == "run" and (args.retrain or engine.lr_model is None)):
+            if not _train(engine, args):
+                print("Training did not produce a model", file=sys.stderr)
+                return 1
+        if args.command in ("control", "run") and not stop.is_set():
+            if engine.lr_model is None:
+                print(f"No stored model for '{args.subject}'; run 'train' first", file=sys.stderr)
+                return 1
+            _control(engine, args, stop)
+    finally:
+        engine.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""Vectorized leaky-counter simulation over whole prediction arrays.
+
+Gives the same trigger indices and counter values as feeding every
+intention through ``LeakyCounter.update``, without a Python step per sample.
+Between two triggers the counter is a random walk of +1/-1 steps floored at
+zero, so with ``S`` the running sum of steps since the last reset its value
+is ``S_t - min(0, min(S_0..S_t))``. The first index where that reaches the
+threshold is the next trigger, and the walk restarts from zero after it.
+"""
+import typing
+
+import numpy as np
+
+
+def _steps(intentions: np.ndarray) -> np.ndarray:
+    return np.where(np.asarray(intentions) == 1, 1, -1).astype(np.int64)
+
+
+def _walk(intentions: np.ndarray) -> np.ndarray:
+    # Running sum of steps with a leading 0, so walk[j] - walk[i] sums steps i..j-1
+    walk = np.zeros(len(intentions) + 1, dtype=np.int64)
+    np.cumsum(_steps(intentions), out=walk[1:])
+    return walk
+
+
+def _triggers(walk: np.ndarray, threshold: int, block: typing.Optional[int]) -> np.ndarray:
+    n = len(walk) - 1
+    if threshold <= 0:
+        # value >= threshold after every update
+        return np.arange(n, dtype=np.intp)
+    # A trigger is at least ``threshold`` samples after the previous one, so
+    # blocks of a few thresholds keep the work per trigger proportional to it
+    block = block or max(4 * threshold, 1024)
+    fired = []
+    start, value = 0, 0
+    while start < n:
+        stop = min(start + block, n)
+        rel = walk[start + 1 : stop + 1] - walk[start]
+        counts = rel - np.minimum(np.minimum.accumulate(rel), -value)
+        hits = np.flatnonzero(counts >= threshold)
+        if len(hits):
+            fired.append(start + hits[0])
+            start, value = start + hits[0] + 1, 0
+        else:
+            start, value = stop, int(counts[-1])
+    return np.asarray(fired, dtype=np.intp)
+
+
+def trigger_indices(intentions: np.ndarray, threshold: int, block: typing.Optional[int] = None) -> np.ndarray:
+    """Indices of ``intentions`` at which a fresh ``LeakyCounter(threshold)`` fires."""
+    return _triggers(_walk(intentions), threshold, block)
+
+
+def sweep_thresholds(intentions: np.ndarray, thresholds: typing.Iterable[int]) -> typing.Dict[int, np.ndarray]:
+    """Trigger indices for every threshold over the same predictions."""
+    walk = _walk(intentions)
+    return {int(t): _triggers(walk, int(t), None) for t in thresholds}
+
+
+def counter_trajectory(intentions: np.ndarray, threshold: int,
+                       fired: typing.Optional[np.ndarray] = None) -> typing.Tuple[np.ndarray, np.ndarray]:
+    """``(values, fired)``: ``LeakyCounter.value`` after each update and the trigger indices.
+
+    ``fired`` may be passed when already known from ``trigger_indices``.
+    """
+    steps = _steps(intentions)
+    n = len(steps)
+    if fired is None:
+        fired = trigger_indices(intentions, threshold)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64), fired
+    # Segment k runs from the sample after trigger k-1 through trigger k
+    segment = np.zeros(n, dtype=np.int64)
+    segment[fired[fired + 1 < n] + 1] = 1
+    segment = np.cumsum(segment)
+    walk = np.cumsum(steps)
+    starts = np.concatenate(([0], fired + 1))[segment]
+    walk -= np.where(starts > 0, walk[np.maximum(starts - 1, 0)], 0)
+    # Shift each segment below all earlier ones so one running minimum restarts per segment
+    shift = (2 * n + 2) * segment
+    lowest = np.minimum.accumulate(walk - shift) + shift
+    values = walk - np.minimum(lowest, 0)
+    values[fired] = 0
+    return values, fired
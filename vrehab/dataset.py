@@ -0,0 +1,165 @@
+"""Out-of-core training on many recorded sessions.
+
+Sessions written by ``SessionRecorder`` are memory-mapped and visited in
+batches, so only one batch is in RAM at a time. The scaler is fitted with
+``StandardScaler.partial_fit`` (streaming mean/variance) and the classifier
+is a logistic-loss, averaged ``SGDClassifier`` trained with ``partial_fit``
+on batches drawn at random across all sessions::
+
+    python -m vrehab.dataset --root recordings --subject p01 --holdout 1
+"""
+import argparse
+import glob
+import os
+import typing
+
+import numpy as np
+
+from vrehab.recording import Recording, open_session, safe_name
+
+
+def find_sessions(root: str = "recordings", subjects: typing.Optional[typing.Sequence[str]] = None,
+                  days: typing.Optional[typing.Sequence[str]] = None) -> typing.List[str]:
+    """Session directories under ``root/<subject>/<YYYY-MM-DD>/``, oldest first.
+
+    ``subjects`` are matched as ``SessionRecorder`` names their directories.
+    """
+    wanted = {safe_name(s) for s in subjects} if subjects else None
+    paths = []
+    for meta in glob.glob(os.path.join(root, "*", "*", "*", "meta.json")):
+        session = os.path.dirname(meta)
+        day_dir = os.path.dirname(session)
+        subject = os.path.basename(os.path.dirname(day_dir))
+        if wanted and subject not in wanted:
+            continue
+        if days and os.path.basename(day_dir) not in days:
+            continue
+        paths.append(session)
+    return sorted(paths, key=lambda p: (os.path.basename(os.path.dirname(p)), os.path.basename(p)))
+
+
+class SessionDataset:
+    """Several recorded sessions viewed as one labelled dataset without loading them.
+
+    Rows are addressed by a global index running through the sessions in
+    order; a batch is an array of such indices.
+    """
+
+    def __init__(self, paths: typing.Sequence[str]):
+        self.recordings: typing.List[Recording] = [open_session(p) for p in paths]
+        counts = {r.meta["channel_count"] for r in self.recordings}
+        if len(counts) > 1:
+            raise ValueError(f"Sessions have different channel counts: {sorted(counts)}")
+        self.channel_count = counts.pop() if counts else 0
+        self._starts = np.cumsum([0] + [len(r.labels) for r in self.recordings])
+
+    def __len__(self) -> int:
+        return int(self._starts[-1])
+
+    def batches(self, batch_size: int = 8192, rng: typing.Optional[np.random.Generator] = None) -> typing.List[np.ndarray]:
+        """Sorted global row indices per batch, covering every sample once.
+
+        Without ``rng`` batches are consecutive rows. With ``rng`` rows are
+        drawn at random across all sessions: recordings are one long rest
+        block then one long move block, so consecutive rows would give
+        ``partial_fit`` batches of a single class.
+        """
+        order = rng.permutation(len(self)) if rng is not None else np.arange(len(self))
+        out = [order[start : start + batch_size] for start in range(0, len(order), batch_size)]
+        return [np.sort(rows) for rows in out] if rng is not None else out
+
+    def load(self, rows: np.ndarray) -> typing.Tuple[np.ndarray, np.ndarray]:
+        """Read sorted global ``rows`` through the memmaps."""
+        X = np.empty((len(rows), self.channel_count), dtype=np.float64)
+        y = np.empty(len(rows), dtype=np.int64)
+        bounds = np.searchsorted(rows, self._starts)
+        for i, rec in enumerate(self.recordings):
+            lo, hi = bounds[i], bounds[i + 1]
+            if lo == hi:
+                continue
+            local = rows[lo:hi] - self._starts[i]
+            if local[-1] - local[0] + 1 == len(local):
+                local = slice(local[0], local[-1] + 1)
+            X[lo:hi] = rec.samples[local]
+            y[lo:hi] = rec.labels[local]
+        return X, y
+
+    def iter_batches(self, batch_size: int = 8192, rng: typing.Optional[np.random.Generator] = None):
+        """Yield ``(X, y)`` batches; with ``rng`` rows are shuffled across sessions and within each batch."""
+        for rows in self.batches(batch_size, rng):
+            X, y = self.load(rows)
+            if rng is not None:
+                order = rng.permutation(len(y))
+                X, y = X[order], y[order]
+            yield X, y
+
+
+def fit_streaming(dataset: SessionDataset, epochs: int = 5, batch_size: int = 8192, alpha: float = 1e-4, seed: int = 0):
+    """Fit ``(StandardScaler, SGDClassifier)`` over a dataset one batch at a time."""
+    from sklearn.linear_model import SGDClassifier
+    from sklearn.preprocessing import StandardScaler
+
+    scaler = StandardScaler()
+    for X, _ in dataset.iter_batches(batch_size):
+        scaler.partial_fit(X)
+    model = SGDClassifier(loss="log_loss", alpha=alpha, average=True, random_state=seed)
+    rng = np.random.default_rng(seed)
+    classes = np.array([0, 1])
+    for _ in range(epochs):
+        for X, y in dataset.iter_batches(batch_size, rng=rng):
+            model.partial_fit(scaler.transform(X), y, classes=classes)
+    return scaler, model
+
+
+def score_streaming(dataset: SessionDataset, scaler, model, batch_size: int = 65536) -> float:
+    """Accuracy (%) of a fitted scaler/model over every sample in ``dataset``."""
+    correct = total = 0
+    for X, y in dataset.iter_batches(batch_size):
+        correct += int((model.predict(scaler.transform(X)) == y).sum())
+        total += len(y)
+    return 100.0 * correct / total if total else float("nan")
+
+
+def main(argv: typing.Optional[typing.List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Train a cross-session intention model from recorded sessions")
+    parser.add_argument("--root", default="recordings")
+    parser.add_argument("--subject", action="append", help="restrict to these subjects (repeatable)")
+    parser.add_argument("--day", action="append", help="restrict to these days, YYYY-MM-DD (repeatable)")
+    parser.add_argument("--holdout", type=int, default=1, help="score on the N most recent sessions")
+    parser.add_argument("--epochs", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=8192)
+    parser.add_argument("--save", action="store_true", help="store the model in the model registry")
+    parser.add_argument("--models", default="models", help="model registry directory")
+    args = parser.parse_args(argv)
+
+    paths = find_sessions(args.root, args.subject, args.day)
+    if len(paths) <= args.holdout:
+        parser.error(f"Need more than {args.holdout} session(s), found {len(paths)}")
+    train_paths, test_paths = paths[: len(paths) - args.holdout], paths[len(paths) - args.holdout :]
+    train, test = SessionDataset(train_paths), SessionDataset(test_paths)
+    print(f"Training on {len(train_paths)} session(s), {len(train)} samples")
+    scaler, model = fit_streaming(train, epochs=args.epochs, batch_size=args.batch_size)
+    print(f"Train accuracy: {score_streaming(train, scaler, model):.2f}%")
+    accuracy = None
+    if len(test):
+        accuracy = score_streaming(test, scaler, model)
+        print(f"Held-out accuracy ({len(test_paths)} session(s)): {accuracy:.2f}%")
+    if args.save:
+        from vrehab.registry import ModelStore
+
+        first = train.recordings[0].meta
+        path = ModelStore(args.models).save(
+            scaler,
+            model,
+            subject=args.subject[0] if args.subject and len(args.subject) == 1 else first["subject"],
+            channel_count=train.channel_count,
+            stream_name=first["stream_name"],
+            accuracy=accuracy,
+            channel_names=first["channel_names"],
+            extra={"sessions": paths},
+        )
+        print(f"Model saved to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""Publish control decisions to remote actuators (VR scenes, other robots).
+
+``DecisionServer`` is an asyncio TCP server running on its own thread. Every
+subscriber receives length-prefixed binary frames (all little-endian)::
+
+    uint32 payload length | uint8 kind | body
+
+    HELLO          kind 0  JSON (format version, stream, threshold)
+    PROBABILITIES  kind 1  uint32 n, uint32 counter, float64[n] LSL times, float32[n] P(intention)
+    TRIGGER        kind 2  float64 LSL time of the crossing, uint32 trigger count
+
+Each subscriber has a bounded queue. When a slow reader falls behind, the
+oldest probability frames are dropped for that reader only; trigger frames
+are never dropped. ``DecisionOutlet`` publishes the same information as two
+LSL streams instead. Both are fed by ``ControlPipeline`` through ``publish``
+and ``publish_trigger``, which never block the decision thread.
+
+Print what a server sends::
+
+    python -m vrehab.decisions --connect 127.0.0.1:8765
+"""
+import argparse
+import asyncio
+import collections
+import json
+import struct
+import threading
+import typing
+
+import numpy as np
+
+FORMAT_VERSION = 1
+HELLO, PROBABILITIES, TRIGGER = 0, 1, 2
+_LENGTH = struct.Struct("<I")
+_PROB_HEADER = struct.Struct("<BII")
+_TRIGGER = struct.Struct("<BdI")
+
+
+def probabilities(scores: np.ndarray) -> np.ndarray:
+    """Logistic probability of intention from kernel decision scores."""
+    return (1.0 / (1.0 + np.exp(-np.asarray(scores, dtype=np.float64)))).astype(np.float32)
+
+
+def encode_probabilities(timestamps: np.ndarray, probs: np.ndarray, counter: int) -> bytes:
+    n = len(timestamps)
+    payload = _PROB_HEADER.pack(PROBABILITIES, n, counter) + np.asarray(timestamps, "<f8").tobytes() + np.asarray(probs, "<f4").tobytes()
+    return _LENGTH.pack(len(payload)) + payload
+
+
+def encode_trigger(crossing: float, count: int) -> bytes:
+    payload = _TRIGGER.pack(TRIGGER, crossing, count)
+    return _LENGTH.pack(len(payload)) + payload
+
+
+def encode_hello(info: dict) -> bytes:
+    payload = bytes([HELLO]) + json.dumps(dict(info, format_version=FORMAT_VERSION)).encode()
+    return _LENGTH.pack(len(payload)) + payload
+
+
+def decode(payload: bytes) -> typing.Tuple[int, typing.Any]:
+    """Decode one frame payload (without the length prefix) into ``(kind, value)``."""
+    kind = payload[0]
+    if kind == PROBABILITIES:
+        _, n, counter = _PROB_HEADER.unpack_from(payload)
+        offset = _PROB_HEADER.size
+        timestamps = np.frombuffer(payload, "<f8", n, offset)
+        probs = np.frombuffer(payload, "<f4", n, offset + 8 * n)
+        return kind, (timestamps, probs, counter)
+    if kind == TRIGGER:
+        _, crossing, count = _TRIGGER.unpack(payload)
+        return kind, (crossing, count)
+    if kind == HELLO:
+        return kind, json.loads(payload[1:].decode())
+    raise ValueError(f"Unknown frame kind {kind}")
+
+
+async def read_frames(reader: asyncio.StreamReader) -> typing.AsyncIterator[typing.Tuple[int, typing.Any]]:
+    """Yield decoded frames from a subscriber connection until it closes."""
+    while True:
+        try:
+            (length,) = _LENGTH.unpack(await reader.readexactly(_LENGTH.size))
+            payload = await reader.readexactly(length)
+        except asyncio.IncompleteReadError:
+            return
+        yield decode(payload)
+
+
+class _Subscriber:
+    def __init__(self, writer: asyncio.StreamWriter, max_frames: int):
+        self.writer = writer
+        self.max_frames = max_frames
+        self.frames: typing.Deque[typing.Tuple[bool, bytes]] = collections.deque()
+        self.ready = asyncio.Event()
+        self.dropped = 0
+
+    def offer(self, frame: bytes, droppable: bool) -> None:
+        if len(self.frames) >= self.max_frames:
+            oldest = next((item for item in self.frames if item[0]), None)
+            if oldest is not None:
+                self.frames.remove(oldest)
+                self.dropped += 1
+            elif droppable:
+                # Only triggers are queued; they take priority over this chunk
+                self.dropped += 1
+                return
+        self.frames.append((droppable, frame))
+        self.ready.set()
+
+
+class DecisionServer:
+    """Asyncio TCP publisher of intention probabilities and triggers.
+
+    ``start`` runs the event loop on a daemon thread; ``publish`` and
+    ``publish_trigger`` are thread-safe and only schedule work on that loop.
+    ``max_frames`` bounds each subscriber's queue.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765, max_frames: int = 256, info: typing.Optional[dict] = None):
+        self.host = host
+        self.port = port
+        self.max_frames = max_frames
+        self.info = dict(info or {})
+        self.published = 0
+        self._subscribers: typing.Set[_Subscriber] = set()
+        self._loop: typing.Optional[asyncio.AbstractEventLoop] = None
+        self._server = None
+        self._thread: typing.Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._error: typing.Optional[Exception] = None
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    @property
+    def dropped(self) -> int:
+        return sum(s.dropped for s in list(self._subscribers))
+
+    def start(self) -> "DecisionServer":
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._serve, name="vrehab-decisions", daemon=True)
+        self._thread.start()
+        self._ready.wait(5.0)
+        if self._error is not None:
+            self._loop = None
+            raise self._error
+        return self
+
+    def stop(self, timeout: float = 1.0) -> None:
+        loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+
+    def _serve(self) -> None:
+        loop = self._loop
+        asyncio.set_event_loop(loop)
+        try:
+            self._server = loop.run_until_complete(asyncio.start_server(self._handle, self.host, self.port))
+        except OSError as e:
+            # Port in use or address unavailable: reported by start()
+            self._error = e
+            self._ready.set()
+            loop.close()
+            return
+        # Port 0 asks the OS for a free port
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            self._server.close()
+            tasks = asyncio.all_tasks(loop)
+            for task in tasks:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            loop.run_until_complete(self._server.wait_closed())
+            loop.close()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        subscriber = _Subscriber(writer, self.max_frames)
+        self._subscribers.add(subscriber)
+        try:
+            writer.write(encode_hello(self.info))
+            while True:
+                await subscriber.ready.wait()
+                subscriber.ready.clear()
+                while subscriber.frames:
+                    writer.write(subscriber.frames.popleft()[1])
+                    # Wait while this reader's socket buffer is full; frames queue up meanwhile
+                    await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._subscribers.discard(subscriber)
+            writer.close()
+
+    def _broadcast(self, frame: bytes, droppable: bool) -> None:
+        for subscriber in list(self._subscribers):
+            subscriber.offer(frame, droppable)
+
+    def _publish(self, timestamps: np.ndarray, scores: np.ndarray, counter: int) -> None:
+        self._broadcast(encode_probabilities(timestamps, probabilities(scores), counter), True)
+
+    def publish(self, timestamps: np.ndarray, scores: np.ndarray, counter: int) -> None:
+        """Send one chunk: LSL times, kernel scores (converted to probabilities) and the counter."""
+        if self._loop is not None and self._subscribers:
+            self.published += 1
+            self._loop.call_soon_threadsafe(self._publish, timestamps, scores, counter)
+
+    def publish_trigger(self, crossing: float, count: int) -> None:
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._broadcast, encode_trigger(crossing, count), False)
+
+
+class DecisionOutlet:
+    """Publish decisions as LSL streams: ``<name>`` (probability, counter) and ``<name>_Triggers`` markers."""
+
+    def __init__(self, name: str = "VRehab_Decisions", source_id: str = "vrehab-decisions"):
+        from pylsl import IRREGULAR_RATE, StreamInfo, StreamOutlet, cf_float32, cf_string
+
+        self._outlet = StreamOutlet(StreamInfo(name, "Decisions", 2, IRREGULAR_RATE, cf_float32, source_id))
+        self._markers = StreamOutlet(StreamInfo(f"{name}_Triggers", "Markers", 1, IRREGULAR_RATE, cf_string, f"{source_id}-triggers"))
+        self._rows = np.empty((0, 2), dtype=np.float32)
+
+    def publish(self, timestamps: np.ndarray, scores: np.ndarray, counter: int) -> None:
+        n = len(timestamps)
+        if len(self._rows) < n:
+            self._rows = np.empty((n, 2), dtype=np.float32)
+        rows = self._rows[:n]
+        rows[:, 0] = probabilities(scores)
+        rows[:, 1] = counter
+        self._outlet.push_chunk(rows, list(timestamps))
+
+    def publish_trigger(self, crossing: float, count: int) -> None:
+        self._markers.push_sample([f"trigger {count}"], crossing)
+
+    def stop(self) -> None:
+        self._outlet = self._markers = None
+
+
+async def _print_frames(host: str, port: int) -> None:
+    reader, writer = await asyncio.open_connection(host, port)
+    async for kind, value in read_frames(reader):
+        if kind == HELLO:
+            print("hello", value)
+        elif kind == PROBABILITIES:
+            timestamps, probs, counter = value
+            print(f"{len(probs):4d} samples  last t={timestamps[-1]:.3f}  p={probs[-1]:.3f}  counter={counter}")
+        elif kind == TRIGGER:
+            print(f"TRIGGER #{value[1]} at {value[0]:.3f}")
+    writer.close()
+
+
+def main(argv: typing.Optional[typing.List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Print the frames published by a VRehab decision server")
+    parser.add_argument("--connect", default="127.0.0.1:8765", help="host:port of the decision server")
+    args = parser.parse_args(argv)
+    host, _, port = args.connect.rpartition(":")
+    try:
+        asyncio.run(_print_frames(host or "127.0.0.1", int(port)))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""Pluggable robot and serial backends, including simulators for headless runs.
+
+``open_robot`` and ``open_serial`` pick a backend by name so the scripts can
+switch between hardware and simulation from the command line::
+
+    python gui-controlrobotwitheeg.py --robot sim
+    python eegwitharduino.py --arduino loopback
+"""
+import argparse
+import threading
+import time
+import typing
+
+ROBOT_BACKENDS = ("dobot", "sim")
+SERIAL_BACKENDS = ("serial", "loopback")
+
+
+class SimulatedDobot:
+    """Kinematic stand-in for ``pydobot.Dobot``.
+
+    Linear moves follow a trapezoidal speed profile (``velocity`` mm/s,
+    ``acceleration`` mm/s²), so ``move_to(wait=True)`` takes as long as the
+    real arm would at ``speed(100, 100)`` and ``pose()`` reports the
+    interpolated position while moving. The queued-command interface of
+    ``vrehab.robot.QueuedDobot`` is implemented natively: commands execute
+    back to back in simulated time and ``current_index`` is the index of the
+    last finished one.
+    """
+
+    def __init__(self, port: typing.Optional[str] = None, verbose: bool = False, velocity: float = 100.0,
+                 acceleration: float = 100.0, home: typing.Tuple[float, float, float, float] = (200.0, 0.0, 50.0, 0.0)):
+        self.port = port
+        self.verbose = verbose
+        self.velocity = velocity
+        self.acceleration = acceleration
+        self.moves = []
+        self._pose = tuple(float(v) for v in home)
+        self._lock = threading.Lock()
+        # (index, start, end, from_pose, to_pose or None for a pause)
+        self._queue = []
+        self._index = self._done = 0
+
+    def move_duration(self, start: typing.Sequence[float], end: typing.Sequence[float]) -> float:
+        distance = sum((b - a) ** 2 for a, b in zip(start[:3], end[:3])) ** 0.5
+        v, a = self.velocity, self.acceleration
+        if distance < v * v / a:
+            # Never reaches cruise speed: triangular profile
+            return 2.0 * (distance / a) ** 0.5
+        return distance / v + v / a
+
+    def _advance(self, now: float) -> None:
+        while self._queue and self._queue[0][2] <= now:
+            index, _, _, _, target = self._queue.pop(0)
+            self._done = index
+            if target is not None:
+                self._pose = target
+                self.moves.append(target)
+                if self.verbose:
+                    print("sim-dobot: x:%03.1f y:%03.1f z:%03.1f r:%03.1f" % target)
+
+    def _enqueue(self, target, duration: typing.Optional[float] = None) -> int:
+        with self._lock:
+            now = time.perf_counter()
+            self._advance(now)
+            start = max(now, self._queue[-1][2] if self._queue else 0.0)
+            origin = (self._queue[-1][4] or self._queue[-1][3]) if self._queue else self._pose
+            if duration is None:
+                duration = self.move_duration(origin, target)
+            self._index += 1
+            self._queue.append((self._index, start, start + duration, origin, target))
+            return self._index
+
+    def pose(self) -> typing.Tuple[float, ...]:
+        with self._lock:
+            now = time.perf_counter()
+            self._advance(now)
+            x, y, z, r = self._pose
+            if self._queue:
+                _, start, end, origin, target = self._queue[0]
+                if target is not None and start <= now < end:
+                    f = (now - start) / (end - start)
+                    x, y, z, r = (a + (b - a) * f for a, b in zip(origin, target))
+        return (x, y, z, r, 0.0, 0.0, 0.0, 0.0)
+
+    def move_to(self, x: float, y: float, z: float, r: float, wait: bool = False) -> None:
+        index = self.queue_move(x, y, z, r)
+        while wait and self.current_index() < index:
+            time.sleep(0.005)
+
+    def queue_move(self, x: float, y: float, z: float, r: float) -> int:
+        return self._enqueue((float(x), float(y), float(z), float(r)))
+
+    def queue_wait(self, ms: int) -> int:
+        return self._enqueue(None, ms / 1000.0)
+
+    def current_index(self) -> int:
+        with self._lock:
+            self._advance(time.perf_counter())
+            return self._done
+
+    def halt(self) -> None:
+        """Stop where the arm is now and drop the rest of the queue."""
+        x, y, z, r = self.pose()[:4]
+        with self._lock:
+            self._advance(time.perf_counter())
+            if self._queue:
+                self._done = self._queue[0][0]
+            self._pose = (x, y, z, r)
+            self._queue.clear()
+
+    def speed(self, velocity: float = 100.0, acceleration: float = 100.0) -> None:
+        self.velocity, self.acceleration = velocity, acceleration
+
+    def close(self) -> None:
+        pass
+
+
+class LoopbackArduino:
+    """``serial.Serial`` look-alike that acknowledges every write with an echo line.
+
+    Each ``write`` is answered with the written bytes (stripped, CRLF
+    terminated) after ``latency`` seconds, which is what the firmware's
+    acknowledgement looks like to the host.
+    """
+
+    def __init__(self, port: typing.Optional[str] = None, baudrate: int = 38400, timeout: typing.Optional[float] = 0.1,
+                 latency: float = 0.002):
+        self.port = port
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self.latency = latency
+        self.written = []
+        self.is_open = True
+        self._pending = []
+        self._cancelled = False
+        self._cond = threading.Condition()
+
+    @property
+    def in_waiting(self) -> int:
+        with self._cond:
+            now = time.perf_counter()
+            return sum(len(line) for due, line in self._pending if due <= now)
+
+    def write(self, data: bytes) -> int:
+        with self._cond:
+            self.written.append(bytes(data))
+            self._pending.append((time.perf_counter() + self.latency, bytes(data).strip() + b"\r\n"))
+            self._cond.notify_all()
+        return len(data)
+
+    def readline(self) -> bytes:
+        deadline = None if self.timeout is None else time.perf_counter() + self.timeout
+        with self._cond:
+            while True:
+                if self._cancelled:
+                    self._cancelled = False
+                    return b""
+                now = time.perf_counter()
+                if self._pending and self._pending[0][0] <= now:
+                    return self._pending.pop(0)[1]
+                wait = self._pending[0][0] - now if self._pending else None
+                if deadline is not None:
+                    if now >= deadline:
+                        return b""
+                    wait = min(wait, deadline - now) if wait is not None else deadline - now
+                self._cond.wait(wait)
+
+    def cancel_read(self) -> None:
+        """Make a pending (or the next) ``readline`` return empty, like ``serial.Serial.cancel_read``."""
+        with self._cond:
+            self._cancelled = True
+            self._cond.notify_all()
+
+    def read_all(self) -> bytes:
+        with self._cond:
+            now = time.perf_counter()
+            ready = [line for due, line in self._pending if due <= now]
+            self._pending = [(due, line) for due, line in self._pending if due > now]
+        return b"".join(ready)
+
+    def reset_input_buffer(self) -> None:
+        with self._cond:
+            self._pending.clear()
+
+    def close(self) -> None:
+        self.is_open = False
+
+
+def open_robot(backend: str = "dobot", port: typing.Optional[str] = None, verbose: bool = False):
+    """Connect to the arm with ``backend`` (one of ``ROBOT_BACKENDS``)."""
+    if backend == "sim":
+        return SimulatedDobot(port=port, verbose=verbose)
+    if backend == "dobot":
+        import pydobot
+
+        return pydobot.Dobot(port=port, verbose=verbose)
+    raise ValueError(f"Unknown robot backend {backend!r}; expected one of {ROBOT_BACKENDS}")
+
+
+def open_serial(backend: str = "serial", port: typing.Optional[str] = None, baudrate: int = 38400,
+                timeout: typing.Optional[float] = 0.1):
+    """Open the Arduino link with ``backend`` (one of ``SERIAL_BACKENDS``)."""
+    if backend == "loopback":
+        return LoopbackArduino(port=port, baudrate=baudrate, timeout=timeout)
+    if backend == "serial":
+        import serial
+
+        return serial.Serial(port=port, baudrate=baudrate, timeout=timeout)
+    raise ValueError(f"Unknown serial backend {backend!r}; expected one of {SERIAL_BACKENDS}")
+
+
+def add_device_arguments(parser: argparse.ArgumentParser, robot: bool = False, arduino: bool = False) -> None:
+    """Add the ``--robot``/``--arduino`` backend switches and ``--port`` to a script's parser."""
+    if robot:
+        parser.add_argument("--robot", choices=ROBOT_BACKENDS, default="dobot", help="robot backend (sim = simulated Dobot)")
+    if arduino:
+        parser.add_argument("--arduino", choices=SERIAL_BACKENDS, default="serial", help="Arduino backend (loopback = no hardware)")
+        parser.add_argument("--port", default="COM3", help="Arduino serial port")
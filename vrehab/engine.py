@@ -0,0 +1,613 @@
+"""Headless VRehab engine: connections, training and control without a UI.
+
+``VRehabEngine`` owns the EEG inlet, the robot, the model and the control
+pipeline. Front ends (the Tk GUI, the ``python -m vrehab.cli`` CLI) drive it
+through plain method calls and receive everything it has to say as
+``EngineEvent`` values from ``on_event``, which may be called from worker
+threads. scikit-learn, pandas and pydobot are only imported when training or
+connecting real hardware; stored models are loaded as NumPy-only artifacts
+(``vrehab.artifact``), so importing the engine and running control is cheap.
+Every worker thread (training, the control stages, the robot worker) runs
+under a ``CancelToken`` that is a child of ``shutdown``; its waits are
+bounded by ``CANCEL_POLL``, so stopping or closing never waits on a stalled
+stream or a moving arm.
+"""
+import threading
+import time
+import typing
+
+from vrehab.acquisition import ChunkedInlet
+from vrehab.adaptation import OnlineAdapter
+from vrehab.buffer import SampleBuffer
+from vrehab.cancel import CANCEL_POLL, Cancelled, CancelToken
+from vrehab.decisions import DecisionOutlet, DecisionServer
+from vrehab.devices import open_robot
+from vrehab.features import WindowFeatures, transform_frame
+from vrehab.health import HealthLimits, StreamHealth, StreamMonitor
+from vrehab.inference import LinearIntentKernel
+from vrehab.latency import LatencyTracker
+from vrehab.pipeline import ControlPipeline, ControlSnapshot, StageFailed
+from vrehab.recording import SessionRecorder
+from vrehab.registry import ModelStore
+from vrehab.robot import RobotEvent, RobotScheduler, Step, Trajectory, queued_device
+from vrehab.workflow import CALIBRATE, COOLDOWN, CalibrationStage, SessionMachine
+
+
+def _preload_training() -> None:
+    try:
+        import pandas  # noqa: F401
+
+        import vrehab.training  # noqa: F401
+    except ImportError:
+        pass
+
+
+class EngineEvent(typing.NamedTuple):
+    """``kind`` is one of "log", "training", "samples", "model", "trigger", "robot", "control"."""
+
+    kind: str
+    message: str = ""
+    value: typing.Any = None
+
+
+class VRehabEngine:
+    """Acquisition, training and control workflow shared by every front end.
+
+    Training records ``rest_s`` seconds of rest and ``move_s`` seconds of
+    imagined movement, selects and saves a model, and control runs the staged
+    ``ControlPipeline`` with every trigger sent to the robot scheduler. The
+    phases are tracked by ``machine`` (``vrehab.workflow.SessionMachine``),
+    the same state machine ``eegwitharduino.py`` runs; with ``cooldown_s``
+    decisions are ignored for that long after each trigger while the stream
+    keeps being read.
+    """
+
+    def __init__(
+        self,
+        robot_backend: str = "dobot",
+        subject: str = "anonymous",
+        stream_name: str = "AURA_Power",
+        model_store: typing.Optional[ModelStore] = None,
+        recordings: str = "recordings",
+        on_event: typing.Optional[typing.Callable[[EngineEvent], None]] = None,
+        stream_source: typing.Optional[str] = None,
+        executor=None,
+        name: typing.Optional[str] = None,
+    ):
+        # Station name when several sessions share one process
+        self.name = name
+        self.robot_backend = robot_backend
+        self.subject = subject
+        self.stream_name = stream_name
+        # LSL source_id, to tell apart several streams with the same name
+        self.stream_source = stream_source
+        # Shared process pool for model selection when several sessions run together
+        self.executor = executor
+        self.model_store = model_store if model_store is not None else ModelStore()
+        self.recordings = recordings
+        self.on_event = on_event
+
+        self.robot = None
+        self.robot_scheduler: typing.Optional[RobotScheduler] = None
+        self.brain_inlet = None
+        # LSL uid of the connected stream; unlike source_id it is never empty
+        self.stream_uid: typing.Optional[str] = None
+        self.lr_model = None
+        self.sc_x = None
+        self.model_meta = None
+        self.model_features = None
+        self.train_features = None
+        self.recorder: typing.Optional[SessionRecorder] = None
+        self.latency: typing.Optional[LatencyTracker] = None
+        self.control_pipeline: typing.Optional[ControlPipeline] = None
+        # DecisionServer or DecisionOutlet that VR scenes and other actuators subscribe to
+        self.decision_publisher = None
+        self.is_training = False
+        self.is_controlling = False
+        # Parent of every worker's cancel token; close() cancels it
+        self.shutdown = CancelToken()
+        self._training_cancel = CancelToken()
+        self.threshold = 700
+        self.rest_s = 30.0
+        self.move_s = 30.0
+        # Seconds after a trigger during which decisions are ignored (the stream keeps draining)
+        self.cooldown_s = 0.0
+        self.machine = SessionMachine(on_phase=self._phase_changed)
+        # Control pauses while the stream breaks these limits (see vrehab.health)
+        self.health_limits = HealthLimits()
+        # Chunked LSL reads: samples per pull and max seconds to wait for them
+        self.acquisition_config = {"chunk_size": 32, "max_latency": 0.02}
+        # Calibration gives up after this many failed reads in a row / seconds without a sample
+        self.collect_limits = {"max_errors": 50, "max_silence": 5.0}
+        # Sliding-window feature stage (samples per window / samples between windows)
+        self.feature_defaults = {"window": 128, "step": 16}
+        # Cross-validated C/solver search; the budget bounds how long the patient waits
+        self.selection_config = {"folds": 5, "gap": 128, "time_budget": 30.0}
+        self._training_thread: typing.Optional[threading.Thread] = None
+        self._cpu_done = 0.0
+
+    # =============== EVENTS ===============
+    def emit(self, kind: str, message: str = "", value: typing.Any = None) -> None:
+        if self.on_event:
+            self.on_event(EngineEvent(kind, message, value))
+
+    def log(self, message: str) -> None:
+        self.emit("log", message)
+
+    # =============== ROBOT ===============
+    def connect_robot(self, port: typing.Optional[str] = None) -> None:
+        """Open the arm with the configured backend; raises on failure."""
+        self.robot = open_robot(self.robot_backend, port=port, verbose=True)
+        # Every command to the arm goes through this one worker
+        self.robot_scheduler = RobotScheduler(queued_device(self.robot), on_event=self._robot_event, latency=self.latency,
+                                              cancel=self.shutdown).start()
+        if self.robot_backend == "sim":
+            self.log("Simulated robot connected")
+        else:
+            self.log(f"Robot connected to {port}")
+
+    def disconnect_robot(self) -> None:
+        if self.robot_scheduler:
+            self.robot_scheduler.stop()
+            self._cpu_done += self.robot_scheduler.cpu_time
+            self.robot_scheduler = None
+        if self.robot:
+            self.robot.close()
+            self.robot = None
+            self.log("Robot disconnected")
+
+    @staticmethod
+    def movement_plan(pose) -> typing.List[Step]:
+        """Trayectoria SIMPLE y SEGURA relativa a la posición actual"""
+        x, y, z, r = pose[:4]
+        return [
+            ("Moving forward", x, y + 15, z, r),
+            ("Moving right", x + 15, y + 15, z, r),
+            ("Moving up", x + 15, y + 15, z + 10, r),
+            ("Moving back", x, y + 15, z + 10, r),
+            ("Moving left", x - 15, y + 15, z + 10, r),
+            ("Moving down", x - 15, y + 15, z, r),
+            ("Moving forward again", x - 15, y, z, r),
+            ("Returning to start", x, y, z, r),
+        ]
+
+    @staticmethod
+    def home_plan(pose) -> typing.List[Step]:
+        """Subir primero, luego centrar en horizontal y finalmente bajar a la altura home"""
+        x, y, z, r = pose[:4]
+        safe_z = max(z + 20, 80)  # Subir al menos 20mm o llegar a 80mm
+        home_z = 60  # Altura home segura
+        return [
+            (f"Moving up to safe height: {safe_z:.1f}mm", x, y, safe_z, r),
+            ("Moving to center horizontally", 0, 0, safe_z, r),
+            (f"Moving to home height: {home_z:.1f}mm", 0, 0, home_z, 0),
+        ]
+
+    def execute_robot_movement(self, trigger_time: typing.Optional[float] = None) -> bool:
+        """Queue the movement sequence; False if the robot is missing or already moving."""
+        if not self.robot_scheduler:
+            self.log("Robot not connected")
+            return False
+        trajectory = Trajectory(
+            "movement",
+            self.movement_plan,
+            dwell_ms=500,  # Pausa entre movimientos, ejecutada por el propio robot
+            # En caso de error, regresar a posición segura
+            fallback=lambda pose: ("Safe position", pose[0], pose[1], pose[2] + 20, pose[3]),
+            trigger_time=trigger_time,
+        )
+        if self.robot_scheduler.submit(trajectory):
+            self.log("🎯 Safe movement sequence queued")
+            return True
+        self.log("Movement already in progress; trigger merged")
+        return False
+
+    def robot_home(self) -> None:
+        """Cancel pending movements and move to the safe home position."""
+        if not self.robot_scheduler:
+            self.log("Robot not connected")
+            return
+        self.robot_scheduler.cancel()
+        self.robot_scheduler.submit(Trajectory(
+            "home",
+            self.home_plan,
+            dwell_ms=1000,
+            # En caso de error, intentar posición de emergencia muy alta y segura
+            fallback=lambda pose: ("Emergency safe position", 0, 0, 100, 0),
+        ))
+        self.log("🏠 Moving robot to safe home position...")
+
+    def _robot_event(self, event: RobotEvent) -> None:
+        if event.status == "started":
+            self.log(f"🎯 {event.name.capitalize()} started ({event.steps} moves)")
+        elif event.status == "step":
+            self.log(f"🔄 Movement {event.step}/{event.steps} ({event.step / event.steps:.0%}): {event.description}")
+        elif event.status == "done":
+            self.log(f"🎉 {event.name.capitalize()} completed in {event.elapsed:.1f}s")
+        elif event.status == "cancelled":
+            self.log(f"⏹ {event.name.capitalize()} cancelled after {event.step}/{event.steps} moves")
+        elif event.status == "error":
+            self.log(f"❌ Robot {event.name} error: {event.error}; returning to safe position")
+        elif event.status == "dropped":
+            self.log(f"Robot busy; {event.name} dropped")
+        if event.status in ("done", "cancelled", "error"):
+            pipeline = self.control_pipeline
+            if pipeline:
+                pipeline.movement_finished()
+        self.emit("robot", event.status, event)
+
+    # =============== EEG ===============
+    def find_streams(self, prop: str = "type", value: str = "EEG", timeout: float = 2.0) -> list:
+        from pylsl import resolve_byprop
+
+        return resolve_byprop(prop, value, timeout=timeout)
+
+    def connect_eeg(self, info=None, timeout: float = 2.0) -> bool:
+        """Open ``info`` (a resolved ``StreamInfo``) or resolve ``stream_source``/``stream_name``."""
+        from pylsl import StreamInlet
+
+        if info is None:
+            self.log("Looking for EEG stream...")
+            if self.stream_source:
+                streams = self.find_streams("source_id", self.stream_source, timeout=timeout)
+            else:
+                streams = self.find_streams("name", self.stream_name, timeout=timeout)
+            if not streams:
+                self.log(f"EEG stream not found ({self.stream_source or self.stream_name})")
+                return False
+            if len(streams) > 1:
+                sources = ", ".join(st.source_id() or "?" for st in streams)
+                self.log(f"{len(streams)} streams named {self.stream_name} ({sources}); using the first, set a source id to choose")
+            info = streams[0]
+        self.stream_name = info.name()
+        self.stream_source = info.source_id() or None
+        self.stream_uid = info.uid()
+        self.brain_inlet = StreamInlet(info)
+        self.brain_inlet.open_stream()
+        self.log("EEG connected")
+        self.warm_start()
+        return True
+
+    def disconnect_eeg(self) -> None:
+        if self.brain_inlet:
+            self.brain_inlet.close_stream()
+            self.brain_inlet = None
+            self.stream_uid = None
+            self.log("EEG disconnected")
+
+    # =============== MODEL ===============
+    def warm_start(self, subject: typing.Optional[str] = None) -> bool:
+        """Load the newest stored model for ``subject`` that fits the connected stream."""
+        if self.is_training or self.is_controlling:
+            return False
+        if subject is not None:
+            self.subject = subject.strip() or "anonymous"
+        channel_count = self.brain_inlet.channel_count if self.brain_inlet else None
+        if self.model_meta and self.model_meta.get("subject") == self.subject and channel_count in (None, self.model_meta.get("channel_count")):
+            return True
+        try:
+            stored = self.model_store.load_latest(subject=self.subject, channel_count=channel_count, stream_name=self.stream_name,
+                                                    sklearn=False)
+        except Exception as e:
+            self.log(f"Model load error: {e}")
+            return False
+        if not stored:
+            # Drop a previously loaded model that no longer fits; keep an unsaved fresh one
+            if self.model_meta:
+                self.log(f"No stored model for '{self.subject}' on this stream; train a new one")
+                self.lr_model = self.sc_x = self.model_meta = self.model_features = None
+                self.emit("model", value=None)
+            return False
+        self.sc_x, self.lr_model, self.model_meta = stored.scaler, stored.model, stored.meta
+        self.model_features = stored.meta.get("features")
+        self.emit("model", value=stored.meta.get("accuracy"))
+        self.log(f"Loaded model for '{self.subject}' from {stored.path}")
+        return True
+
+    # =============== TRAINING ===============
+    def start_training(self, features: bool = False) -> bool:
+        """Run ``training_process`` on a background thread."""
+        if not self.brain_inlet or self.is_training:
+            return False
+        self.is_training = True
+        self._training_cancel = self.shutdown.child()
+        self.train_features = dict(self.feature_defaults) if features else None
+        self._training_thread = threading.Thread(target=self.training_process, name="vrehab-training", daemon=True)
+        self._training_thread.start()
+        return True
+
+    def stop_training(self) -> None:
+        self.is_training = False
+        self._training_cancel.cancel()
+
+    def wait_training(self, timeout: typing.Optional[float] = None) -> None:
+        if self._training_thread is not None:
+            self._training_thread.join(timeout)
+
+    def _phase_changed(self, phase: str, stage: typing.Optional[CalibrationStage]) -> None:
+        if phase == CALIBRATE and stage is not None:
+            self.emit("training", stage.message)
+        self.emit("phase", phase, stage)
+
+    def training_process(self) -> None:
+        start = time.thread_time()
+        machine = self.machine
+        try:
+            info = self.brain_inlet.info()
+            self.recorder = SessionRecorder(info.channel_count(), root=self.recordings, subject=self.subject,
+                                            stream_name=info.name(), srate=info.nominal_srate())
+            self.log(f"Recording session to {self.recorder.path}")
+            self.emit("training", "", 0)
+            machine.rest_s, machine.move_s = self.rest_s, self.move_s
+            rest, move = self.collect_training_data()
+            self._training_cancel.raise_if_cancelled()
+            self.emit("training", "Training model...", 75)
+            self.train_model(rest, move)
+            machine.training_finished(True)
+            self.emit("training", "Training completed", 100)
+        except Cancelled:
+            machine.stop()
+            self.log("Training stopped")
+        except Exception as e:
+            machine.stop()
+            self.log(f"Training error: {e}")
+        finally:
+            self.is_training = False
+            if self.recorder:
+                self.recorder.close()
+            self._cpu_done += time.thread_time() - start
+            self.emit("training", "", None)
+
+    def collect_training_data(self):
+        """Run the machine's calibration schedule; returns the rest and move tables."""
+        machine = self.machine
+        cancel = self._training_cancel
+        acquisition = ChunkedInlet(self.brain_inlet, **self.acquisition_config)
+        buffers = (SampleBuffer(acquisition.channel_count), SampleBuffer(acquisition.channel_count))
+        # Import pandas/scikit-learn while the patient is being recorded: an import
+        # cannot be interrupted, so it must not be what a stop has to wait for
+        threading.Thread(target=_preload_training, name="vrehab-preload", daemon=True).start()
+        max_errors, max_silence = self.collect_limits["max_errors"], self.collect_limits["max_silence"]
+        errors = 0
+        machine.begin_calibration(time.monotonic())
+        last_data = time.monotonic()
+        while machine.phase == CALIBRATE and not cancel.cancelled:
+            n = 0
+            try:
+                samples, timestamps = acquisition.read(cancel=cancel)
+                n = len(timestamps)
+                errors = 0
+            except Exception as e:
+                errors += 1
+                if errors == 1:
+                    self.log(f"Collect error: {e}")
+                if errors >= max_errors:
+                    raise RuntimeError(f"EEG stream failed {errors} reads in a row; calibration aborted") from e
+                cancel.wait(CANCEL_POLL)
+            # The schedule advances with the clock whether or not the read succeeded
+            now = time.monotonic()
+            label = machine.label(now)
+            if n:
+                last_data = now
+                if label is not None:
+                    buffers[label].extend(samples, timestamps, label)
+                    if self.recorder:
+                        self.recorder.write(samples, timestamps, label)
+            elif now - last_data > max_silence:
+                raise RuntimeError(f"No EEG data for {max_silence:.0f}s; calibration aborted")
+            # Progress update; the model fit takes the last quarter of the bar
+            self.emit("training", "", 0.75 * machine.progress(now))
+        cancel.raise_if_cancelled()
+        rest, move = (buffer.to_dataframe() for buffer in buffers)
+        self.emit("samples", value=len(rest) + len(move))
+        return rest, move
+
+    def train_model(self, rest_df, move_df) -> None:
+        import pandas as pd
+
+        from vrehab.training import select_intent_model
+
+        try:
+            selected = pd.concat([rest_df, move_df])
+            if self.train_features:
+                selected = transform_frame(selected, **self.train_features)
+                self.log(f"Windowed features: {len(selected)} windows of {self.train_features['window']} samples")
+            config = dict(self.selection_config)
+            if self.train_features:
+                # Overlapping windows: purge in window steps, not samples
+                config["gap"] = -(-self.train_features["window"] // self.train_features["step"])
+            result = select_intent_model(selected, executor=self.executor, cancel=self._training_cancel, **config)
+            self.sc_x, self.lr_model, acc = result.scaler, result.model, result.accuracy
+            for key, fold_scores in result.fold_scores.items():
+                self.log(f"  {key}: " + " ".join(f"{s * 100:.1f}" for s in fold_scores))
+            if result.complete:
+                self.log(f"Model selection: {result.params} in {result.elapsed:.1f}s")
+            else:
+                self.log(f"Model selection stopped at the {config['time_budget']:.0f}s budget; best so far {result.params or 'default'}")
+            self.model_features = self.train_features
+            self.save_model(acc)
+            self.emit("model", value=acc)
+            if acc is None:
+                self.log("Model trained without a cross-validated score")
+            else:
+                self.log(f"Model trained. Cross-validated accuracy {acc:.2f}%")
+        except Cancelled:
+            raise
+        except Exception as e:
+            self.log(f"Model error: {e}")
+            raise
+
+    def save_model(self, accuracy: typing.Optional[float]) -> None:
+        session = self.recorder.meta if self.recorder else {}
+        try:
+            path = self.model_store.save(
+                self.sc_x,
+                self.lr_model,
+                subject=self.subject,
+                channel_count=session.get("channel_count", self.brain_inlet.channel_count),
+                stream_name=session.get("stream_name", self.stream_name),
+                accuracy=accuracy,
+                channel_names=session.get("channel_names"),
+                extra={"session": self.recorder.path if self.recorder else None, "features": self.model_features},
+            )
+            self.model_meta = self.model_store.load(path, sklearn=False).meta
+            self.log(f"Model saved to {path}")
+        except Exception as e:
+            self.log(f"Model save error: {e}")
+
+    # =============== CONTROL ===============
+    @property
+    def cpu_time(self) -> float:
+        """CPU seconds used by this session's training, control and robot threads."""
+        total = self._cpu_done
+        if self.control_pipeline:
+            total += self.control_pipeline.cpu_time
+        if self.robot_scheduler:
+            total += self.robot_scheduler.cpu_time
+        return total
+
+    @property
+    def snapshot(self) -> ControlSnapshot:
+        pipeline = self.control_pipeline
+        return pipeline.snapshot if pipeline else ControlSnapshot()
+
+    def start_control(self, adapt_norm: bool = False, adapt_weights: bool = False) -> bool:
+        """Start the acquisition/inference/decision threads; False if there is no model or stream."""
+        if not self.lr_model or not self.brain_inlet or self.is_controlling or self.is_training:
+            return False
+        try:
+            acquisition = ChunkedInlet(self.brain_inlet, **self.acquisition_config)
+            kernel = LinearIntentKernel.from_sklearn(self.sc_x, self.lr_model, max_chunk=acquisition.chunk_size)
+            features = WindowFeatures(acquisition.channel_count, **self.model_features) if self.model_features else None
+            adapter = None
+            if adapt_norm or adapt_weights:
+                adapter = OnlineAdapter(kernel, self.sc_x, self.lr_model, adapt_weights=adapt_weights)
+            self.machine.cooldown = self.cooldown_s
+            self.machine.begin_control()
+            monitor = StreamMonitor(self.brain_inlet.info().nominal_srate(), self.health_limits, on_change=self._health_changed)
+            self.latency = LatencyTracker()
+            if self.robot_scheduler:
+                self.robot_scheduler.latency = self.latency
+            self.control_pipeline = ControlPipeline(
+                acquisition,
+                kernel,
+                threshold=lambda: int(self.threshold),
+                on_trigger=self.on_control_trigger,
+                on_error=self._control_error,
+                latency=self.latency,
+                features=features,
+                adapter=adapter,
+                publisher=self.decision_publisher,
+                machine=self.machine,
+                monitor=monitor,
+                cancel=self.shutdown,
+            )
+            # Samples queued while calibrating and fitting are stale; reading
+            # them first would also trip the backlog alert in the first window
+            acquisition.flush()
+            self.control_pipeline.start()
+        except Exception as e:
+            self.control_pipeline = None
+            self.log(f"Control error: {e}")
+            return False
+        self.is_controlling = True
+        self.emit("control", "started")
+        return True
+
+    @property
+    def stream_health(self) -> typing.Optional[StreamHealth]:
+        """Latest stream health measured during control, if any."""
+        pipeline = self.control_pipeline
+        return pipeline.monitor.health if pipeline and pipeline.monitor else None
+
+    def _health_changed(self, health: StreamHealth) -> None:
+        # Called from the acquisition thread; the decision thread pauses or resumes the machine
+        if health.ok:
+            self.log(f"EEG stream recovered ({health.rate:.0f} Hz); control resumes")
+        else:
+            self.log(f"EEG stream degraded: {', '.join(health.alerts)}; control paused")
+        self.emit("health", "ok" if health.ok else "degraded", health)
+
+    def _control_error(self, error: Exception) -> None:
+        # Called from a stage thread; a StageFailed means the pipeline has already stopped itself
+        self.log(f"Control error: {error}")
+        if isinstance(error, StageFailed) and self.is_controlling:
+            self.stop_control()
+
+    def serve_decisions(self, port: int = 8765, host: str = "127.0.0.1", lsl: bool = False) -> None:
+        """Publish probabilities and triggers over TCP (or as LSL streams with ``lsl``); applies from the next control start."""
+        self.stop_serving()
+        try:
+            if lsl:
+                name = f"VRehab_Decisions_{self.name}" if self.name else "VRehab_Decisions"
+                self.decision_publisher = DecisionOutlet(name, source_id=name.lower())
+                self.log(f"Publishing decisions as LSL stream {name}")
+            else:
+                info = {"subject": self.subject, "stream": self.stream_name, "threshold": int(self.threshold), "station": self.name}
+                self.decision_publisher = DecisionServer(host, port, info=info).start()
+                self.log(f"Publishing decisions on {host}:{self.decision_publisher.port}")
+        except Exception as e:
+            self.decision_publisher = None
+            self.log(f"Decision server error: {e}")
+
+    def stop_serving(self) -> None:
+        publisher, self.decision_publisher = self.decision_publisher, None
+        if publisher:
+            publisher.stop()
+
+    def stop_control(self) -> None:
+        self.is_controlling = False
+        if self.control_pipeline:
+            self.control_pipeline.stop()
+            self._cpu_done += self.control_pipeline.cpu_time
+            adapter = self.control_pipeline.adapter
+            if adapter:
+                stats = adapter.stats
+                self.log(
+                    f"Adaptation: {stats.updates} updates, {stats.rejected} rejected chunks, {stats.rollbacks} rollbacks, "
+                    f"mean shift {stats.mean_shift:.2f} sd, weight drift {stats.weight_drift:.1%}"
+                )
+            self.control_pipeline = None
+        self.machine.stop()
+        if self.latency:
+            self.export_latency_report()
+        self.emit("control", "stopped")
+        self.log("Control stopped")
+
+    def reset_adaptation(self) -> None:
+        adapter = self.control_pipeline.adapter if self.control_pipeline else None
+        if adapter is None:
+            self.log("Adaptation is not running")
+            return
+        adapter.rollback()
+        self.log("Adaptation reset to the trained model")
+
+    def export_latency_report(self) -> None:
+        path = time.strftime(f"latency_{self.name}_%Y%m%d_%H%M%S.json" if self.name else "latency_%Y%m%d_%H%M%S.json")
+        try:
+            self.latency.export(path)
+            self.log(f"Latency report saved to {path}")
+        except Exception as e:
+            self.log(f"Latency export error: {e}")
+
+    def on_control_trigger(self, trigger_time: float) -> None:
+        """Called from the decision thread when the counter reaches the threshold."""
+        # Non-blocking: the robot worker owns the arm and coalesces repeated triggers
+        if self.robot_scheduler and self.execute_robot_movement(trigger_time):
+            self.log("Robot movement command sent")
+        if self.machine.phase == COOLDOWN:
+            self.log(f"Cooldown {self.machine.cooldown:.0f}s")
+        self.emit("trigger", value=trigger_time)
+
+    def close(self) -> None:
+        """Stop control and training and release the robot and the stream."""
+        # Wake every worker at once; the stops below then only join them
+        self.shutdown.cancel()
+        self.stop_training()
+        if self.is_controlling:
+            self.stop_control()
+        self.wait_training(1.0)
+        self.disconnect_robot()
+        self.disconnect_eeg()
+        self.stop_serving()
+        self.shutdown = CancelToken()
@@ -0,0 +1,110 @@
+"""Sliding-window feature extraction shared by training and live control."""
+import typing
+
+import numpy as np
+
+
+class WindowFeatures:
+    """Per-channel features over overlapping windows, updated chunk by chunk.
+
+    A feature row is emitted every ``step`` samples once ``window`` samples
+    have been seen. Each row holds, per channel, the window mean, variance
+    and log-power (log of the mean square), followed by the ratios of
+    adjacent channels' means. Running prefix sums of ``x`` and ``x**2`` are
+    kept for the last ``window`` samples only, so a chunk of ``n`` samples
+    costs O(n) whatever the window length.
+    """
+
+    def __init__(self, channel_count: int, window: int = 128, step: int = 16, eps: float = 1e-12):
+        if window < 1 or step < 1:
+            raise ValueError("window and step must be positive")
+        self.channel_count = channel_count
+        self.window = window
+        self.step = step
+        self.eps = eps
+        self.feature_count = 3 * channel_count + max(channel_count - 1, 0)
+        self.reset()
+
+    @property
+    def config(self) -> dict:
+        return {"window": self.window, "step": self.step}
+
+    def reset(self) -> None:
+        self._seen = 0
+        self._ref = None
+        # Ring of prefix sums: slot k % window holds the sums after k samples
+        self._p1 = np.zeros((self.window, self.channel_count))
+        self._p2 = np.zeros((self.window, self.channel_count))
+
+    def transform(self, chunk: np.ndarray) -> typing.Tuple[np.ndarray, np.ndarray]:
+        """Return ``(features, ends)``: one row per completed window and its last sample's index in ``chunk``."""
+        n = len(chunk)
+        if n == 0:
+            return np.empty((0, self.feature_count)), np.empty(0, dtype=np.intp)
+        x = np.asarray(chunk, dtype=np.float64)
+        if self._ref is None:
+            # Sums are taken relative to the first sample to keep E[x^2] - E[x]^2 well conditioned
+            self._ref = x[0].copy()
+        x = x - self._ref
+        n0 = self._seen
+        w = self.window
+        last1 = self._p1[n0 % w]
+        last2 = self._p2[n0 % w]
+        c1 = np.cumsum(x, axis=0)
+        c1 += last1
+        c2 = np.cumsum(x * x, axis=0)
+        c2 += last2
+
+        # Prefix index after each sample of the chunk, and which of them close a window
+        k = np.arange(n0 + 1, n0 + n + 1)
+        ends = np.nonzero((k >= w) & (k % self.step == 0))[0]
+        if len(ends):
+            start = k[ends] - w
+            in_chunk = start > n0
+            s1 = c1[ends].copy()
+            s2 = c2[ends].copy()
+            s1[in_chunk] -= c1[start[in_chunk] - n0 - 1]
+            s2[in_chunk] -= c2[start[in_chunk] - n0 - 1]
+            s1[~in_chunk] -= self._p1[start[~in_chunk] % w]
+            s2[~in_chunk] -= self._p2[start[~in_chunk] % w]
+            features = self._features(s1 / w, s2 / w)
+        else:
+            features = np.empty((0, self.feature_count))
+
+        keep = min(n, w)
+        slots = k[-keep:] % w
+        self._p1[slots] = c1[-keep:]
+        self._p2[slots] = c2[-keep:]
+        self._seen = n0 + n
+        return features, ends
+
+    def _features(self, shifted_mean: np.ndarray, shifted_sq: np.ndarray) -> np.ndarray:
+        var = np.maximum(shifted_sq - shifted_mean * shifted_mean, 0.0)
+        mean = shifted_mean + self._ref
+        parts = [mean, var, np.log(var + mean * mean + self.eps)]
+        if self.channel_count > 1:
+            parts.append(mean[:, :-1] / np.where(np.abs(mean[:, 1:]) < self.eps, self.eps, mean[:, 1:]))
+        return np.hstack(parts)
+
+
+def transform_frame(frame, window: int, step: int, label_column: str = "Event"):
+    """Windowed features of a rest/move table, keeping each window's label.
+
+    Every contiguous run of one label is transformed separately, so no window
+    mixes rest and move samples.
+    """
+    import pandas as pd
+
+    values = frame.drop(columns=label_column).values
+    labels = frame[label_column].values
+    blocks = []
+    out_labels = []
+    starts = np.concatenate(([0], np.nonzero(np.diff(labels))[0] + 1, [len(labels)]))
+    for a, b in zip(starts[:-1], starts[1:]):
+        extractor = WindowFeatures(values.shape[1], window=window, step=step)
+        features, _ = extractor.transform(values[a:b])
+        blocks.append(features)
+        out_labels.append(np.full(len(features), labels[a]))
+    result = pd.DataFrame(np.vstack(blocks))
+    result[label_column] = np.concatenate(out_labels).astype(np.int64)
+    return result
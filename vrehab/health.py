@@ -0,0 +1,144 @@
+"""Stream quality monitoring from LSL timestamps."""
+import collections
+import typing
+
+import numpy as np
+
+
+class HealthLimits(typing.NamedTuple):
+    # Effective rate below this fraction of the nominal rate is an alert
+    min_rate: float = 0.9
+    # Standard deviation of inter-sample intervals, in nominal sample periods
+    max_jitter: float = 0.5
+    # Longest silence between samples (or since the last one), seconds
+    max_gap: float = 0.25
+    # Age of the newest sample when it was read, seconds
+    max_backlog: float = 0.5
+    # Drift of the LSL clock offset, seconds per second
+    max_drift: float = 1e-3
+
+
+class StreamHealth(typing.NamedTuple):
+    rate: float
+    nominal: float
+    jitter: float
+    max_gap: float
+    gaps: int
+    backlog: float
+    offset: float
+    drift: float
+    alerts: typing.Tuple[str, ...] = ()
+
+    @property
+    def ok(self) -> bool:
+        return not self.alerts
+
+
+class StreamMonitor:
+    """Track effective rate, jitter, gaps, backlog and clock drift of one stream.
+
+    ``update`` is called with every chunk the acquisition stage reads (also
+    empty ones) and only accumulates a few sums over the chunk's
+    timestamps. Once per ``window`` seconds the sums are turned into a
+    ``StreamHealth`` and reset; a stall longer than ``max_gap`` is caught
+    on the next call without waiting for the window. ``on_change``
+    receives the new ``StreamHealth`` whenever the stream goes from healthy
+    to unhealthy or back. Irregular streams (nominal rate 0) skip the rate
+    and jitter checks.
+    """
+
+    def __init__(self, nominal_srate: float, limits: typing.Optional[HealthLimits] = None, window: float = 2.0,
+                 on_change: typing.Optional[typing.Callable[[StreamHealth], None]] = None):
+        self.nominal = float(nominal_srate)
+        self.limits = limits or HealthLimits()
+        self.window = window
+        self.on_change = on_change
+        self.health: typing.Optional[StreamHealth] = None
+        self.healthy = True
+        self._offsets: typing.Deque[typing.Tuple[float, float]] = collections.deque(maxlen=16)
+        self._last_ts: typing.Optional[float] = None
+        self._last_read = None
+        self._reset(None)
+
+    def _reset(self, now: typing.Optional[float]) -> None:
+        self._window_start = now
+        self._count = 0
+        self._sum_dt = 0.0
+        self._sum_dt2 = 0.0
+        self._intervals = 0
+        self._max_dt = 0.0
+        self._gaps = 0
+        self._backlog = 0.0
+
+    def update(self, timestamps: np.ndarray, offset: float, now: float) -> None:
+        """Account for one read; ``now`` is the local LSL clock at the read."""
+        if self._window_start is None:
+            self._reset(now)
+        if not self._offsets or self._offsets[-1][1] != offset:
+            self._offsets.append((now, offset))
+        n = len(timestamps)
+        if n:
+            if self._last_ts is not None:
+                first = timestamps[0] - self._last_ts
+                dt = np.diff(timestamps) if n > 1 else None
+                self._add_intervals(first, dt)
+            elif n > 1:
+                self._add_intervals(None, np.diff(timestamps))
+            self._last_ts = float(timestamps[-1])
+            self._last_read = now
+            self._count += n
+            self._backlog = max(self._backlog, now - (self._last_ts + offset))
+        stalled = self._last_read is not None and now - self._last_read > self.limits.max_gap
+        if now - self._window_start >= self.window or (stalled and self.healthy):
+            self._evaluate(now, offset)
+
+    def _add_intervals(self, first: typing.Optional[float], dt: typing.Optional[np.ndarray]) -> None:
+        gap = self.limits.max_gap
+        if first is not None:
+            self._sum_dt += first
+            self._sum_dt2 += first * first
+            self._intervals += 1
+            self._max_dt = max(self._max_dt, first)
+            self._gaps += first > gap
+        if dt is not None and len(dt):
+            self._sum_dt += float(dt.sum())
+            self._sum_dt2 += float(np.dot(dt, dt))
+            self._intervals += len(dt)
+            longest = float(dt.max())
+            if longest > self._max_dt:
+                self._max_dt = longest
+            if longest > gap:
+                self._gaps += int(np.count_nonzero(dt > gap))
+
+    def _evaluate(self, now: float, offset: float) -> None:
+        limits = self.limits
+        elapsed = max(now - self._window_start, 1e-9)
+        rate = self._count / elapsed
+        jitter = 0.0
+        if self._intervals > 1:
+            mean = self._sum_dt / self._intervals
+            jitter = max(self._sum_dt2 / self._intervals - mean * mean, 0.0) ** 0.5
+        silence = now - self._last_read if self._last_read is not None else elapsed
+        max_gap = max(self._max_dt, silence)
+        drift = 0.0
+        if len(self._offsets) > 1 and self._offsets[-1][0] > self._offsets[0][0]:
+            (t0, o0), (t1, o1) = self._offsets[0], self._offsets[-1]
+            drift = (o1 - o0) / (t1 - t0)
+
+        alerts = []
+        if self.nominal > 0 and rate < limits.min_rate * self.nominal:
+            alerts.append(f"rate {rate:.0f}/{self.nominal:.0f} Hz")
+        if self.nominal > 0 and jitter > limits.max_jitter / self.nominal:
+            alerts.append(f"jitter {jitter * 1000:.1f} ms")
+        if max_gap > limits.max_gap:
+            alerts.append(f"gap {max_gap:.2f} s")
+        if self._backlog > limits.max_backlog:
+            alerts.append(f"backlog {self._backlog:.2f} s")
+        if abs(drift) > limits.max_drift:
+            alerts.append(f"clock drift {drift * 1000:.2f} ms/s")
+        self.health = StreamHealth(rate, self.nominal, float(jitter), float(max_gap), int(self._gaps), self._backlog, offset, drift, tuple(alerts))
+        self._reset(now)
+        if self.health.ok != self.healthy:
+            self.healthy = self.health.ok
+            if self.on_change:
+                self.on_change(self.health)
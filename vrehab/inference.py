@@ -0,0 +1,81 @@
+"""Batched linear inference for the binary intention classifier."""
+import typing
+
+import numpy as np
+
+
+def fold_scaler(coef: np.ndarray, intercept: float, mean: typing.Optional[np.ndarray], scale: typing.Optional[np.ndarray]) -> typing.Tuple[np.ndarray, float]:
+    """Fold ``z = (x - mean) / scale`` into logistic weights; returns ``(weights, bias)`` on raw ``x``."""
+    weights = np.asarray(coef, dtype=np.float64)
+    bias = float(intercept)
+    if scale is not None:
+        weights = weights / scale
+    if mean is not None:
+        bias -= float(np.dot(weights, mean))
+    return weights, bias
+
+
+class LinearIntentKernel:
+    """Binary logistic regression with its ``StandardScaler`` folded in.
+
+    With ``z = (x - mean) / scale`` the logistic score ``w.z + b`` equals
+    ``x.(w / scale) + (b - w.(mean / scale))``, so scaling and classification
+    collapse into one dot product plus a threshold at zero, the same rule
+    ``LogisticRegression.predict`` applies. Whole chunks are scored at once
+    into reused buffers; results are views valid until the next call.
+    """
+
+    def __init__(self, weights: np.ndarray, bias: float, classes: typing.Sequence = (0, 1), max_chunk: int = 256):
+        self.weights = np.ascontiguousarray(weights, dtype=np.float64).ravel()
+        self.bias = float(bias)
+        self.classes = np.asarray(classes)
+        self.last_scores = np.empty(0)
+        if len(self.classes) != 2:
+            raise ValueError("LinearIntentKernel only supports binary classifiers")
+        self._allocate(max_chunk)
+
+    @classmethod
+    def from_sklearn(cls, scaler, model, max_chunk: int = 256) -> "LinearIntentKernel":
+        """Fold a fitted ``StandardScaler`` (or ``None``) into a binary ``LogisticRegression``."""
+        coef = np.asarray(model.coef_, dtype=np.float64)
+        if coef.shape[0] != 1:
+            raise ValueError("LinearIntentKernel only supports binary classifiers")
+        mean = scale = None
+        if scaler is not None:
+            scale = getattr(scaler, "scale_", None)
+            if getattr(scaler, "with_mean", True):
+                mean = getattr(scaler, "mean_", None)
+        weights, bias = fold_scaler(coef[0], model.intercept_[0], mean, scale)
+        return cls(weights, bias, model.classes_, max_chunk=max_chunk)
+
+    def set_params(self, weights: np.ndarray, bias: float) -> None:
+        """Swap in new folded weights, e.g. after online adaptation."""
+        self.weights = np.ascontiguousarray(weights, dtype=np.float64).ravel()
+        self.bias = float(bias)
+
+    def _allocate(self, size: int) -> None:
+        self._scores = np.empty(size, dtype=np.float64)
+        self._positive = np.empty(size, dtype=bool)
+        self._decisions = np.empty(size, dtype=self.classes.dtype)
+
+    def decision_function(self, samples: np.ndarray) -> np.ndarray:
+        """Logistic scores (log-odds of ``classes[1]``) for a ``(n, channels)`` chunk."""
+        n = len(samples)
+        if n > len(self._scores):
+            self._allocate(n)
+        scores = self._scores[:n]
+        np.matmul(samples, self.weights, out=scores)
+        scores += self.bias
+        self.last_scores = scores
+        return scores
+
+    def predict(self, samples: np.ndarray) -> np.ndarray:
+        """Class label for every sample in a ``(n, channels)`` chunk."""
+        scores = self.decision_function(samples)
+        n = len(scores)
+        positive = self._positive[:n]
+        decisions = self._decisions[:n]
+        np.greater(scores, 0.0, out=positive)
+        decisions.fill(self.classes[0])
+        np.copyto(decisions, self.classes[1], where=positive)
+        return decisions
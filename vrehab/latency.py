@@ -0,0 +1,105 @@
+"""Low-overhead latency histograms on the LSL clock."""
+import json
+import math
+import typing
+
+import numpy as np
+
+STAGES = ("acquisition", "inference", "decision", "trigger", "dispatch")
+
+
+class LatencyHistogram:
+    """Log-spaced histogram of durations in seconds.
+
+    Recording is a bucket increment, so it is cheap enough for the hot path;
+    percentiles are read back as the upper edge of the matching bucket
+    (about 12% resolution with the default 20 buckets per decade).
+    """
+
+    def __init__(self, min_s: float = 1e-5, max_s: float = 10.0, bins_per_decade: int = 20):
+        self._log_min = math.log10(min_s)
+        self._per_decade = bins_per_decade
+        n = int(math.ceil((math.log10(max_s) - self._log_min) * bins_per_decade))
+        # Bucket 0 collects everything below min_s, the last one everything above max_s
+        self.edges = np.concatenate(([min_s], 10 ** (self._log_min + np.arange(1, n + 1) / bins_per_decade), [np.inf]))
+        self.counts = np.zeros(n + 2, dtype=np.int64)
+
+    def _index(self, seconds: np.ndarray) -> np.ndarray:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            idx = np.ceil((np.log10(seconds) - self._log_min) * self._per_decade)
+        return np.clip(np.nan_to_num(idx, nan=0.0, neginf=0.0), 0, len(self.counts) - 1).astype(np.intp)
+
+    def record(self, seconds: float) -> None:
+        if seconds <= 0:
+            self.counts[0] += 1
+            return
+        i = int(math.ceil((math.log10(seconds) - self._log_min) * self._per_decade))
+        self.counts[min(max(i, 0), len(self.counts) - 1)] += 1
+
+    def record_many(self, seconds: np.ndarray) -> None:
+        if len(seconds):
+            self.counts += np.bincount(self._index(np.asarray(seconds, dtype=np.float64)), minlength=len(self.counts))
+
+    @property
+    def count(self) -> int:
+        return int(self.counts.sum())
+
+    def percentile(self, p: float) -> float:
+        """Upper bound (seconds) of the ``p``-th percentile, or NaN when empty."""
+        total = self.count
+        if total == 0:
+            return float("nan")
+        i = int(np.searchsorted(np.cumsum(self.counts), p / 100.0 * total))
+        return float(self.edges[min(i, len(self.edges) - 1)])
+
+    def reset(self) -> None:
+        self.counts[:] = 0
+
+
+class LatencyTracker:
+    """Per-stage latency histograms for the control loop.
+
+    Stages, all measured with the LSL clock (``local_clock``):
+    ``acquisition`` sample timestamp (corrected with ``time_correction``) to
+    chunk read, ``inference`` read to scores ready, ``decision`` scores ready
+    to counter updated, ``trigger`` sample timestamp to threshold crossing,
+    and ``dispatch`` threshold crossing to the robot command starting.
+    """
+
+    def __init__(self, clock: typing.Optional[typing.Callable[[], float]] = None):
+        if clock is None:
+            from pylsl import local_clock as clock
+        self.clock = clock
+        self.stages = {name: LatencyHistogram() for name in STAGES}
+
+    def record(self, stage: str, seconds: float) -> None:
+        self.stages[stage].record(seconds)
+
+    def record_many(self, stage: str, seconds: np.ndarray) -> None:
+        self.stages[stage].record_many(seconds)
+
+    def summary(self) -> dict:
+        """``{stage: {"count", "p50", "p95", "p99"}}``; percentiles in ms, ``None`` when empty."""
+        out = {}
+        for name, hist in self.stages.items():
+            count = hist.count
+            out[name] = {"count": count}
+            for p in (50, 95, 99):
+                out[name][f"p{p}"] = hist.percentile(p) * 1000.0 if count else None
+        return out
+
+    def format_summary(self, stage: str) -> str:
+        s = self.summary()[stage]
+        if not s["count"]:
+            return f"{stage}: —"
+        return f"{stage}: p50 {s['p50']:.1f} / p95 {s['p95']:.1f} / p99 {s['p99']:.1f} ms"
+
+    def export(self, path: str) -> None:
+        """Write the summary and raw bucket counts as JSON."""
+        report = {
+            "summary_ms": self.summary(),
+            "edges_s": [e if math.isfinite(e) else None for e in self.stages[STAGES[0]].edges.tolist()],
+            "counts": {name: hist.counts.tolist() for name, hist in self.stages.items()},
+        }
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,267 @@
+"""Staged control pipeline: acquisition -> inference -> decision."""
+import queue
+import threading
+import time
+import typing
+
+from vrehab.cancel import CancelToken
+from vrehab.latency import LatencyTracker
+# LeakyCounter moved to vrehab.workflow and is re-exported here for existing imports
+from vrehab.workflow import COOLDOWN, CONTROL, IDLE, PAUSED, LeakyCounter, SessionMachine  # noqa: F401
+
+
+class ControlSnapshot(typing.NamedTuple):
+    counter: int = 0
+    intention: int = 0
+    samples: int = 0
+    triggers: int = 0
+    dropped: int = 0
+    movements: int = 0
+    phase: str = IDLE
+
+
+class StageFailed(RuntimeError):
+    """A pipeline stage kept failing the same way and the pipeline stopped itself."""
+
+
+class ControlPipeline:
+    """Run acquisition, inference and the counter decision on separate threads.
+
+    Stages are joined by bounded queues; when a queue is full the chunk is
+    dropped and counted rather than stalling the LSL reader. The decision
+    stage publishes an immutable ``ControlSnapshot`` after every chunk, which
+    the UI can poll at its own rate without locking. ``on_trigger`` receives
+    the LSL-clock time of the threshold crossing; per-stage timings go to
+    ``latency``. With a ``WindowFeatures`` stage the classifier scores one
+    feature row per window step instead of every raw sample. An
+    ``OnlineAdapter`` is updated on the inference thread after each chunk has
+    been handed on; if it raises it is disabled and control continues with
+    the last good weights. The counter belongs to a ``SessionMachine`` (a
+    private one with no cooldown unless given), whose phase is reported in
+    the snapshot. With a ``StreamMonitor`` the acquisition stage feeds it
+    every read and the decision stage pauses the machine while the stream
+    is unhealthy. A ``publisher`` (``vrehab.decisions``) receives the
+    scores, counter and trigger times from the decision thread.
+
+    Each run gets a ``CancelToken`` (a child of ``cancel`` when given, so the
+    owner can stop every worker at once). ``stop`` cancels it, which also
+    wakes the stages blocked on their queues, so all three threads exit
+    within one ``CANCEL_POLL`` slice even if the stream has died.
+
+    A stage that raises is retried after a backoff that doubles from
+    ``retry_delay`` up to ``max_retry_delay``; ``on_error`` hears about each
+    error once per run of identical failures, not on every retry. After
+    ``max_failures`` identical failures in a row (e.g. a lost stream) the
+    pipeline reports a ``StageFailed`` to ``on_error`` and stops.
+    """
+
+    def __init__(
+        self,
+        acquisition,
+        kernel,
+        threshold: typing.Callable[[], int],
+        on_trigger: typing.Callable[[float], None],
+        on_error: typing.Optional[typing.Callable[[Exception], None]] = None,
+        queue_size: int = 64,
+        latency: typing.Optional[LatencyTracker] = None,
+        features=None,
+        adapter=None,
+        publisher=None,
+        machine: typing.Optional[SessionMachine] = None,
+        monitor=None,
+        cancel: typing.Optional[CancelToken] = None,
+        retry_delay: float = 0.01,
+        max_retry_delay: float = 0.5,
+        max_failures: int = 20,
+    ):
+        self.acquisition = acquisition
+        self.features = features
+        self.adapter = adapter
+        self.publisher = publisher
+        self.latency = latency if latency is not None else LatencyTracker()
+        self.kernel = kernel
+        self.threshold = threshold
+        self.on_trigger = on_trigger
+        self.on_error = on_error
+        self.machine = machine if machine is not None else SessionMachine(threshold=threshold())
+        self.counter = self.machine.counter
+        self.monitor = monitor
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.max_failures = max_failures
+        self.snapshot = ControlSnapshot()
+        self._raw = queue.Queue(maxsize=queue_size)
+        self._decisions = queue.Queue(maxsize=queue_size)
+        self._parent = cancel
+        self._cancel = CancelToken()
+        self._threads = []
+        self._dropped = 0
+        self._movements = 0
+        self._cpu = {}
+
+    def start(self) -> None:
+        self._cancel = CancelToken(self._parent)
+        self._cancel.on_cancel(self._wake)
+        if self.machine.phase not in (CONTROL, COOLDOWN):
+            self.machine.begin_control()
+        self._threads = [
+            threading.Thread(target=self._run, args=(self._acquire,), name="vrehab-acquisition", daemon=True),
+            threading.Thread(target=self._run, args=(self._infer,), name="vrehab-inference", daemon=True),
+            threading.Thread(target=self._run, args=(self._decide,), name="vrehab-decision", daemon=True),
+        ]
+        for t in self._threads:
+            t.start()
+
+    def stop(self, timeout: float = 1.0) -> None:
+        self._cancel.cancel()
+        for t in self._threads:
+            if t is not threading.current_thread():
+                t.join(timeout)
+        self._threads = []
+
+    def _wake(self) -> None:
+        # Stages blocked on an empty queue return at once instead of at their timeout
+        for q in (self._raw, self._decisions):
+            try:
+                q.put_nowait(None)
+            except queue.Full:
+                pass
+
+    @property
+    def dropped(self) -> int:
+        return self._dropped
+
+    def movement_finished(self) -> None:
+        """Report that the trajectory started by a trigger has finished; shows up in the next snapshot."""
+        self._movements += 1
+
+    @property
+    def running(self) -> bool:
+        return any(t.is_alive() for t in self._threads)
+
+    @property
+    def cpu_time(self) -> float:
+        """CPU seconds spent by the stage threads so far (for per-session accounting)."""
+        return sum(self._cpu.values())
+
+    def _run(self, stage: typing.Callable[[], None]) -> None:
+        name = threading.current_thread().name
+        start = time.thread_time()
+        cancel = self._cancel
+        failures = 0
+        last = None
+        while not cancel.cancelled:
+            try:
+                stage()
+                failures = 0
+                last = None
+            except Exception as e:
+                error = (type(e), str(e))
+                failures = failures + 1 if error == last else 1
+                last = error
+                if failures >= self.max_failures:
+                    self._report(StageFailed(f"{name} stopped after {failures} identical errors: {e}"))
+                    cancel.cancel()
+                elif failures == 1:
+                    self._report(e)
+                cancel.wait(min(self.retry_delay * 2 ** (failures - 1), self.max_retry_delay))
+            self._cpu[name] = time.thread_time() - start
+
+    def _report(self, error: Exception) -> None:
+        if self.on_error:
+            self.on_error(error)
+
+    def _put(self, q: queue.Queue, item, n: int) -> None:
+        try:
+            q.put_nowait(item)
+        except queue.Full:
+            self._dropped += n
+
+    def _acquire(self) -> None:
+        cancel = self._cancel
+        samples, timestamps = self.acquisition.read(cancel=cancel)
+        monitor = self.monitor
+        if len(timestamps):
+            read_time = self.latency.clock()
+            offset = self.acquisition.clock_offset(cancel=cancel)
+            self.latency.record_many("acquisition", read_time - (timestamps + offset))
+            # The reader reuses its buffers, so hand off copies
+            self._put(self._raw, (samples.copy(), timestamps.copy(), offset, read_time), len(timestamps))
+            if monitor is not None:
+                monitor.update(timestamps, offset, read_time)
+        elif monitor is not None:
+            # Empty reads still count, so a stalled stream is noticed
+            monitor.update(timestamps, self.acquisition.clock_offset(cancel=cancel), self.latency.clock())
+
+    def _infer(self) -> None:
+        try:
+            item = self._raw.get(timeout=0.05)
+        except queue.Empty:
+            return
+        if item is None:
+            return
+        samples, timestamps, offset, read_time = item
+        n = len(timestamps)
+        if self.features is not None:
+            samples, ends = self.features.transform(samples)
+            timestamps = timestamps[ends]
+        intentions = self.kernel.predict(samples).copy()
+        scores = self.kernel.last_scores.copy() if self.publisher is not None else None
+        scored_time = self.latency.clock()
+        self.latency.record("inference", scored_time - read_time)
+        self._put(self._decisions, (intentions, scores, timestamps, offset, scored_time, n), n)
+        adapter = self.adapter
+        if adapter is not None and adapter.enabled:
+            try:
+                adapter.update(samples, self.kernel.last_scores)
+            except Exception as e:
+                adapter.enabled = False
+                if self.on_error:
+                    self.on_error(e)
+
+    def _check_health(self) -> None:
+        machine = self.machine
+        healthy = self.monitor.healthy
+        if not healthy and machine.phase in (CONTROL, COOLDOWN):
+            machine.pause()
+        elif healthy and machine.phase == PAUSED:
+            machine.resume()
+        else:
+            return
+        self.snapshot = self.snapshot._replace(phase=machine.phase, counter=machine.counter.value)
+
+    def _decide(self) -> None:
+        if self.monitor is not None:
+            self._check_health()
+        try:
+            item = self._decisions.get(timeout=0.05)
+        except queue.Empty:
+            return
+        if item is None:
+            return
+        intentions, scores, timestamps, offset, scored_time, n = item
+        machine = self.machine
+        counter = machine.counter
+        counter.threshold = self.threshold()
+        publisher = self.publisher
+        prev = self.snapshot
+        fired = 0
+        for i in machine.decide(intentions, self.latency.clock()):
+            fired += 1
+            crossing = self.latency.clock()
+            self.latency.record("trigger", crossing - (timestamps[i] + offset))
+            self.on_trigger(crossing)
+            if publisher is not None:
+                publisher.publish_trigger(crossing, prev.triggers + fired)
+        self.latency.record("decision", self.latency.clock() - scored_time)
+        if publisher is not None and scores is not None and len(scores):
+            publisher.publish(timestamps + offset, scores, counter.value)
+        self.snapshot = ControlSnapshot(
+            counter=counter.value,
+            intention=int(intentions[-1]) if len(intentions) else prev.intention,
+            samples=prev.samples + n,
+            triggers=prev.triggers + fired,
+            dropped=self._dropped,
+            movements=self._movements,
+            phase=machine.phase,
+        )
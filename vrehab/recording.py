@@ -0,0 +1,195 @@
+"""Append-only, memory-mappable session recordings.
+
+Each session gets its own directory, ``<root>/<subject>/<YYYY-MM-DD>/<HHMMSS>-<stream>/``,
+holding raw little-endian arrays that only ever grow:
+
+- ``samples.bin``: ``(n, channels)`` samples in ``meta["dtype"]``
+- ``timestamps.bin``: ``n`` float64 LSL timestamps
+- ``labels.bin``: ``n`` int8 labels (0 rest, 1 move)
+- ``meta.json``: channel layout, stream, subject and timing
+
+A crash loses at most the data written since the last fsync; the readable
+length is whatever all three arrays have complete rows for. Convert a
+session to the old CSV layout with::
+
+    python -m vrehab.recording export recordings/<subject>/<day>/<session> out.csv
+"""
+import argparse
+import json
+import os
+import re
+import time
+import typing
+
+import numpy as np
+
+FORMAT_VERSION = 1
+
+
+def safe_name(value: str) -> str:
+    """``value`` as a file-name component; subject and stream directories are named with it."""
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", value).strip("_") or "unnamed"
+
+
+class SessionRecorder:
+    """Stream chunks of samples, timestamps and labels to a new session directory.
+
+    Files are appended on every ``write``; ``fsync`` runs at most once per
+    ``fsync_interval`` seconds so disk flushes stay bounded at high rates.
+    """
+
+    def __init__(
+        self,
+        channel_count: int,
+        root: str = "recordings",
+        subject: str = "anonymous",
+        stream_name: str = "AURA_Power",
+        srate: float = 0.0,
+        channel_names: typing.Optional[typing.Sequence[str]] = None,
+        dtype=np.float32,
+        fsync_interval: float = 1.0,
+    ):
+        started = time.localtime()
+        self.path = os.path.join(
+            root,
+            safe_name(subject),
+            time.strftime("%Y-%m-%d", started),
+            f"{time.strftime('%H%M%S', started)}-{safe_name(stream_name)}",
+        )
+        suffix = 1
+        base = self.path
+        while os.path.exists(self.path):
+            suffix += 1
+            self.path = f"{base}-{suffix}"
+        os.makedirs(self.path)
+
+        self.channel_count = channel_count
+        self.dtype = np.dtype(dtype).newbyteorder("<")
+        self.fsync_interval = fsync_interval
+        self.samples_written = 0
+        self.meta = {
+            "format_version": FORMAT_VERSION,
+            "subject": subject,
+            "stream_name": stream_name,
+            "srate": srate,
+            "channel_count": channel_count,
+            "channel_names": list(channel_names) if channel_names is not None else [str(i) for i in range(channel_count)],
+            "dtype": self.dtype.str,
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S", started),
+        }
+        self._write_meta()
+        self._samples = open(os.path.join(self.path, "samples.bin"), "ab")
+        self._timestamps = open(os.path.join(self.path, "timestamps.bin"), "ab")
+        self._labels = open(os.path.join(self.path, "labels.bin"), "ab")
+        self._last_sync = time.monotonic()
+
+    def __enter__(self) -> "SessionRecorder":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @property
+    def closed(self) -> bool:
+        return self._samples.closed
+
+    def _write_meta(self) -> None:
+        tmp = os.path.join(self.path, "meta.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(self.meta, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, os.path.join(self.path, "meta.json"))
+
+    def write(self, samples: np.ndarray, timestamps: typing.Sequence[float], label: int) -> None:
+        n = len(timestamps)
+        if n == 0:
+            return
+        self._samples.write(np.ascontiguousarray(samples[:n], dtype=self.dtype).data)
+        self._timestamps.write(np.ascontiguousarray(timestamps, dtype="<f8").data)
+        self._labels.write(np.full(n, label, dtype=np.int8).data)
+        self.samples_written += n
+        now = time.monotonic()
+        if now - self._last_sync >= self.fsync_interval:
+            self.sync()
+            self._last_sync = now
+
+    def sync(self) -> None:
+        for f in (self._samples, self._timestamps, self._labels):
+            f.flush()
+            os.fsync(f.fileno())
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.sync()
+        for f in (self._samples, self._timestamps, self._labels):
+            f.close()
+        self.meta["ended"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        self.meta["samples"] = self.samples_written
+        self._write_meta()
+
+
+class Recording(typing.NamedTuple):
+    path: str
+    meta: dict
+    samples: np.ndarray
+    timestamps: np.ndarray
+    labels: np.ndarray
+
+
+def open_session(path: str) -> Recording:
+    """Memory-map a recorded session read-only, truncated to its complete rows."""
+    with open(os.path.join(path, "meta.json")) as f:
+        meta = json.load(f)
+    dtype = np.dtype(meta["dtype"])
+    channels = meta["channel_count"]
+    sizes = (
+        os.path.getsize(os.path.join(path, "samples.bin")) // (dtype.itemsize * channels),
+        os.path.getsize(os.path.join(path, "timestamps.bin")) // 8,
+        os.path.getsize(os.path.join(path, "labels.bin")),
+    )
+    n = min(sizes)
+
+    def _map(name: str, dt, shape):
+        if n == 0:
+            return np.empty(shape, dtype=dt)
+        return np.memmap(os.path.join(path, name), dtype=dt, mode="r", shape=shape)
+
+    return Recording(
+        path=path,
+        meta=meta,
+        samples=_map("samples.bin", dtype, (n, channels)),
+        timestamps=_map("timestamps.bin", np.dtype("<f8"), (n,)),
+        labels=_map("labels.bin", np.int8, (n,)),
+    )
+
+
+def export_csv(path: str, out: str, timestamps: bool = False) -> int:
+    """Write a session in the ``full_data_personas_nuevas.csv`` layout; returns the row count."""
+    import pandas as pd
+
+    rec = open_session(path)
+    frame = pd.DataFrame(np.asarray(rec.samples), columns=rec.meta["channel_names"])
+    if timestamps:
+        frame.insert(0, "Timestamp", np.asarray(rec.timestamps))
+    frame["Event"] = np.asarray(rec.labels, dtype=np.int64)
+    frame.to_csv(out, index=False)
+    return len(frame)
+
+
+def main(argv: typing.Optional[typing.List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="VRehab session recordings")
+    sub = parser.add_subparsers(dest="command", required=True)
+    exp = sub.add_parser("export", help="convert a session to CSV")
+    exp.add_argument("session")
+    exp.add_argument("out")
+    exp.add_argument("--timestamps", action="store_true", help="prepend a Timestamp column")
+    args = parser.parse_args(argv)
+    if args.command == "export":
+        rows = export_csv(args.session, args.out, timestamps=args.timestamps)
+        print(f"Wrote {rows} rows to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""On-disk store of fitted models for warm starts.
+
+Each model is a directory ``<root>/<subject>/<YYYYmmdd-HHMMSS>/`` with the
+scaler and classifier parameters as plain arrays in ``weights.npz`` (loaded
+with ``allow_pickle=False``) and a ``meta.json`` describing the subject,
+channel layout, stream, accuracy and creation time. Since format 2 the
+directory also holds ``intent.npz``, the same model as a single NumPy-only
+artifact (``vrehab.artifact``) that can be copied to a control host on its
+own; ``load(sklearn=False)`` reads a model without importing scikit-learn.
+"""
+import json
+import os
+import shutil
+import tempfile
+import time
+import typing
+
+import numpy as np
+
+from vrehab.artifact import ARTIFACT_NAME, LinearParams, ScalerParams, from_fitted, load_artifact, save_artifact
+from vrehab.recording import safe_name
+
+FORMAT_VERSION = 2
+
+
+class StoredModel(typing.NamedTuple):
+    path: str
+    meta: dict
+    scaler: typing.Any
+    model: typing.Any
+
+
+class ModelStore:
+    """Save fitted ``StandardScaler`` + linear classifier pairs and find the latest compatible one."""
+
+    def __init__(self, root: str = "models"):
+        self.root = root
+
+    def save(self, scaler, model, subject: str, channel_count: int, stream_name: str = "AURA_Power",
+             accuracy: typing.Optional[float] = None, channel_names: typing.Optional[typing.Sequence[str]] = None,
+             extra: typing.Optional[dict] = None) -> str:
+        """Write a model atomically and return its directory."""
+        created = time.time()
+        subject_dir = os.path.join(self.root, safe_name(subject))
+        os.makedirs(subject_dir, exist_ok=True)
+        name = time.strftime("%Y%m%d-%H%M%S", time.localtime(created))
+        path = os.path.join(subject_dir, name)
+        suffix = 1
+        while os.path.exists(path):
+            suffix += 1
+            path = os.path.join(subject_dir, f"{name}-{suffix}")
+        meta = {
+            "format_version": FORMAT_VERSION,
+            "subject": subject,
+            "channel_count": channel_count,
+            "channel_names": list(channel_names) if channel_names is not None else [str(i) for i in range(channel_count)],
+            "stream_name": stream_name,
+            "accuracy": accuracy,
+            "estimator": type(model).__name__,
+            "created": created,
+        }
+        if extra:
+            meta.update(extra)
+        tmp = tempfile.mkdtemp(prefix=".tmp-", dir=subject_dir)
+        try:
+            np.savez(
+                os.path.join(tmp, "weights.npz"),
+                mean=np.asarray(scaler.mean_, dtype=np.float64),
+                scale=np.asarray(scaler.scale_, dtype=np.float64),
+                var=np.asarray(scaler.var_, dtype=np.float64),
+                n_samples_seen=np.asarray(scaler.n_samples_seen_),
+                coef=np.asarray(model.coef_, dtype=np.float64),
+                intercept=np.asarray(model.intercept_, dtype=np.float64),
+                classes=np.asarray(model.classes_),
+            )
+            with open(os.path.join(tmp, "meta.json"), "w") as f:
+                json.dump(meta, f, indent=2)
+            save_artifact(from_fitted(scaler, model, meta["channel_names"], meta), os.path.join(tmp, ARTIFACT_NAME))
+            os.replace(tmp, path)
+        except Exception:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        return path
+
+    def list(self, subject: typing.Optional[str] = None) -> typing.List[typing.Tuple[str, dict]]:
+        """``(path, meta)`` for every stored model, newest first."""
+        subjects = [safe_name(subject)] if subject else (os.listdir(self.root) if os.path.isdir(self.root) else [])
+        found = []
+        for s in subjects:
+            subject_dir = os.path.join(self.root, s)
+            if not os.path.isdir(subject_dir):
+                continue
+            for name in os.listdir(subject_dir):
+                meta_path = os.path.join(subject_dir, name, "meta.json")
+                if name.startswith(".") or not os.path.isfile(meta_path):
+                    continue
+                try:
+                    with open(meta_path) as f:
+                        found.append((os.path.join(subject_dir, name), json.load(f)))
+                except (OSError, ValueError):
+                    continue
+        found.sort(key=lambda item: item[1].get("created", 0), reverse=True)
+        return found
+
+    def load(self, path: str, sklearn: bool = True) -> StoredModel:
+        """Rebuild the scaler and a ``LogisticRegression`` from a stored model directory.
+
+        With ``sklearn=False`` the scaler and model are the NumPy-only
+        ``ScalerParams``/``LinearParams`` stand-ins, which is all that
+        ``LinearIntentKernel`` and ``OnlineAdapter`` need for control.
+        """
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        if not sklearn:
+            artifact_path = os.path.join(path, ARTIFACT_NAME)
+            if os.path.isfile(artifact_path):
+                artifact = load_artifact(artifact_path)
+                return StoredModel(path, meta, artifact.scaler, artifact.model)
+        with np.load(os.path.join(path, "weights.npz"), allow_pickle=False) as w:
+            if not sklearn:
+                # Models saved before the artifact existed
+                scaler = ScalerParams(w["mean"], w["scale"], w["var"], int(np.sum(w["n_samples_seen"])))
+                return StoredModel(path, meta, scaler, LinearParams(w["coef"], w["intercept"], w["classes"]))
+            from sklearn.linear_model import LogisticRegression
+            from sklearn.preprocessing import StandardScaler
+
+            scaler = StandardScaler()
+            scaler.mean_ = w["mean"]
+            scaler.scale_ = w["scale"]
+            scaler.var_ = w["var"]
+            scaler.n_samples_seen_ = w["n_samples_seen"]
+            scaler.n_features_in_ = len(w["mean"])
+            model = LogisticRegression()
+            model.coef_ = w["coef"]
+            model.intercept_ = w["intercept"]
+            model.classes_ = w["classes"]
+            model.n_features_in_ = w["coef"].shape[1]
+        return StoredModel(path, meta, scaler, model)
+
+    def load_latest(self, subject: typing.Optional[str] = None, channel_count: typing.Optional[int] = None,
+                    stream_name: typing.Optional[str] = None, sklearn: bool = True) -> typing.Optional[StoredModel]:
+        """Newest model matching the subject, channel count and stream name given, if any."""
+        for path, meta in self.list(subject):
+            if channel_count is not None and meta.get("channel_count") != channel_count:
+                continue
+            if stream_name is not None and meta.get("stream_name") != stream_name:
+                continue
+            try:
+                return self.load(path, sklearn=sklearn)
+            except (OSError, KeyError, ValueError):
+                continue
+        return None
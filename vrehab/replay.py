@@ -0,0 +1,231 @@
+"""Replay recorded sessions through the control chain to tune the threshold.
+
+Each session is read back with ``RecordingReplayer`` through the same
+``ChunkedInlet`` chunking, ``WindowFeatures`` stage, ``LinearIntentKernel``
+and leaky counter as live control, either at ``speed`` times real time or
+as fast as possible (``speed=0``). Inference runs once per session and
+every threshold is counted over the same predictions with
+``vrehab.counter``, which matches ``LeakyCounter`` exactly. Triggers during rest
+(label 0) count as false triggers; the delay from movement onset to the
+first trigger shows how responsive a threshold is::
+
+    python -m vrehab.replay --subject ana --thresholds 300 500 700 900
+    python -m vrehab.replay --subject ana --sweep 100 2000 25
+    python -m vrehab.replay recordings/ana/2024-05-02/101500-AURA_Power --model models/ana/20240502-101733 --speed 4
+"""
+import argparse
+import concurrent.futures
+import json
+import os
+import time
+import typing
+
+import numpy as np
+
+from vrehab.acquisition import ChunkedInlet
+from vrehab.counter import sweep_thresholds
+from vrehab.dataset import find_sessions
+from vrehab.features import WindowFeatures
+from vrehab.inference import LinearIntentKernel
+from vrehab.recording import Recording, open_session
+from vrehab.registry import ModelStore, StoredModel
+from vrehab.synthetic import RecordingReplayer
+
+
+class ReplayResult(typing.NamedTuple):
+    session: str
+    model: str
+    threshold: int
+    samples: int
+    rest_s: float
+    move_s: float
+    # Seconds from the start of the session
+    trigger_times: typing.Tuple[float, ...]
+    false_triggers: int
+    true_triggers: int
+    # False triggers per minute of rest
+    false_per_min: float
+    # Seconds from the first movement sample to the first trigger during movement
+    first_trigger_delay: typing.Optional[float]
+    elapsed: float
+
+
+def predict_session(recording: Recording, stored: StoredModel, chunk_size: int = 32, speed: float = 0.0,
+                    max_latency: float = 0.02) -> typing.Tuple[np.ndarray, np.ndarray]:
+    """Run a session through acquisition, features and the kernel as live control does.
+
+    Returns ``(intentions, positions)``: one decision per classifier row and
+    the index of the recording sample it was made on.
+    """
+    srate = recording.meta.get("srate") or 250.0
+    replayer = RecordingReplayer(np.asarray(recording.samples), srate, np.asarray(recording.timestamps), speed=speed)
+    acquisition = ChunkedInlet(replayer, chunk_size=chunk_size, max_latency=max_latency)
+    kernel = LinearIntentKernel.from_sklearn(stored.scaler, stored.model, max_chunk=chunk_size)
+    config = stored.meta.get("features")
+    features = WindowFeatures(acquisition.channel_count, **config) if config else None
+    intentions, positions = [], []
+    read = 0
+    while not replayer.exhausted:
+        samples, _ = acquisition.read()
+        n = len(samples)
+        if n == 0:
+            continue
+        index = np.arange(read, read + n)
+        read += n
+        if features is not None:
+            samples, ends = features.transform(samples)
+            index = index[ends]
+        intentions.append(kernel.predict(samples).copy())
+        positions.append(index)
+    if not intentions:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.intp)
+    return np.concatenate(intentions), np.concatenate(positions)
+
+
+def score_triggers(recording: Recording, positions: np.ndarray, fired: np.ndarray, threshold: int,
+                   model: str = "", elapsed: float = 0.0) -> ReplayResult:
+    """Compare trigger positions with the session labels."""
+    timestamps = np.asarray(recording.timestamps)
+    labels = np.asarray(recording.labels)
+    srate = recording.meta.get("srate") or 250.0
+    samples = positions[fired]
+    during_move = labels[samples] == 1
+    rest_s = float(np.count_nonzero(labels == 0)) / srate
+    move_s = float(np.count_nonzero(labels == 1)) / srate
+    delay = None
+    moving = np.flatnonzero(labels == 1)
+    if len(moving) and during_move.any():
+        delay = float(timestamps[samples[during_move][0]] - timestamps[moving[0]])
+    false_triggers = int(np.count_nonzero(~during_move))
+    return ReplayResult(
+        session=recording.path,
+        model=model,
+        threshold=int(threshold),
+        samples=len(labels),
+        rest_s=rest_s,
+        move_s=move_s,
+        trigger_times=tuple(float(t) for t in timestamps[samples] - timestamps[0]) if len(timestamps) else (),
+        false_triggers=false_triggers,
+        true_triggers=int(np.count_nonzero(during_move)),
+        false_per_min=60.0 * false_triggers / rest_s if rest_s > 0 else 0.0,
+        first_trigger_delay=delay,
+        elapsed=elapsed,
+    )
+
+
+def replay_session(session: str, model_path: str, thresholds: typing.Sequence[int], chunk_size: int = 32,
+                   speed: float = 0.0) -> typing.List[ReplayResult]:
+    """Replay one session with the stored model at ``model_path`` for every threshold."""
+    start = time.perf_counter()
+    recording = open_session(session)
+    stored = ModelStore().load(model_path, sklearn=False)
+    if stored.meta.get("channel_count") != recording.meta["channel_count"]:
+        raise ValueError(f"{model_path} expects {stored.meta.get('channel_count')} channels, {session} has {recording.meta['channel_count']}")
+    intentions, positions = predict_session(recording, stored, chunk_size=chunk_size, speed=speed)
+    fired = sweep_thresholds(intentions, thresholds)
+    elapsed = time.perf_counter() - start
+    return [score_triggers(recording, positions, fired[t], t, model_path, elapsed) for t in fired]
+
+
+def sweep(
+    sessions: typing.Sequence[str],
+    thresholds: typing.Sequence[int],
+    model_path: typing.Optional[str] = None,
+    model_store: typing.Optional[ModelStore] = None,
+    chunk_size: int = 32,
+    speed: float = 0.0,
+    workers: typing.Optional[int] = None,
+    on_error: typing.Optional[typing.Callable[[str, Exception], None]] = None,
+) -> typing.List[ReplayResult]:
+    """Replay many sessions in parallel worker processes.
+
+    Without ``model_path`` each session uses the newest model stored for its
+    subject and channel count. Sessions that fail are reported to
+    ``on_error`` and skipped.
+    """
+    store = model_store if model_store is not None else ModelStore()
+    jobs = {}
+    for session in sessions:
+        path = model_path
+        if path is None:
+            meta = open_session(session).meta
+            stored = store.load_latest(subject=meta.get("subject"), channel_count=meta.get("channel_count"), sklearn=False)
+            if stored is None:
+                if on_error:
+                    on_error(session, LookupError(f"no stored model for subject {meta.get('subject')!r}"))
+                continue
+            path = stored.path
+        jobs[session] = path
+    results = []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers or min(len(jobs), os.cpu_count()) or 1) as pool:
+        futures = {pool.submit(replay_session, s, p, list(thresholds), chunk_size, speed): s for s, p in jobs.items()}
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                results.extend(future.result())
+            except Exception as e:
+                if on_error:
+                    on_error(futures[future], e)
+    results.sort(key=lambda r: (r.threshold, r.session))
+    return results
+
+
+def summarize(results: typing.Sequence[ReplayResult]) -> typing.Dict[int, dict]:
+    """Totals per threshold over all replayed sessions."""
+    summary = {}
+    for threshold in sorted({r.threshold for r in results}):
+        rows = [r for r in results if r.threshold == threshold]
+        rest_s = sum(r.rest_s for r in rows)
+        false_triggers = sum(r.false_triggers for r in rows)
+        delays = [r.first_trigger_delay for r in rows if r.first_trigger_delay is not None]
+        summary[threshold] = {
+            "sessions": len(rows),
+            "triggers": sum(len(r.trigger_times) for r in rows),
+            "false_triggers": false_triggers,
+            "false_per_min": 60.0 * false_triggers / rest_s if rest_s > 0 else 0.0,
+            "detected": len(delays),
+            "median_delay_s": float(np.median(delays)) if delays else None,
+        }
+    return summary
+
+
+def format_summary(summary: typing.Dict[int, dict]) -> str:
+    lines = [f"{'threshold':>9} {'sessions':>8} {'triggers':>8} {'false':>6} {'false/min':>9} {'detected':>8} {'delay s':>8}"]
+    for threshold, s in summary.items():
+        delay = f"{s['median_delay_s']:8.2f}" if s["median_delay_s"] is not None else f"{'-':>8}"
+        lines.append(f"{threshold:9d} {s['sessions']:8d} {s['triggers']:8d} {s['false_triggers']:6d} "
+                     f"{s['false_per_min']:9.2f} {s['detected']:8d} {delay}")
+    return "\n".join(lines)
+
+
+def main(argv: typing.Optional[typing.List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Replay recorded sessions through the control chain")
+    parser.add_argument("sessions", nargs="*", help="session directories (default: every session under --root)")
+    parser.add_argument("--root", default="recordings")
+    parser.add_argument("--subject", action="append", help="only sessions of this subject (repeatable)")
+    parser.add_argument("--models", default="models")
+    parser.add_argument("--model", help="stored model directory to use for every session (default: newest per subject)")
+    parser.add_argument("--thresholds", type=int, nargs="+", default=[700])
+    parser.add_argument("--sweep", type=int, nargs=3, metavar=("START", "STOP", "STEP"), help="every threshold in range(START, STOP + 1, STEP)")
+    parser.add_argument("--chunk-size", type=int, default=32)
+    parser.add_argument("--speed", type=float, default=0.0, help="times real time (0 = as fast as possible)")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--out", help="write every result as JSON")
+    args = parser.parse_args(argv)
+
+    sessions = args.sessions or find_sessions(args.root, subjects=args.subject)
+    if not sessions:
+        parser.error("no sessions found")
+    thresholds = list(range(args.sweep[0], args.sweep[1] + 1, args.sweep[2])) if args.sweep else args.thresholds
+    start = time.perf_counter()
+    results = sweep(sessions, thresholds, model_path=args.model, model_store=ModelStore(args.models),
+                    chunk_size=args.chunk_size, speed=args.speed, workers=args.workers,
+                    on_error=lambda session, e: print(f"{session}: {e}"))
+    print(f"Replayed {len({r.session for r in results})} of {len(sessions)} sessions in {time.perf_counter() - start:.1f}s")
+    print(format_summary(summarize(results)))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump([r._asdict() for r in results], f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
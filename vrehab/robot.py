@@ -0,0 +1,255 @@
+"""Single-owner command scheduler for the Dobot arm."""
+import collections
+import struct
+import threading
+import time
+import typing
+
+from vrehab.cancel import CancelToken
+from vrehab.latency import LatencyTracker
+
+# (description, x, y, z, r) in absolute robot coordinates
+Step = typing.Tuple[str, float, float, float, float]
+Pose = typing.Tuple[float, ...]
+
+
+class QueuedDobot:
+    """Queued-command view of a ``pydobot.Dobot``.
+
+    ``pydobot`` only exposes blocking ``move_to(wait=True)``, which polls the
+    device after every move. Here moves and pauses are pushed into the
+    controller's own command queue and return its queue index immediately;
+    the caller polls ``current_index`` to follow progress and can ``halt``
+    the queue to abort a trajectory mid-way.
+    """
+
+    def __init__(self, dobot):
+        self.dobot = dobot
+
+    @staticmethod
+    def _index(response) -> int:
+        return struct.unpack_from("<Q", response.params, 0)[0]
+
+    def pose(self) -> Pose:
+        return self.dobot.pose()
+
+    def queue_move(self, x: float, y: float, z: float, r: float) -> int:
+        from pydobot.enums import PTPMode
+
+        return self._index(self.dobot._set_ptp_cmd(x, y, z, r, mode=PTPMode.MOVL_XYZ, wait=False))
+
+    def queue_wait(self, ms: int) -> int:
+        return self._index(self.dobot._set_wait_cmd(int(ms)))
+
+    def current_index(self) -> int:
+        return self.dobot._get_queued_cmd_current_index()
+
+    def halt(self) -> None:
+        self.dobot._set_queued_cmd_stop_exec()
+        self.dobot._set_queued_cmd_clear()
+        self.dobot._set_queued_cmd_start_exec()
+
+    def close(self) -> None:
+        self.dobot.close()
+
+
+def queued_device(robot):
+    """Wrap a ``pydobot.Dobot`` in ``QueuedDobot``; simulators already speak the queued interface."""
+    return robot if hasattr(robot, "queue_move") else QueuedDobot(robot)
+
+
+class Trajectory(typing.NamedTuple):
+    """A named motion planned from the pose at the moment it starts.
+
+    ``plan`` maps the current pose to absolute steps; ``fallback`` (optional)
+    gives the step to take if the trajectory fails. Trajectories with the same
+    ``name`` are treated as duplicates while one is pending or running.
+    """
+
+    name: str
+    plan: typing.Callable[[Pose], typing.Sequence[Step]]
+    dwell_ms: int = 500
+    fallback: typing.Optional[typing.Callable[[Pose], Step]] = None
+    trigger_time: typing.Optional[float] = None
+
+
+class RobotEvent(typing.NamedTuple):
+    name: str
+    status: str  # "started", "step", "done", "cancelled", "error", "dropped"
+    step: int = 0
+    steps: int = 0
+    description: str = ""
+    trigger_time: typing.Optional[float] = None
+    elapsed: float = 0.0
+    error: typing.Optional[Exception] = None
+
+
+class RobotScheduler:
+    """Own the robot on one worker thread and run trajectories from a bounded queue.
+
+    ``submit`` never blocks: a trajectory whose name is already pending or
+    running is coalesced into it, and when ``max_pending`` trajectories are
+    waiting the new one is dropped. ``cancel`` empties the queue and aborts the
+    running trajectory by halting the device queue. Progress and completion
+    are reported through ``on_event`` from the worker thread; ``dispatch``
+    latency (trigger to first queued command) goes to ``latency`` when the
+    trajectory carries a ``trigger_time``. ``stop`` (or cancelling the parent
+    ``cancel`` token) aborts the running trajectory and wakes the worker
+    at once rather than at its next poll.
+    """
+
+    def __init__(
+        self,
+        device,
+        max_pending: int = 2,
+        poll_interval: float = 0.05,
+        on_event: typing.Optional[typing.Callable[[RobotEvent], None]] = None,
+        latency: typing.Optional[LatencyTracker] = None,
+        cancel: typing.Optional[CancelToken] = None,
+    ):
+        self.device = device
+        self.max_pending = max_pending
+        self.poll_interval = poll_interval
+        self.on_event = on_event
+        self.latency = latency
+        self._pending = collections.deque()
+        self._cond = threading.Condition()
+        self._active: typing.Optional[Trajectory] = None
+        self._abort = threading.Event()
+        self._parent = cancel
+        self._cancel = CancelToken()
+        self._thread: typing.Optional[threading.Thread] = None
+        self.completed = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.cpu_time = 0.0
+
+    def start(self) -> "RobotScheduler":
+        self._cancel = CancelToken(self._parent)
+        self._cancel.on_cancel(self._wake)
+        self._thread = threading.Thread(target=self._run, name="vrehab-robot", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 2.0) -> None:
+        """Cancel everything and stop the worker; the device is left open."""
+        self._cancel.cancel()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        self._thread = None
+
+    @property
+    def busy(self) -> bool:
+        with self._cond:
+            return self._active is not None or bool(self._pending)
+
+    def submit(self, trajectory: Trajectory) -> bool:
+        """Queue ``trajectory``; False if it was coalesced or dropped."""
+        with self._cond:
+            names = [t.name for t in self._pending]
+            if self._active is not None:
+                names.append(self._active.name)
+            if trajectory.name in names:
+                self.coalesced += 1
+                return False
+            if len(self._pending) >= self.max_pending:
+                self.dropped += 1
+                self._emit(RobotEvent(trajectory.name, "dropped", trigger_time=trajectory.trigger_time))
+                return False
+            self._pending.append(trajectory)
+            self._cond.notify()
+            return True
+
+    def cancel(self, name: typing.Optional[str] = None) -> int:
+        """Drop pending trajectories (all, or those called ``name``) and abort a matching running one."""
+        with self._cond:
+            keep = [t for t in self._pending if name is not None and t.name != name]
+            cancelled = len(self._pending) - len(keep)
+            self._pending = collections.deque(keep)
+            if self._active is not None and (name is None or self._active.name == name):
+                self._abort.set()
+                cancelled += 1
+        return cancelled
+
+    def _wake(self) -> None:
+        self.cancel()
+        with self._cond:
+            self._cond.notify_all()
+
+    def _emit(self, event: RobotEvent) -> None:
+        if self.on_event:
+            try:
+                self.on_event(event)
+            except Exception:
+                pass
+
+    def _run(self) -> None:
+        start = time.thread_time()
+        try:
+            self._serve(start)
+        finally:
+            self.cpu_time = time.thread_time() - start
+
+    def _serve(self, start: float) -> None:
+        cancel = self._cancel
+        while not cancel.cancelled:
+            with self._cond:
+                while not self._pending and not cancel.cancelled:
+                    self._cond.wait(0.1)
+                if cancel.cancelled:
+                    return
+                trajectory = self._active = self._pending.popleft()
+                self._abort.clear()
+            try:
+                self._execute(trajectory)
+            finally:
+                with self._cond:
+                    self._active = None
+                self.cpu_time = time.thread_time() - start
+
+    def _execute(self, trajectory: Trajectory) -> None:
+        started = time.perf_counter()
+        pose = None
+        steps: typing.Sequence[Step] = ()
+        try:
+            pose = self.device.pose()
+            steps = trajectory.plan(pose)
+            indices = []
+            for _, x, y, z, r in steps:
+                indices.append(self.device.queue_move(x, y, z, r))
+                if len(indices) == 1:
+                    # The arm is moving from here on; the rest is queued behind it
+                    if trajectory.trigger_time is not None and self.latency is not None:
+                        self.latency.record("dispatch", self.latency.clock() - trajectory.trigger_time)
+                    self._emit(RobotEvent(trajectory.name, "started", steps=len(steps), trigger_time=trajectory.trigger_time))
+                if trajectory.dwell_ms:
+                    self.device.queue_wait(trajectory.dwell_ms)
+            # Follow the device queue instead of sleeping between moves
+            done = 0
+            last = self.device.queue_wait(0) if indices else None
+            while last is not None:
+                if self._abort.is_set() or self._cancel.cancelled:
+                    self.device.halt()
+                    self._emit(RobotEvent(trajectory.name, "cancelled", done, len(steps), trigger_time=trajectory.trigger_time,
+                                          elapsed=time.perf_counter() - started))
+                    return
+                current = self.device.current_index()
+                while done < len(indices) and current > indices[done]:
+                    self._emit(RobotEvent(trajectory.name, "step", done + 1, len(steps), steps[done][0], trajectory.trigger_time))
+                    done += 1
+                if current >= last:
+                    break
+                self._abort.wait(self.poll_interval)
+            self.completed += 1
+            self._emit(RobotEvent(trajectory.name, "done", len(steps), len(steps), trigger_time=trajectory.trigger_time,
+                                  elapsed=time.perf_counter() - started))
+        except Exception as e:
+            self._emit(RobotEvent(trajectory.name, "error", steps=len(steps), trigger_time=trajectory.trigger_time,
+                                  elapsed=time.perf_counter() - started, error=e))
+            if trajectory.fallback is not None and pose is not None:
+                try:
+                    self.device.halt()
+                    _, x, y, z, r = trajectory.fallback(pose)
+                    self.device.queue_move(x, y, z, r)
+                except Exception:
+                    pass
@@ -0,0 +1,234 @@
+"""Several independent rehab stations in one process.
+
+Each station is a ``VRehabEngine`` with its own EEG stream, model and robot.
+The model store and the process pool used for model selection are shared,
+and CPU time is accounted per station. From the command line, stations
+come from a JSON list and run control until SIGINT/SIGTERM::
+
+    python -m vrehab.sessions stations.json
+
+    [{"name": "bed1", "subject": "ana", "stream": "AURA_Power", "source": "aura-1", "port": "COM4", "serve": 8765},
+     {"name": "bed2", "subject": "ben", "stream": "AURA_Power", "source": "aura-2", "robot": "sim"}]
+"""
+import argparse
+import concurrent.futures
+import json
+import os
+import re
+import signal
+import sys
+import threading
+import time
+import typing
+
+from vrehab.engine import EngineEvent, VRehabEngine
+from vrehab.registry import ModelStore
+
+
+class StationConfig(typing.NamedTuple):
+    name: str
+    subject: str = "anonymous"
+    stream: str = "AURA_Power"
+    source: typing.Optional[str] = None
+    robot: str = "dobot"
+    port: typing.Optional[str] = None
+    threshold: int = 700
+    adapt_norm: bool = False
+    adapt_weights: bool = False
+    # TCP port for the station's decision server (vrehab.decisions)
+    serve: typing.Optional[int] = None
+
+
+class SessionUsage(typing.NamedTuple):
+    cpu_s: float
+    cpu_percent: float
+    samples: int
+    triggers: int
+    dropped: int
+    controlling: bool
+
+
+class SessionManager:
+    """Create, run and account for isolated sessions.
+
+    Sessions only share the read-only model store and the model-selection
+    pool; an exception in one session's event handler or threads never
+    reaches another. Two sessions may not use the same stream source or
+    robot port, and a session whose stream resolves to one another session
+    is already reading (e.g. both give only the stream name) is not
+    started. ``on_event`` receives ``(session name, EngineEvent)``.
+    """
+
+    def __init__(
+        self,
+        model_store: typing.Optional[ModelStore] = None,
+        recordings: str = "recordings",
+        workers: typing.Optional[int] = None,
+        on_event: typing.Optional[typing.Callable[[str, EngineEvent], None]] = None,
+    ):
+        self.model_store = model_store if model_store is not None else ModelStore()
+        self.recordings = recordings
+        self.on_event = on_event
+        self.executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers or os.cpu_count())
+        self.sessions: typing.Dict[str, VRehabEngine] = {}
+        self.configs: typing.Dict[str, StationConfig] = {}
+        self._lock = threading.Lock()
+        self._last_usage: typing.Dict[str, typing.Tuple[float, float]] = {}
+
+    def add(self, config: StationConfig) -> VRehabEngine:
+        if not re.fullmatch(r"[A-Za-z0-9_.-]+", config.name):
+            raise ValueError(f"Session name {config.name!r} may only use letters, digits, '_', '.' and '-'")
+        with self._lock:
+            if config.name in self.sessions:
+                raise ValueError(f"Session {config.name!r} already exists")
+            for other in self.configs.values():
+                if config.source and other.source == config.source:
+                    raise ValueError(f"Stream source {config.source!r} is already used by {other.name!r}")
+                if config.serve and other.serve == config.serve:
+                    raise ValueError(f"Decision port {config.serve} is already used by {other.name!r}")
+                if config.port and config.robot != "sim" and other.port == config.port and other.robot == config.robot:
+                    raise ValueError(f"Robot port {config.port!r} is already used by {other.name!r}")
+            engine = VRehabEngine(
+                robot_backend=config.robot,
+                subject=config.subject,
+                stream_name=config.stream,
+                stream_source=config.source,
+                model_store=self.model_store,
+                recordings=self.recordings,
+                on_event=lambda event, name=config.name: self._forward(name, event),
+                executor=self.executor,
+                name=config.name,
+            )
+            engine.threshold = config.threshold
+            self.sessions[config.name] = engine
+            self.configs[config.name] = config
+        return engine
+
+    def _forward(self, name: str, event: EngineEvent) -> None:
+        if self.on_event:
+            try:
+                self.on_event(name, event)
+            except Exception:
+                pass
+
+    def start(self, name: str) -> bool:
+        """Connect the station's stream and robot and start control with its stored model."""
+        engine, config = self.sessions[name], self.configs[name]
+        if not engine.brain_inlet:
+            if not engine.connect_eeg():
+                return False
+            other = self._stream_user(name)
+            if other:
+                engine.log(f"EEG stream {engine.stream_source or engine.stream_name} is already used by '{other}'; "
+                           "give each station its own source id")
+                engine.disconnect_eeg()
+                return False
+        if not engine.robot and (config.port or config.robot == "sim"):
+            engine.connect_robot(config.port)
+        if config.serve and not engine.decision_publisher:
+            engine.serve_decisions(config.serve)
+        if engine.lr_model is None:
+            engine.log(f"No stored model for '{config.subject}'; train this station first")
+            return False
+        return engine.start_control(adapt_norm=config.adapt_norm, adapt_weights=config.adapt_weights)
+
+    def _stream_user(self, name: str) -> typing.Optional[str]:
+        """Another session connected to the same stream as ``name``, if any."""
+        engine = self.sessions[name]
+        with self._lock:
+            for other_name, other in self.sessions.items():
+                if other_name == name or not other.brain_inlet:
+                    continue
+                if other.stream_uid == engine.stream_uid or (engine.stream_source and other.stream_source == engine.stream_source):
+                    return other_name
+        return None
+
+    def remove(self, name: str) -> None:
+        with self._lock:
+            engine = self.sessions.pop(name)
+            self.configs.pop(name)
+            self._last_usage.pop(name, None)
+        engine.close()
+
+    def usage(self) -> typing.Dict[str, SessionUsage]:
+        """Per-session CPU seconds, CPU % since the previous call, and control counters."""
+        now = time.perf_counter()
+        result = {}
+        for name, engine in list(self.sessions.items()):
+            cpu = engine.cpu_time
+            last_wall, last_cpu = self._last_usage.get(name, (now, cpu))
+            self._last_usage[name] = (now, cpu)
+            wall = now - last_wall
+            snapshot = engine.snapshot
+            result[name] = SessionUsage(
+                cpu_s=cpu,
+                cpu_percent=100.0 * (cpu - last_cpu) / wall if wall > 0 else 0.0,
+                samples=snapshot.samples,
+                triggers=snapshot.triggers,
+                dropped=snapshot.dropped,
+                controlling=engine.is_controlling,
+            )
+        return result
+
+    def close(self) -> None:
+        for name in list(self.sessions):
+            try:
+                self.remove(name)
+            except Exception:
+                pass
+        self.executor.shutdown(wait=False)
+
+
+def load_stations(path: str) -> typing.List[StationConfig]:
+    with open(path) as f:
+        return [StationConfig(**entry) for entry in json.load(f)]
+
+
+def format_usage(usage: typing.Dict[str, SessionUsage]) -> str:
+    lines = [f"{'station':>10} {'cpu s':>8} {'cpu %':>6} {'samples':>9} {'triggers':>8} {'dropped':>8}"]
+    for name, u in usage.items():
+        lines.append(f"{name:>10} {u.cpu_s:8.2f} {u.cpu_percent:6.1f} {u.samples:9d} {u.triggers:8d} {u.dropped:8d}"
+                     + ("" if u.controlling else "  (idle)"))
+    return "\n".join(lines)
+
+
+def main(argv: typing.Optional[typing.List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run several VRehab stations in one process")
+    parser.add_argument("stations", help="JSON list of station settings")
+    parser.add_argument("--models", default="models")
+    parser.add_argument("--recordings", default="recordings")
+    parser.add_argument("--duration", type=float, default=0.0, help="stop after this many seconds (0 = until signalled)")
+    parser.add_argument("--status", type=float, default=5.0, help="seconds between usage tables")
+    args = parser.parse_args(argv)
+
+    print_lock = threading.Lock()
+
+    def on_event(name: str, event: EngineEvent) -> None:
+        if event.kind == "log":
+            with print_lock:
+                print(f"[{time.strftime('%H:%M:%S')}] {name}: {event.message}", flush=True)
+
+    manager = SessionManager(ModelStore(args.models), recordings=args.recordings, on_event=on_event)
+    stop = threading.Event()
+    signal.signal(signal.SIGINT, lambda signum, frame: stop.set())
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    try:
+        for config in load_stations(args.stations):
+            manager.add(config)
+            if not manager.start(config.name):
+                on_event(config.name, EngineEvent("log", "not started"))
+        manager.usage()
+        deadline = time.monotonic() + args.duration if args.duration else None
+        while not stop.wait(args.status):
+            with print_lock:
+                print(format_usage(manager.usage()), flush=True)
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+    finally:
+        manager.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+"""Hardware-free stand-ins: a synthetic LSL outlet, a recording replayer and a mock Dobot."""
+import threading
+import time
+import typing
+
+import numpy as np
+
+from vrehab.devices import SimulatedDobot
+
+
+def synthetic_samples(n: int, channel_count: int, label: int, rng: np.random.Generator, separation: float = 0.8) -> np.ndarray:
+    """Band-power-like samples; ``label`` 1 shifts every channel's mean by ``separation``."""
+    base = 10.0 + np.arange(channel_count, dtype=np.float64)
+    return (base + label * separation + rng.standard_normal((n, channel_count))).astype(np.float32)
+
+
+class SyntheticOutlet:
+    """Publish a fake ``AURA_Power`` stream on a local LSL outlet from a background thread.
+
+    Samples are pushed in small chunks at ``srate`` Hz; ``label`` selects the
+    rest (0) or move (1) distribution so a model trained on the stream can
+    separate the two. ``pushed`` counts every sample sent.
+    """
+
+    def __init__(self, name: str = "AURA_Power", channel_count: int = 8, srate: float = 250.0, push_interval: float = 0.004, seed: int = 0,
+                 source_id: typing.Optional[str] = None):
+        from pylsl import StreamInfo, StreamOutlet, cf_float32
+
+        self.name = name
+        self.channel_count = channel_count
+        self.srate = srate
+        self.push_interval = push_interval
+        self.label = 0
+        self.pushed = 0
+        self._rng = np.random.default_rng(seed)
+        info = StreamInfo(name, "EEG", channel_count, srate, cf_float32, source_id or f"vrehab-synthetic-{name}")
+        self._outlet = StreamOutlet(info, chunk_size=0, max_buffered=360)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> "SyntheticOutlet":
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"synthetic-{self.name}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(1.0)
+
+    def _run(self) -> None:
+        start = time.perf_counter()
+        while not self._stop.is_set():
+            due = int((time.perf_counter() - start) * self.srate) - self.pushed
+            if due > 0:
+                self._outlet.push_chunk(synthetic_samples(due, self.channel_count, self.label, self._rng))
+                self.pushed += due
+            time.sleep(self.push_interval)
+
+
+class RecordingReplayer:
+    """Inlet-like object that plays back a recorded array.
+
+    Implements the subset of ``pylsl.StreamInlet`` used by ``ChunkedInlet``
+    (``pull_chunk``, ``pull_sample``, ``flush``, ``time_correction``,
+    ``channel_count``, ``channel_format``). With ``speed`` > 0 samples become available at
+    ``speed`` times the recording rate; ``speed=0`` serves everything at once.
+    Served timestamps are rebased to when each sample became available, on
+    ``time.perf_counter``; ``time_correction`` maps that onto the LSL clock.
+    """
+
+    channel_format = 1  # cf_float32
+
+    def __init__(self, samples: np.ndarray, srate: float, timestamps: typing.Optional[np.ndarray] = None, speed: float = 1.0):
+        self.samples = np.ascontiguousarray(samples, dtype=np.float32)
+        self.channel_count = self.samples.shape[1]
+        self.srate = srate
+        self.speed = speed
+        if timestamps is None:
+            timestamps = np.arange(len(self.samples)) / srate
+        self.timestamps = np.asarray(timestamps, dtype=np.float64)
+        self._offsets = self.timestamps - self.timestamps[0] if len(self.timestamps) else self.timestamps
+        self.position = 0
+        self._start = None
+
+    @classmethod
+    def from_csv(cls, path: str, srate: float, speed: float = 1.0) -> "RecordingReplayer":
+        """Replay a ``full_data_personas_nuevas.csv``-style table (channels then ``Event``)."""
+        import pandas as pd
+
+        frame = pd.read_csv(path)
+        if "Event" in frame.columns:
+            frame = frame.drop(columns="Event")
+        return cls(frame.values, srate, speed=speed)
+
+    @property
+    def exhausted(self) -> bool:
+        return self.position >= len(self.samples)
+
+    def _available(self) -> int:
+        if self._start is None:
+            self._start = time.perf_counter()
+        if self.speed <= 0:
+            return len(self.samples) - self.position
+        due = int((time.perf_counter() - self._start) * self.srate * self.speed)
+        return max(0, min(due, len(self.samples)) - self.position)
+
+    def open_stream(self, timeout: float = 0.0) -> None:
+        pass
+
+    def close_stream(self) -> None:
+        pass
+
+    def time_correction(self, timeout: float = 0.0) -> float:
+        try:
+            from pylsl import local_clock
+        except ImportError:
+            return 0.0
+        return local_clock() - time.perf_counter()
+
+    def pull_chunk(self, timeout: float = 0.0, max_samples: int = 1024, dest_obj=None):
+        deadline = time.perf_counter() + timeout
+        available = self._available()
+        while available < max_samples and not self.exhausted and time.perf_counter() < deadline:
+            time.sleep(min(0.001, max(0.0, deadline - time.perf_counter())))
+            available = self._available()
+        n = min(available, max_samples)
+        rows = self.samples[self.position : self.position + n]
+        if self.speed > 0:
+            timestamps = (self._start + self._offsets[self.position : self.position + n] / self.speed).tolist()
+        else:
+            timestamps = [time.perf_counter()] * n
+        self.position += n
+        if dest_obj is not None:
+            np.asarray(dest_obj).reshape(-1, self.channel_count)[:n] = rows
+            return None, timestamps
+        return rows.tolist(), timestamps
+
+    def flush(self) -> int:
+        n = self._available()
+        self.position += n
+        return n
+
+    def pull_sample(self, timeout: typing.Optional[float] = None):
+        samples, timestamps = self.pull_chunk(timeout=32000000.0 if timeout is None else timeout, max_samples=1)
+        if not timestamps:
+            return None, None
+        return samples[0], timestamps[0]
+
+
+class MockDobot(SimulatedDobot):
+    """Simulated Dobot whose moves take a fixed ``move_time`` (0 = instant).
+
+    Used by the benchmark, where the robot should not dominate the timing.
+    """
+
+    def __init__(self, port: typing.Optional[str] = None, verbose: bool = False, move_time: float = 0.0):
+        super().__init__(port=port, verbose=verbose)
+        self.move_time = move_time
+
+    def move_duration(self, start: typing.Sequence[float], end: typing.Sequence[float]) -> float:
+        return self.move_time
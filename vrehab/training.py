@@ -0,0 +1,195 @@
+"""Fitting of the rest/move intention classifier."""
+import concurrent.futures
+import itertools
+import os
+import time
+import typing
+
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+
+from vrehab.cancel import CANCEL_POLL, CancelToken
+
+
+def fit_intent_model(selected) -> typing.Tuple[StandardScaler, LogisticRegression, float]:
+    """Fit the scaler and logistic model on a rest/move table.
+
+    ``selected`` has one column per channel followed by the ``Event`` label.
+    Returns ``(scaler, model, accuracy)`` with accuracy in percent on a random
+    10% hold-out.
+    """
+    X = selected.iloc[1:, :-1].values
+    y = selected.iloc[1:, -1].values
+    scaler = StandardScaler()
+    Xs = scaler.fit_transform(X)
+    X_train, X_test, y_train, y_test = train_test_split(Xs, y, test_size=0.1)
+    model = LogisticRegression()
+    model.fit(X_train, y_train)
+    pred = model.predict(X_test)
+    return scaler, model, accuracy_score(y_test, pred) * 100
+
+
+DEFAULT_GRID = {"C": (0.01, 0.1, 1.0, 10.0), "solver": ("lbfgs", "liblinear")}
+
+
+class ModelSelection(typing.NamedTuple):
+    scaler: StandardScaler
+    model: LogisticRegression
+    accuracy: typing.Optional[float]
+    params: typing.Dict[str, typing.Any]
+    fold_scores: typing.Dict[str, typing.List[float]]
+    elapsed: float
+    complete: bool
+
+
+def blocked_folds(labels: np.ndarray, folds: int = 5, gap: int = 128) -> typing.List[typing.Tuple[np.ndarray, np.ndarray]]:
+    """Time-blocked folds over a recording made of contiguous label runs.
+
+    Every run (e.g. one rest or move period) is cut into ``folds`` contiguous
+    blocks and fold ``k`` tests on block ``k`` of every run, so each fold sees
+    both classes. ``gap`` rows on either side of a test block are left out of
+    training, keeping autocorrelated neighbours from leaking into the score.
+    """
+    labels = np.asarray(labels)
+    n = len(labels)
+    starts = np.flatnonzero(np.r_[True, labels[1:] != labels[:-1]])
+    ends = np.r_[starts[1:], n]
+    result = []
+    for k in range(folds):
+        test = np.zeros(n, dtype=bool)
+        purge = np.zeros(n, dtype=bool)
+        for start, end in zip(starts, ends):
+            edges = np.linspace(start, end, folds + 1).astype(int)
+            lo, hi = edges[k], edges[k + 1]
+            test[lo:hi] = True
+            purge[max(start, lo - gap):min(end, hi + gap)] = True
+        result.append((np.flatnonzero(~purge), np.flatnonzero(test)))
+    return result
+
+
+_X = _y = _folds = None
+
+
+def _init_worker(X, y, folds) -> None:
+    global _X, _y, _folds
+    _X, _y, _folds = X, y, folds
+
+
+def _score_split(X, y, train, test, params: typing.Dict[str, typing.Any]) -> float:
+    scaler = StandardScaler().fit(X[train])
+    model = LogisticRegression(max_iter=1000, **params).fit(scaler.transform(X[train]), y[train])
+    return float(model.score(scaler.transform(X[test]), y[test]))
+
+
+def _score_fold(params: typing.Dict[str, typing.Any], fold: int) -> float:
+    train, test = _folds[fold]
+    return _score_split(_X, _y, train, test, params)
+
+
+def _key(params: typing.Dict[str, typing.Any]) -> str:
+    return ", ".join(f"{k}={v}" for k, v in sorted(params.items()))
+
+
+def select_intent_model(
+    selected,
+    grid: typing.Optional[typing.Dict[str, typing.Sequence]] = None,
+    folds: int = 5,
+    gap: int = 128,
+    time_budget: float = 30.0,
+    workers: typing.Optional[int] = None,
+    executor: typing.Optional[concurrent.futures.Executor] = None,
+    cancel: typing.Optional[CancelToken] = None,
+) -> ModelSelection:
+    """Pick C and solver by time-blocked cross-validation on a process pool.
+
+    Takes the same table as ``fit_intent_model``. Every (parameters, fold)
+    pair is a separate task; tasks are submitted in candidate order, at most
+    ``workers`` at a time, so that when ``time_budget`` seconds run out the
+    candidates already finished are complete, nothing is left queued and only
+    the tasks of the last wave may still be running. The best candidate by
+    mean fold accuracy is refit on all rows. If nothing finished in time the
+    default ``LogisticRegression`` is used, ``accuracy`` is None and
+    ``complete`` is False. ``accuracy`` is the mean fold accuracy in percent.
+
+    ``time_budget`` covers the search only: the final refit on all rows runs
+    after it, and ``elapsed`` includes it.
+
+    With a shared ``executor`` (several sessions training in one process)
+    each task carries its own fold data and the executor is left running.
+    Cancelling ``cancel`` abandons the search within ``CANCEL_POLL`` and
+    raises ``Cancelled`` without refitting.
+    """
+    started = time.perf_counter()
+    X = np.ascontiguousarray(selected.iloc[1:, :-1].values, dtype=np.float64)
+    y = selected.iloc[1:, -1].values
+    split = blocked_folds(y, folds, gap)
+    grid = grid if grid is not None else DEFAULT_GRID
+    candidates = [dict(zip(grid, values)) for values in itertools.product(*grid.values())]
+    # Cheap, well-conditioned candidates first so the budget always covers them
+    candidates.sort(key=lambda p: abs(np.log10(p.get("C", 1.0))))
+
+    scores = {_key(p): [None] * folds for p in candidates}
+    if executor is None:
+        pool = concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers or os.cpu_count(), initializer=_init_worker, initargs=(X, y, split)
+        )
+    else:
+        pool = executor
+    jobs = [(params, fold) for params in candidates for fold in range(folds)]
+    # One wave in flight at a time, so at most that many tasks outlive the budget
+    wave = workers or os.cpu_count() or 1
+    submitted = 0
+    pending = {}
+    deadline = started + time_budget
+    try:
+        while True:
+            if cancel is not None:
+                cancel.raise_if_cancelled()
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            while submitted < len(jobs) and len(pending) < wave:
+                params, fold = jobs[submitted]
+                submitted += 1
+                if executor is None:
+                    future = pool.submit(_score_fold, params, fold)
+                else:
+                    train, test = split[fold]
+                    future = pool.submit(_score_split, X, y, train, test, params)
+                pending[future] = (_key(params), fold)
+            if not pending:
+                break
+            done, _ = concurrent.futures.wait(pending, timeout=min(remaining, CANCEL_POLL) if cancel else remaining,
+                                              return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                key, fold = pending.pop(future)
+                scores[key][fold] = future.result()
+    finally:
+        for future in pending:
+            future.cancel()
+        if executor is None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    finished = {key: s for key, s in scores.items() if None not in s}
+    by_key = {_key(p): p for p in candidates}
+    if finished:
+        best = max(finished, key=lambda key: np.mean(finished[key]))
+        params = by_key[best]
+        accuracy = float(np.mean(finished[best])) * 100
+    else:
+        params = {}
+        accuracy = None
+    scaler = StandardScaler()
+    model = LogisticRegression(max_iter=1000, **params).fit(scaler.fit_transform(X), y)
+    return ModelSelection(
+        scaler=scaler,
+        model=model,
+        accuracy=accuracy,
+        params=params,
+        fold_scores=finished,
+        elapsed=time.perf_counter() - started,
+        complete=len(finished) == len(candidates),
+    )
@@ -0,0 +1,61 @@
+"""Coalescing, rate-limited UI update bus for Tkinter."""
+import threading
+import time
+import typing
+
+
+class UiBus:
+    """Collect widget updates from any thread and apply them from the Tk loop.
+
+    ``post`` keeps only the latest update per key, so a worker reporting every
+    sample still causes at most one redraw per widget per flush. ``log`` lines
+    are timestamped, buffered and handed to ``log_sink`` as a single batch.
+    Flushes run on the Tk main loop at ``hz``, independent of the EEG sample
+    rate.
+    """
+
+    def __init__(self, root, log_sink: typing.Callable[[typing.List[str]], None], hz: float = 30.0):
+        self.root = root
+        self.log_sink = log_sink
+        self.interval_ms = max(1, int(1000 / hz))
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._lines = []
+        self._running = False
+
+    def start(self) -> None:
+        if not self._running:
+            self._running = True
+            self.root.after(self.interval_ms, self._flush)
+
+    def stop(self) -> None:
+        self._running = False
+
+    def post(self, key: str, fn: typing.Callable, *args, **kwargs) -> None:
+        """Schedule ``fn(*args, **kwargs)``, replacing any pending update with the same key."""
+        with self._lock:
+            self._pending[key] = (fn, args, kwargs)
+
+    def log(self, message: str) -> None:
+        """Queue ``message`` as a timestamped log line; safe to call from any thread."""
+        line = self._format(message)
+        with self._lock:
+            self._lines.append(line)
+
+    @staticmethod
+    def _format(message: str) -> str:
+        return f"[{time.strftime('%H:%M:%S')}] {message}\n"
+
+    def _flush(self) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            lines, self._lines = self._lines, []
+        for fn, args, kwargs in pending.values():
+            try:
+                fn(*args, **kwargs)
+            except Exception as e:
+                lines.append(self._format(f"UI update error: {e}"))
+        if lines:
+            self.log_sink(lines)
+        if self._running:
+            self.root.after(self.interval_ms, self._flush)
@@ -0,0 +1,189 @@
+"""Session state machine: calibrate -> train -> control -> cooldown (-> paused).
+
+``SessionMachine`` holds the phase of a session and the decision rules for
+each one, but never reads a stream, sleeps or trains a model itself. A
+driver feeds it the time (and, during control, the classifier's decisions)
+and acts on what it reports, so the same machine runs under the GUI engine,
+the headless CLI and ``eegwitharduino.py``, and can be stepped through in a
+test with made-up timestamps. Every phase can be re-entered at any time:
+stopping in the middle of control and starting again continues with the
+same trigger count, and a cooldown simply expires on the next chunk after
+its deadline while the driver keeps draining the stream.
+"""
+import typing
+
+IDLE = "idle"
+CALIBRATE = "calibrate"
+TRAIN = "train"
+READY = "ready"
+CONTROL = "control"
+COOLDOWN = "cooldown"
+PAUSED = "paused"
+PHASES = (IDLE, CALIBRATE, TRAIN, READY, CONTROL, COOLDOWN, PAUSED)
+
+
+class LeakyCounter:
+    """The movement counter used by the control loop.
+
+    +1 when the classifier reports intention, -1 (never below 0) otherwise.
+    When the count reaches the threshold it fires and resets to 0.
+    """
+
+    def __init__(self, threshold: int):
+        self.threshold = threshold
+        self.value = 0
+
+    def update(self, intention) -> bool:
+        if intention == 1:
+            self.value += 1
+        elif self.value > 0:
+            self.value -= 1
+        if self.value >= self.threshold:
+            self.value = 0
+            return True
+        return False
+
+
+class CalibrationStage(typing.NamedTuple):
+    name: str
+    # 0 = rest, 1 = imagined movement, None = lead-in (samples are discarded)
+    label: typing.Optional[int]
+    duration: float
+    message: str
+
+
+class SessionMachine:
+    """Phases of a rehab session and the rules for moving between them.
+
+    Calibration is a fixed schedule: ``lead_in`` seconds to get ready, rest
+    for ``rest_s``, another lead-in, imagined movement for ``move_s``. During
+    control the leaky counter runs on the decisions passed to ``decide``; a
+    trigger enters ``COOLDOWN`` for ``cooldown`` seconds (0 = stay in
+    control), during which decisions are ignored. ``pause`` suspends control
+    (``PAUSED``, e.g. while the stream is unhealthy) and ``resume`` restarts
+    it with a fresh counter. ``on_phase`` receives
+    ``(phase, stage)`` on every transition, with the calibration stage or
+    None.
+    """
+
+    def __init__(self, rest_s: float = 30.0, move_s: float = 30.0, lead_in: float = 0.0, cooldown: float = 0.0,
+                 threshold: int = 700, on_phase: typing.Optional[typing.Callable[[str, typing.Optional[CalibrationStage]], None]] = None):
+        self.rest_s = rest_s
+        self.move_s = move_s
+        self.lead_in = lead_in
+        self.cooldown = cooldown
+        self.counter = LeakyCounter(threshold)
+        self.on_phase = on_phase
+        self.phase = IDLE
+        self.triggers = 0
+        self.stages: typing.List[CalibrationStage] = []
+        self._stage = 0
+        self._stage_start = 0.0
+        self._cooldown_until = 0.0
+
+    @property
+    def stage(self) -> typing.Optional[CalibrationStage]:
+        if self.phase != CALIBRATE or self._stage >= len(self.stages):
+            return None
+        return self.stages[self._stage]
+
+    def _enter(self, phase: str) -> None:
+        self.phase = phase
+        if self.on_phase:
+            self.on_phase(phase, self.stage)
+
+    def calibration_stages(self) -> typing.List[CalibrationStage]:
+        stages = [
+            CalibrationStage("get-ready", None, self.lead_in, f"Relax in {self.lead_in:.0f}s"),
+            CalibrationStage("rest", 0, self.rest_s, f"Relax {self.rest_s:.0f}s"),
+            CalibrationStage("get-ready", None, self.lead_in, f"Imagine movement in {self.lead_in:.0f}s"),
+            CalibrationStage("move", 1, self.move_s, f"Imagine {self.move_s:.0f}s"),
+        ]
+        return [s for s in stages if s.duration > 0]
+
+    # =============== CALIBRATE / TRAIN ===============
+    def begin_calibration(self, now: float) -> None:
+        self.stages = self.calibration_stages()
+        self._stage = 0
+        self._stage_start = now
+        self._enter(CALIBRATE if self.stages else TRAIN)
+
+    def label(self, now: float) -> typing.Optional[int]:
+        """Label for samples read at ``now`` during calibration (None = discard them).
+
+        Advances through the stages as time passes and moves to ``TRAIN``
+        once the last one is over.
+        """
+        if self.phase != CALIBRATE:
+            return None
+        while self._stage < len(self.stages) and now - self._stage_start >= self.stages[self._stage].duration:
+            self._stage_start += self.stages[self._stage].duration
+            self._stage += 1
+            if self._stage < len(self.stages):
+                self._enter(CALIBRATE)
+        if self._stage >= len(self.stages):
+            self._enter(TRAIN)
+            return None
+        return self.stages[self._stage].label
+
+    def stage_remaining(self, now: float) -> float:
+        """Seconds left in the current calibration stage."""
+        stage = self.stage
+        return max(0.0, stage.duration - (now - self._stage_start)) if stage is not None else 0.0
+
+    def progress(self, now: float) -> float:
+        """Percent of the calibration schedule done."""
+        total = sum(s.duration for s in self.stages)
+        if self.phase != CALIBRATE or total <= 0:
+            return 100.0 if self.phase in (TRAIN, READY) else 0.0
+        done = sum(s.duration for s in self.stages[: self._stage]) + min(now - self._stage_start, self.stages[self._stage].duration)
+        return 100.0 * done / total
+
+    def training_finished(self, ok: bool) -> None:
+        """Report the result of training the samples collected during calibration."""
+        self._enter(READY if ok else IDLE)
+
+    # =============== CONTROL / COOLDOWN ===============
+    def begin_control(self) -> None:
+        self.counter.value = 0
+        self._enter(CONTROL)
+
+    def decide(self, intentions: typing.Iterable, now: float) -> typing.List[int]:
+        """Run the counter over one chunk of decisions; returns the indices that triggered.
+
+        In ``COOLDOWN`` the chunk is ignored until ``now`` passes the
+        deadline, then control resumes with a fresh counter. A trigger
+        during a cooldown-enabled session ignores the rest of its chunk.
+        """
+        if self.phase == COOLDOWN:
+            if now < self._cooldown_until:
+                return []
+            self.begin_control()
+        if self.phase != CONTROL:
+            return []
+        fired = []
+        counter = self.counter
+        for i, intention in enumerate(intentions):
+            if counter.update(intention):
+                fired.append(i)
+                self.triggers += 1
+                if self.cooldown > 0:
+                    self._cooldown_until = now + self.cooldown
+                    self._enter(COOLDOWN)
+                    break
+        return fired
+
+    def pause(self) -> None:
+        if self.phase in (CONTROL, COOLDOWN):
+            self._enter(PAUSED)
+
+    def resume(self) -> None:
+        if self.phase == PAUSED:
+            self.begin_control()
+
+    def cooldown_left(self, now: float) -> float:
+        return max(0.0, self._cooldown_until - now) if self.phase == COOLDOWN else 0.0
+
+    def stop(self) -> None:
+        if self.phase != IDLE:
+            self._enter(IDLE)